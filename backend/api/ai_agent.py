@@ -1,133 +1,268 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
-from google.api_core.exceptions import ResourceExhausted, InvalidArgument, NotFound
-import os
+import asyncio
+import json
+import logging
+import time
 import httpx
 from dotenv import load_dotenv
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from datetime import datetime
 
 # DB Imports
-from api.database import get_db
-from api.models import User, Post
+from api.database import get_db, get_async_db, AsyncSessionLocal
+from api.models import Post
+from api.config import POSTS_PAGE_SIZE, POSTS_MAX_PAGE_SIZE
+from api.sessions import get_optional_user_id, get_current_user
+from api.instrumentation import STAGE_SECONDS, stage_timer
+from api.llm_gateway import llm_gateway
+from api.model_router import model_router
+from api.http_client import get_http_client
 
 load_dotenv()
 
 router = APIRouter()
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
-
-CANDIDATE_MODELS = [
-    "gemini-2.5-flash",      # Put the working one FIRST
-    "gemini-1.5-flash",      # Backup
-    "gemini-2.0-flash-exp"   
-]
-
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+logger = logging.getLogger(__name__)
 
 class PostRequest(BaseModel):
     topic: str
     tone: str = "Professional"
     author_style: str = "" 
+    fresh: bool = False  # True = skip the response cache and ask Gemini for a new post
 
 class PublishRequest(BaseModel):
     token: str
     text: str
     visibility: str = "PUBLIC"
 
+# --- HELPERS (shared by the buffered and streaming endpoints) ---
+def build_post_prompt(request: PostRequest):
+    return (
+        f"Write a LinkedIn post about {request.topic} (Tone: {request.tone}). "
+        "Return ONLY the post text. No intro. Keep it under 200 words."
+    )
+
+
+def clean_post_text(text: str):
+    return text.replace('"', '')
+
+
+async def save_post(db: AsyncSession, user_id: int, content: str):
+    # SAVE TO DATABASE (Only on Success, and only for a logged-in user)
+    if not user_id:
+        return
+    try:
+        new_post = Post(content=content, user_id=user_id)
+        db.add(new_post)
+        await db.commit()
+    except Exception:
+        logger.exception("Could not save post (non-fatal)", extra={"user_id": user_id})
+
+
+async def save_post_in_new_session(user_id: int, content: str):
+    # The request's session is gone once a streaming response starts, so use our own
+    async with AsyncSessionLocal() as db:
+        await save_post(db, user_id, content)
+
+
+# --- POST HISTORY (keyset pagination, newest first) ---
+def encode_cursor(post: Post):
+    return f"{post.created_at.isoformat()}_{post.id}"
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, post_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def list_posts(db: Session, user_id: int, cursor: str = None, limit: int = POSTS_PAGE_SIZE):
+    """
+    One page of a user's posts, newest first, read straight off the
+    (user_id, created_at) index. Pass the returned next_cursor to get the
+    page after it; None means there are no older posts.
+    """
+    query = db.query(Post).filter(Post.user_id == user_id)
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Post.created_at < created_at,
+            and_(Post.created_at == created_at, Post.id < post_id),
+        ))
+    rows = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def post_to_dict(post: Post):
+    return {"id": post.id, "content": post.content, "created_at": post.created_at.isoformat()}
+
+
+def mock_post(topic: str):
+    return (
+        f"⚠️ (AI Unavailable) \n\n"
+        f"We hit the daily quota limit on the free tier.\n\n"
+        f"Here is a template for '{topic}':\n\n"
+        f"I'm excited to share my latest thoughts on {topic}. It's changing the way we work! 🚀\n\n"
+        f"#Tech #Innovation #{topic.replace(' ', '')}"
+    )
+
+
+def sse_event(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/generate/post")
 async def generate_post(
     request: PostRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_optional_user_id)
 ):
-    if not GOOGLE_API_KEY: 
+    if not llm_gateway.enabled:
         return {"content": "Error: GEMINI_API_KEY not found in .env file."}
 
-    # --- ROBUST LOOP: Try models one by one ---
-    for model_name in CANDIDATE_MODELS:
-        try:
-            # print(f"Attempting with {model_name}...") 
-            model = genai.GenerativeModel(model_name)
-            
-            prompt = (
-                f"Write a LinkedIn post about {request.topic} (Tone: {request.tone}). "
-                "Return ONLY the post text. No intro. Keep it under 200 words."
+    # --- MODEL ROUTER: healthiest model first, hedged to the next one if it's slow ---
+    try:
+        with stage_timer("post", "prompt"):
+            prompt = build_post_prompt(request)
+        # No retries here: on a 429 the router falls through to the next model instead
+        with stage_timer("post", "llm"):
+            response_text, model_name = await model_router.generate_with_model(
+                prompt, cache=True, fresh=request.fresh, max_retries=0
             )
+        with stage_timer("post", "parse"):
+            clean_text = clean_post_text(response_text).strip()
+        with stage_timer("post", "persist"):
+            await save_post(db, user_id, clean_text)
 
-            response = model.generate_content(prompt)
-            
-            if response.text:
-                clean_text = response.text.strip().replace('"', '')
-
-                # SAVE TO DATABASE (Only on Success)
-                try:
-                    user = db.query(User).first()
-                    if user:
-                        new_post = Post(content=clean_text, user_id=user.id)
-                        db.add(new_post)
-                        db.commit()
-                except Exception as db_err:
-                    print(f"Database Error (Non-fatal): {db_err}")
-
-                print(f"✅ Success using model: {model_name}")
-                return {"content": clean_text}
-
-        except (ResourceExhausted, InvalidArgument, NotFound) as e:
-            print(f"⚠️ Failed with {model_name}: {e}")
-            continue # Try the next model in the list
-            
-        except Exception as e:
-            print(f"❌ Error with {model_name}: {e}")
-            continue
+        logger.info("Post generated", extra={"model": model_name})
+        return {"content": clean_text}
+
+    except Exception as e:
+        logger.warning("Post generation failed", extra={"error": str(e)})
 
     # --- FALLBACK: If loop finishes and nothing worked ---
-    print("⚠️ All AI models failed. Returning Mock Response.")
-    mock_text = (
-        f"⚠️ (AI Unavailable) \n\n"
-        f"We hit the daily quota limit on the free tier.\n\n"
-        f"Here is a template for '{request.topic}':\n\n"
-        f"I'm excited to share my latest thoughts on {request.topic}. It's changing the way we work! 🚀\n\n"
-        f"#Tech #Innovation #{request.topic.replace(' ', '')}"
-    )
-    
-    return {"content": mock_text}
+    logger.warning("All AI models failed, returning mock post")
+    return {"content": mock_post(request.topic)}
+
+
+@router.post("/generate/post/stream")
+async def generate_post_stream(request: PostRequest, user_id: int = Depends(get_optional_user_id)):
+    """
+    Same as /generate/post, but as Server-Sent Events: `chunk` events carry text
+    as Gemini produces it, then one `done` event with the full post (saved to the
+    Post table by then). A model that fails before its first chunk is skipped
+    for the next one in the router's order; a failure mid-stream ends with `error`.
+    """
+    async def stream():
+        if not llm_gateway.enabled:
+            yield sse_event("done", {"content": "Error: GEMINI_API_KEY not found in .env file.", "model": None})
+            return
+
+        with stage_timer("post-stream", "prompt"):
+            prompt = build_post_prompt(request)
+        hit = None if request.fresh else await asyncio.to_thread(model_router.cached, prompt)
+        if hit is not None:
+            content = clean_post_text(hit[0]).strip()
+            yield sse_event("chunk", {"text": content})
+            await save_post_in_new_session(user_id, content)
+            yield sse_event("done", {"content": content, "model": hit[1]})
+            return
+
+        for model_name in model_router.order():
+            parts = []
+            started = time.monotonic()
+            try:
+                # Cache lookup already done above; fresh=True only stores the result
+                async for text in llm_gateway.stream(prompt, model_name, cache=True, fresh=True):
+                    text = clean_post_text(text)
+                    if not parts:
+                        text = text.lstrip()
+                    parts.append(text)
+                    yield sse_event("chunk", {"text": text})
+            except Exception as e:
+                model_router.record(model_name, error=e)
+                logger.warning("Model call failed", extra={"model": model_name, "error": str(e)})
+                if parts:
+                    # Text already reached the client; switching models now would garble it
+                    yield sse_event("error", {"detail": "Generation was interrupted. Please try again."})
+                    return
+                continue
+
+            content = "".join(parts).strip()
+            if not content:
+                model_router.record(model_name, error=ValueError(f"Empty response from {model_name}"))
+                continue
+            model_router.record(model_name, seconds=time.monotonic() - started)
+            STAGE_SECONDS.labels("post-stream", "llm").observe(time.monotonic() - started)
+
+            with stage_timer("post-stream", "persist"):
+                await save_post_in_new_session(user_id, content)
+
+            logger.info("Post streamed", extra={"model": model_name})
+            yield sse_event("done", {"content": content, "model": model_name})
+            return
+
+        logger.warning("All AI models failed, returning mock post")
+        yield sse_event("done", {"content": mock_post(request.topic), "model": None})
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/user/posts")
+def get_post_history(
+    cursor: str = None,
+    limit: int = POSTS_PAGE_SIZE,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """The logged-in user's posts, newest first. Follow next_cursor for older pages."""
+    posts, next_cursor = list_posts(db, user.id, cursor, max(1, min(limit, POSTS_MAX_PAGE_SIZE)))
+    return {"posts": [post_to_dict(p) for p in posts], "next_cursor": next_cursor}
+
 
 @router.post("/publish/linkedin")
-async def publish_post(request: PublishRequest):
+async def publish_post(request: PublishRequest, client: httpx.AsyncClient = Depends(get_http_client)):
     if not request.token:
         raise HTTPException(status_code=401, detail="No token provided")
 
-    async with httpx.AsyncClient() as client:
-        # 1. Fetch User ID
-        me_res = await client.get("https://api.linkedin.com/v2/userinfo", headers={"Authorization": f"Bearer {request.token}"})
-        if me_res.status_code != 200:
-            raise HTTPException(status_code=400, detail="ID Fetch Failed")
-        
-        user_id = me_res.json().get("sub")
-        
-        # 2. Publish Post
-        post_url = "https://api.linkedin.com/v2/ugcPosts"
-        payload = {
-            "author": f"urn:li:person:{user_id}",
-            "lifecycleState": "PUBLISHED",
-            "specificContent": {
-                "com.linkedin.ugc.ShareContent": {
-                    "shareCommentary": {"text": request.text},
-                    "shareMediaCategory": "NONE"
-                }
-            },
-            "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": request.visibility}
-        }
-
-        headers = {
-            "Authorization": f"Bearer {request.token}", 
-            "Content-Type": "application/json", 
-            "X-Restli-Protocol-Version": "2.0.0"
-        }
-        
-        response = await client.post(post_url, json=payload, headers=headers)
+    # 1. Fetch User ID
+    me_res = await client.get("https://api.linkedin.com/v2/userinfo", headers={"Authorization": f"Bearer {request.token}"})
+    if me_res.status_code != 200:
+        raise HTTPException(status_code=400, detail="ID Fetch Failed")
+    
+    user_id = me_res.json().get("sub")
+    
+    # 2. Publish Post
+    post_url = "https://api.linkedin.com/v2/ugcPosts"
+    payload = {
+        "author": f"urn:li:person:{user_id}",
+        "lifecycleState": "PUBLISHED",
+        "specificContent": {
+            "com.linkedin.ugc.ShareContent": {
+                "shareCommentary": {"text": request.text},
+                "shareMediaCategory": "NONE"
+            }
+        },
+        "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": request.visibility}
+    }
+
+    headers = {
+        "Authorization": f"Bearer {request.token}", 
+        "Content-Type": "application/json", 
+        "X-Restli-Protocol-Version": "2.0.0"
+    }
+    
+    response = await client.post(post_url, json=payload, headers=headers)
+    
+    if response.status_code != 201:
+        raise HTTPException(status_code=400, detail=f"LinkedIn Rejected: {response.json().get('message')}")
         
-        if response.status_code != 201:
-            raise HTTPException(status_code=400, detail=f"LinkedIn Rejected: {response.json().get('message')}")
-            
-        return {"status": "success", "post_id": response.json().get("id")}
\ No newline at end of file
+    return {"status": "success", "post_id": response.json().get("id")}
\ No newline at end of file
@@ -1,64 +1,76 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
-import os
-from pypdf import PdfReader
-import io
+from typing import List
+import asyncio
 import json
-import re
-import time
+import logging
+import zipfile
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # DB & Internal Imports
-from api.database import get_db
-from api.models import User
-from api.scraper import scrape_linkedin_profile  # Ensure api/scraper.py exists
+from api.database import get_async_db
+from api.instrumentation import stage_timer
+from api.config import (
+    BATCH_MAX_FILES, BATCH_PACK_SIZE, BATCH_PACK_TOKENS, BATCH_MAX_CONCURRENCY,
+    PROMPT_TOKENS_RESUME, PROMPT_TOKENS_LINKEDIN, UPLOAD_MAX_BYTES, UPLOAD_MAX_REQUEST_BYTES,
+    SCRAPER_BULK_MAX_URLS,
+)
+from api.llm_gateway import llm_gateway
+from api.llm_json import (
+    AtsResult, AtsSkillsResult, LinkedInResult, PackedAtsItem, PackedAtsSkillsItem, PackedAtsResults,
+    generate_json, validate,
+)
+from api.model_router import model_router
+from api.pdf_service import pdf_service
+from api.profile_store import save_analysis
+from api.resume_text import prepare_text, prepare_plain, PROFILE_PRIORITY
+from api.scraper import profile_url, scrape_linkedin_profile, scrape_linkedin_profiles
+from api.sessions import get_optional_user_id
+from api.single_flight import single_flight
+from api.skills import covers, skill_index
+from api.tasks import task_queue, no_progress, require_pdf, require_field
+from api.uploads import receive_upload, received_upload, spool_stream
 
 load_dotenv()
 router = APIRouter()
-
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# --- MODEL SETUP ---
-model = None
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
-    try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-    except:
-        model = genai.GenerativeModel('gemini-pro')
-
-# --- HELPER: CLEAN JSON ---
-def clean_json_response(text):
-    # Remove markdown code blocks and extra text
-    clean = text.replace("```json", "").replace("```", "").strip()
-    match = re.search(r'\{.*\}', clean, re.DOTALL)
-    if match: return match.group(0)
-    return "{}"
+logger = logging.getLogger(__name__)
 
 # --- HELPER: SMART AI CALLER (THE FIX) ---
-def ask_gemini_with_retry(prompt):
+async def ask_gemini_with_retry(prompt):
     """
-    Tries to call Gemini. If it hits a 429 (Rate Limit), 
-    it waits 5 seconds and tries again.
+    Calls Gemini through the model router: models in cooldown are skipped,
+    slow calls are hedged to the next model, and 429s on the last model are
+    retried with async jittered backoff, so waiting never blocks the event loop.
+    Returns the response text; identical prompts are served from the LLM cache.
     """
-    retries = 0
-    max_retries = 3
-    
-    while retries < max_retries:
+    return await model_router.generate(prompt, cache=True)
+
+# --- HELPER: JSON ANSWERS (extract, repair, validate, re-prompt for missing fields) ---
+async def ask_gemini_for_json(prompt, schema, pipeline):
+    """ask_gemini_with_retry in JSON mode, validated into `schema` (see api/llm_json.py). Returns a dict."""
+    async def generate(text, json_mode, accept):
+        # Only answers that validate are cached, so a malformed one is not replayed on every retry
+        return await model_router.generate(text, cache=True, json_mode=json_mode, accept=accept)
+    result = await generate_json(generate, prompt, schema, pipeline)
+    return result.model_dump()
+
+# --- HELPER: SAVE ANALYSIS RUN (only for a logged-in user) ---
+async def save_analysis_run(db: AsyncSession, user_id, kind, data):
+    """Stores the result as the next version in profile_analyses (see api/profile_store.py)."""
+    if not user_id or db is None:
+        return
+    for attempt in range(3):
         try:
-            return model.generate_content(prompt)
-        except Exception as e:
-            if "429" in str(e):
-                print(f"⚠️ Quota Hit. Waiting 5 seconds... (Attempt {retries+1}/{max_retries})")
-                time.sleep(5) # Wait for quota to reset
-                retries += 1
-            else:
-                # If it's a real error (not quota), raise it immediately
-                raise e
-    
-    raise Exception("Max retries exceeded")
+            await db.run_sync(save_analysis, user_id, kind, data)
+            await db.commit()
+            return
+        except IntegrityError:
+            # Another run for the same (user, kind) took this version number first
+            await db.rollback()
+    logger.error("Could not save analysis", extra={"kind": kind, "user_id": user_id})
 
 # --- HELPER: FALLBACK DATA ---
 def get_fallback_linkedin():
@@ -78,128 +90,433 @@ def get_fallback_resume():
         "feedback_list": ["System is cooling down", "Try again in a moment"]
     }
 
+# --- HELPER: RESUME PROMPT (shared by single + batch so cache entries line up) ---
+def resume_fields(with_skills):
+    # Skills come from api/skills.py unless the taxonomy barely covers the resume
+    return [
+        "'ats_score': 0-100.",
+        *(["'top_skills': List of 5 hard skills."] if with_skills else []),
+        "'missing_sections': What is missing?.",
+        "'feedback_list': 3 formatting fixes.",
+    ]
+
+def build_resume_prompt(text, with_skills=False):
+    return (
+        "Act as a Hiring Manager. Analyze this Resume. Extract strict JSON:\n"
+        + "".join(f"{n}. {field}\n" for n, field in enumerate(resume_fields(with_skills), 1))
+        + "Return ONLY JSON.\n"
+        f"RESUME TEXT:\n{prepare_text(text, PROMPT_TOKENS_RESUME)}"
+    )
+
+def resume_skills(text, data):
+    """top_skills from the taxonomy, or the model's (normalized) list when it was asked for one."""
+    found = skill_index.extract(text)
+    if covers(found):
+        return skill_index.ranked(found)
+    return skill_index.normalize(data.get("top_skills", []))
+
+# --- HELPER: SCRAPED PROFILE PROMPT ---
+def build_scraped_prompt(raw_text):
+    return (
+        "Analyze this Scraped LinkedIn Data. Extract strict JSON:\n"
+        "1. 'top_experience': Current Role or Headline.\n"
+        "2. 'years_experience': Estimate from text.\n"
+        "3. 'connections_count': '500+' (Default).\n"
+        "4. 'summary_rating': 0-100.\n"
+        "5. 'feedback_list': 3 tips.\n"
+        "Return ONLY JSON.\n"
+        f"DATA:\n{prepare_plain(raw_text, PROMPT_TOKENS_LINKEDIN)}"
+    )
+
 # --- DATA MODELS ---
 class ScrapeRequest(BaseModel):
     url: str
 
+class BulkScrapeRequest(BaseModel):
+    urls: List[str]
+
 # ==========================================
 # API 1: URL SCRAPER (RESTORED!)
 # ==========================================
-@router.post("/analyze/scrape-url")
-async def analyze_url(request: ScrapeRequest, db: Session = Depends(get_db)):
-    print(f"--- DEBUG: Scraping URL: {request.url} ---")
-    
-    # 1. Run Selenium
-    scraped_data = scrape_linkedin_profile(request.url)
+def require_profile_url(url):
+    try:
+        return profile_url(url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def scrape_url_pipeline(url, db, report=no_progress, user_id=None):
+    url = require_profile_url(url)
+    # 1. Run Selenium (pooled warm driver, in a worker thread)
+    await report(10, "scraping")
+    with stage_timer("scrape-url", "scrape"):
+        scraped_data = await scrape_linkedin_profile(url)
     
     if not scraped_data:
         raise HTTPException(status_code=400, detail="Scraping failed. Check server logs.")
 
     # 2. Analyze with AI
-    if not model: return {"error": "AI Key Missing"}
+    if not llm_gateway.enabled: return {"error": "AI Key Missing"}
 
-    prompt = (
-        "Analyze this Scraped LinkedIn Data. Extract strict JSON:\n"
-        "1. 'top_experience': Current Role or Headline.\n"
-        "2. 'years_experience': Estimate from text.\n"
-        "3. 'connections_count': '500+' (Default).\n"
-        "4. 'summary_rating': 0-100.\n"
-        "5. 'feedback_list': 3 tips.\n"
-        "Return ONLY JSON.\n"
-        f"DATA:\n{scraped_data['raw_text'][:6000]}"
-    )
+    with stage_timer("scrape-url", "prompt"):
+        prompt = build_scraped_prompt(scraped_data['raw_text'])
 
     try:
-        response = ask_gemini_with_retry(prompt)
-        data = json.loads(clean_json_response(response.text))
+        await report(50, "analyzing")
+        data = await ask_gemini_for_json(prompt, LinkedInResult, "scrape-url")
         
         # 3. Save to DB
-        user = db.query(User).first()
-        if user:
-            user.profile_summary = json.dumps(data)
-            db.commit()
+        await report(90, "saving")
+        with stage_timer("scrape-url", "persist"):
+            await save_analysis_run(db, user_id, "linkedin", data)
             
         return data
-    except Exception as e:
-        print(f"AI Error: {e}")
+    except Exception:
+        logger.exception("Profile analysis failed", extra={"url": url})
         return get_fallback_linkedin()
 
+@router.post("/analyze/scrape-url")
+async def analyze_url(
+    request: ScrapeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_optional_user_id)
+):
+    url = require_profile_url(request.url)
+    logger.info("Scrape started", extra={"url": url})
+    # A double-click or retry shares the running scrape instead of opening another Chrome session
+    return await single_flight.do(
+        "scrape-url", (url, user_id), lambda: scrape_url_pipeline(url, db, user_id=user_id)
+    )
+
 # ==========================================
-# API 2: LINKEDIN PDF ANALYZER
+# API 1b: BULK URL SCRAPER
 # ==========================================
-@router.post("/analyze/linkedin")
-async def analyze_linkedin(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    print(f"--- DEBUG: LinkedIn Analysis Started for {file.filename} ---")
-    
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Upload a PDF.")
+@router.post("/analyze/scrape-urls")
+async def analyze_urls(request: BulkScrapeRequest):
+    if len(request.urls) > SCRAPER_BULK_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Bulk limit is {SCRAPER_BULK_MAX_URLS} profiles.")
+    urls = [require_profile_url(url) for url in request.urls]
+    logger.info("Bulk scrape started", extra={"urls": len(urls)})
+
+    with stage_timer("scrape-urls", "scrape"):
+        scraped = await scrape_linkedin_profiles(urls)
+
+    async def analyze(url, scraped_data):
+        if not scraped_data:
+            return {"url": url, "status": "error", "error": "Scraping failed. Check server logs."}
+        if not llm_gateway.enabled:
+            return {"url": url, "status": "scraped", "name": scraped_data["name"]}
+        try:
+            data = await ask_gemini_for_json(build_scraped_prompt(scraped_data["raw_text"]), LinkedInResult, "scrape-urls")
+            return {"url": url, "status": "success", "name": scraped_data["name"], **data}
+        except Exception:
+            logger.exception("Profile analysis failed", extra={"url": url})
+            return {"url": url, "status": "error", "name": scraped_data["name"], **get_fallback_linkedin()}
 
+    results = await asyncio.gather(*[analyze(url, data) for url, data in zip(urls, scraped)])
+    return {"count": len(results), "results": results}
+
+# ==========================================
+# API 2: LINKEDIN PDF ANALYZER
+# ==========================================
+async def linkedin_pdf_pipeline(contents, db, report=no_progress, user_id=None):
     try:
-        contents = await file.read()
-        reader = PdfReader(io.BytesIO(contents))
-        text = "".join([page.extract_text() or "" for page in reader.pages])
-
-        if len(text) < 50: return get_fallback_linkedin()
-        if not model: return get_fallback_linkedin()
-
-        prompt = (
-            "Analyze this LinkedIn Profile PDF. Extract fields in strict JSON:\n"
-            "1. 'top_experience': Most recent role.\n"
-            "2. 'years_experience': Number of years.\n"
-            "3. 'connections_count': Extract number from '500+ connections'.\n"
-            "4. 'summary_rating': 0-100.\n"
-            "5. 'feedback_list': Array of 3 tips.\n"
-            "Return ONLY JSON.\n"
-            f"TEXT:\n{text[:6000]}"
-        )
+        await report(10, "extracting")
+        with stage_timer("linkedin", "extract"):
+            text = await pdf_service.extract_text(contents)
+
+        if len(text.strip()) < 50: return get_fallback_linkedin()
+        if not llm_gateway.enabled: return get_fallback_linkedin()
 
-        response = ask_gemini_with_retry(prompt)
-        data = json.loads(clean_json_response(response.text))
+        with stage_timer("linkedin", "prompt"):
+            prompt = (
+                "Analyze this LinkedIn Profile PDF. Extract fields in strict JSON:\n"
+                "1. 'top_experience': Most recent role.\n"
+                "2. 'years_experience': Number of years.\n"
+                "3. 'connections_count': Extract number from '500+ connections'.\n"
+                "4. 'summary_rating': 0-100.\n"
+                "5. 'feedback_list': Array of 3 tips.\n"
+                "Return ONLY JSON.\n"
+                f"TEXT:\n{prepare_text(text, PROMPT_TOKENS_LINKEDIN, PROFILE_PRIORITY)}"
+            )
+
+        await report(40, "analyzing")
+        data = await ask_gemini_for_json(prompt, LinkedInResult, "linkedin")
 
         # Save to DB
-        user = db.query(User).first()
-        if user:
-            user.profile_summary = json.dumps(data)
-            db.commit()
+        await report(90, "saving")
+        with stage_timer("linkedin", "persist"):
+            await save_analysis_run(db, user_id, "linkedin", data)
 
         return data
 
-    except Exception as e:
-        print(f"CRITICAL ERROR (LinkedIn): {e}")
+    except Exception:
+        logger.exception("LinkedIn analysis failed")
         return get_fallback_linkedin()
 
+@router.post("/analyze/linkedin")
+async def analyze_linkedin(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_optional_user_id)
+):
+    logger.info("LinkedIn analysis started", extra={"upload": file.filename})
+    
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Upload a PDF.")
+
+    async with received_upload(file) as upload:
+        return await single_flight.do(
+            "linkedin", (upload.sha256, user_id), lambda: linkedin_pdf_pipeline(upload, db, user_id=user_id)
+        )
+
 # ==========================================
 # API 3: RESUME / CV ANALYZER
 # ==========================================
+async def resume_pipeline(contents, report=no_progress, db=None, user_id=None):
+    try:
+        await report(10, "extracting")
+        with stage_timer("resume", "extract"):
+            text = await pdf_service.extract_text(contents)
+
+        if len(text.strip()) < 50: return get_fallback_resume()
+        if not llm_gateway.enabled: return get_fallback_resume()
+
+        with stage_timer("resume", "prompt"):
+            with_skills = not covers(skill_index.extract(text))
+            prompt = build_resume_prompt(text, with_skills)
+
+        await report(40, "analyzing")
+        data = await ask_gemini_for_json(prompt, AtsSkillsResult if with_skills else AtsResult, "resume")
+        with stage_timer("resume", "skills"):
+            data = {**data, "top_skills": resume_skills(text, data)}
+
+        await report(90, "saving")
+        with stage_timer("resume", "persist"):
+            await save_analysis_run(db, user_id, "resume", data)
+        return data
+
+    except Exception:
+        logger.exception("Resume analysis failed")
+        return get_fallback_resume()
+
 @router.post("/analyze/resume")
-async def analyze_resume(file: UploadFile = File(...)):
-    print(f"--- DEBUG: Resume Analysis Started for {file.filename} ---")
+async def analyze_resume(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_optional_user_id)
+):
+    logger.info("Resume analysis started", extra={"upload": file.filename})
 
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Upload a PDF.")
 
-    try:
-        contents = await file.read()
-        reader = PdfReader(io.BytesIO(contents))
-        text = "".join([page.extract_text() or "" for page in reader.pages])
-
-        if len(text) < 50: return get_fallback_resume()
-        if not model: return get_fallback_resume()
-
-        prompt = (
-            "Act as a Hiring Manager. Analyze this Resume. Extract strict JSON:\n"
-            "1. 'ats_score': 0-100.\n"
-            "2. 'top_skills': List of 5 hard skills.\n"
-            "3. 'missing_sections': What is missing?.\n"
-            "4. 'feedback_list': 3 formatting fixes.\n"
-            "Return ONLY JSON.\n"
-            f"RESUME TEXT:\n{text[:6000]}"
+    async with received_upload(file) as upload:
+        return await single_flight.do(
+            "resume", (upload.sha256, user_id), lambda: resume_pipeline(upload, db=db, user_id=user_id)
         )
 
-        response = ask_gemini_with_retry(prompt)
-        data = json.loads(clean_json_response(response.text))
-        return data
+# ==========================================
+# API 4: BATCH RESUME ANALYZER (NDJSON STREAM)
+# ==========================================
+# One global cap shared by every batch request, on top of the gateway's quota handling
+batch_semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+BATCH_PACK_LINGER_SECONDS = 0.2
+
+def unpack_uploads(upload):
+    """
+    Returns [(filename, Upload)] for a PDF or every PDF inside a zip. Zip
+    members are streamed out one at a time under the per-file size limit
+    (checked against the declared size first, so a zip bomb is never inflated).
+    """
+    filename = upload.filename
+    if filename.lower().endswith(".pdf"):
+        return [(filename, upload)]
+    if filename.lower().endswith(".zip"):
+        items = []
+        try:
+            with upload.open() as f, zipfile.ZipFile(f) as archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(".pdf"):
+                        continue
+                    if info.file_size > UPLOAD_MAX_BYTES:
+                        raise HTTPException(status_code=413, detail=f"{name} is larger than {UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+                    with archive.open(info) as member:
+                        items.append((name, spool_stream(name, member)))
+        except BaseException:
+            cleanup_uploads(items)
+            raise
+        finally:
+            upload.cleanup()
+        return items
+    upload.cleanup()
+    return []
 
-    except Exception as e:
-        print(f"CRITICAL ERROR (Resume): {e}")
-        return get_fallback_resume()
\ No newline at end of file
+def cleanup_uploads(items):
+    for _, upload in items:
+        upload.cleanup()
+
+def build_packed_resume_prompt(pack, with_skills=False):
+    sections = "\n\n".join(
+        f"### RESUME {i + 1}\n{prepare_text(text, BATCH_PACK_TOKENS)}" for i, (_, text) in enumerate(pack)
+    )
+    fields = ["'resume_id': the number after RESUME.", *resume_fields(with_skills)]
+    return (
+        f"Act as a Hiring Manager. Analyze each of the {len(pack)} resumes below independently.\n"
+        "Return ONLY JSON of the form {\"results\": [...]} with one object per resume, in order:\n"
+        + "".join(f"{n}. {field}\n" for n, field in enumerate(fields, 1))
+        + f"{sections}"
+    )
+
+async def score_resume_pack(pack, out):
+    """
+    Scores up to BATCH_PACK_SIZE extracted resumes with one LLM call and emits a line each.
+    """
+    # One resume the taxonomy barely covers and the whole pack is asked for skills
+    with_skills = any(not covers(skill_index.extract(text)) for _, text in pack)
+    try:
+        if len(pack) == 1:
+            schema = AtsSkillsResult if with_skills else AtsResult
+            results = [await ask_gemini_for_json(build_resume_prompt(pack[0][1], with_skills), schema, "resume-batch")]
+        else:
+            prompt = build_packed_resume_prompt(pack, with_skills)
+            parsed = await ask_gemini_for_json(prompt, PackedAtsResults, "resume-batch")
+            # One malformed entry only costs that resume, not the whole pack
+            item_schema = PackedAtsSkillsItem if with_skills else PackedAtsItem
+            items = [validate(item_schema, r)[0] for r in parsed["results"]]
+            by_id = {item.resume_id: item.model_dump() for item in items if item is not None}
+            results = [by_id.get(i + 1) for i in range(len(pack))]
+    except Exception:
+        logger.exception("Batch pack failed", extra={"pack_size": len(pack)})
+        results = [None] * len(pack)
+
+    for (filename, text), data in zip(pack, results):
+        if data:
+            data.pop("resume_id", None)
+            data["top_skills"] = resume_skills(text, data)
+            await out.put({"filename": filename, "status": "success", **data})
+        else:
+            await out.put({"filename": filename, "status": "error", **get_fallback_resume()})
+
+async def run_resume_batch(items, out):
+    """
+    Extracts every PDF concurrently. Whenever an LLM slot frees up, everything
+    extracted so far (up to BATCH_PACK_SIZE) goes out together in one call, so
+    packs grow naturally while the quota is the bottleneck.
+    """
+    ready = asyncio.Queue()
+
+    async def extract(filename, contents):
+        try:
+            with stage_timer("resume-batch", "extract"):
+                text = await pdf_service.extract_text(contents)
+        except Exception as e:
+            await out.put({"filename": filename, "status": "error", "error": f"PDF extraction failed: {e}"})
+            return
+        if len(text.strip()) < 50:
+            await out.put({"filename": filename, "status": "error", "error": "PDF seems empty or is an image."})
+            return
+        await ready.put((filename, text))
+
+    extract_tasks = [asyncio.create_task(extract(name, contents)) for name, contents in items]
+
+    async def close_ready():
+        await asyncio.gather(*extract_tasks)
+        await ready.put(None)
+
+    closer = asyncio.create_task(close_ready())
+    pack_tasks = []
+    try:
+        done = False
+        while not done:
+            item = await ready.get()
+            if item is None:
+                break
+            await batch_semaphore.acquire()
+            try:
+                # Short linger so resumes finishing extraction together share a call
+                await asyncio.sleep(BATCH_PACK_LINGER_SECONDS)
+            except BaseException:
+                batch_semaphore.release()
+                raise
+            pack = [item]
+            while len(pack) < BATCH_PACK_SIZE and not ready.empty():
+                item = ready.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                pack.append(item)
+            task = asyncio.create_task(score_resume_pack(pack, out))
+            # Released even if the task is cancelled before it ever runs
+            task.add_done_callback(lambda _: batch_semaphore.release())
+            pack_tasks.append(task)
+
+        await closer
+        await asyncio.gather(*pack_tasks)
+        await out.put(None)
+    finally:
+        # Only does anything when the batch itself was cancelled
+        for task in extract_tasks + pack_tasks + [closer]:
+            task.cancel()
+
+@router.post("/analyze/resume/batch")
+async def analyze_resume_batch(files: List[UploadFile] = File(...)):
+    """
+    Accepts many PDFs (or zips of PDFs) and streams one NDJSON line per resume
+    as soon as its result is ready.
+    """
+    items = []
+    try:
+        for file in files:
+            # A zip holds many resumes, so only its members get the per-file limit
+            is_zip = (file.filename or "").lower().endswith(".zip")
+            upload = await receive_upload(file, UPLOAD_MAX_REQUEST_BYTES if is_zip else UPLOAD_MAX_BYTES)
+            try:
+                items.extend(await asyncio.to_thread(unpack_uploads, upload))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid zip.")
+
+        if not items:
+            raise HTTPException(status_code=400, detail="Upload PDF files or a zip of PDFs.")
+        if len(items) > BATCH_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"Batch limit is {BATCH_MAX_FILES} resumes.")
+        if not llm_gateway.enabled:
+            raise HTTPException(status_code=503, detail="AI Key Missing")
+    except BaseException:
+        cleanup_uploads(items)
+        raise
+
+    logger.info("Batch resume analysis started", extra={"files": len(items)})
+    out = asyncio.Queue()
+
+    async def stream():
+        runner = asyncio.create_task(run_resume_batch(items, out))
+        try:
+            while True:
+                line = await out.get()
+                if line is None:
+                    break
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client went away: stop scheduling more LLM calls
+            runner.cancel()
+            cleanup_uploads(items)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ==========================================
+# BACKGROUND TASK VERSIONS (POST /api/tasks/<kind>)
+# ==========================================
+task_queue.register(
+    "scrape-url",
+    lambda payload, db, report: scrape_url_pipeline(require_field(payload, "url"), db, report, payload.get("user_id"))
+)
+task_queue.register(
+    "linkedin",
+    lambda payload, db, report: linkedin_pdf_pipeline(require_pdf(payload), db, report, payload.get("user_id"))
+)
+task_queue.register(
+    "resume",
+    lambda payload, db, report: resume_pipeline(require_pdf(payload), report, db, payload.get("user_id"))
+)
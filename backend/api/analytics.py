@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.orm import Session
+import secrets
+
+from api.config import ANALYTICS_TOKEN
+from api.database import get_db
+from api.profile_store import score_summary, top_skills, users_missing_skill
+
+router = APIRouter()
+
+
+# --- DEPENDENCY: cross-user data is for operators only ---
+def require_analytics_token(x_analytics_token: str = Header(None)):
+    if not ANALYTICS_TOKEN:
+        raise HTTPException(status_code=403, detail="Analytics disabled. Set ANALYTICS_TOKEN in .env.")
+    if not x_analytics_token or not secrets.compare_digest(x_analytics_token, ANALYTICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid analytics token.")
+
+
+# ==========================================
+# ANALYTICS: aggregates over every user's latest analysis
+# ==========================================
+@router.get("/analytics/scores", dependencies=[Depends(require_analytics_token)])
+def analytics_scores(db: Session = Depends(get_db)):
+    """Average / min / max score per analysis kind."""
+    return score_summary(db)
+
+
+@router.get("/analytics/skills", dependencies=[Depends(require_analytics_token)])
+def analytics_skills(limit: int = Query(20, ge=1, le=100), missing: bool = False, db: Session = Depends(get_db)):
+    """Most common skills, or with missing=true the most commonly flagged gaps."""
+    return {"skills": top_skills(db, limit, missing)}
+
+
+@router.get("/analytics/skills/{skill}/missing", dependencies=[Depends(require_analytics_token)])
+def analytics_users_missing(skill: str, limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    """Users whose latest analyses don't list the skill, e.g. /analytics/skills/python/missing."""
+    users = users_missing_skill(db, skill, limit)
+    return {"skill": skill, "count": len(users), "users": users}
@@ -2,17 +2,17 @@ import os
 import httpx
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
 from urllib.parse import quote
 
 # Import our new Database tools
-from api.database import get_db
-from api.models import User, Base
-from api.database import engine
-
-# Create the tables if they don't exist yet
-Base.metadata.create_all(bind=engine)
+from api.database import get_async_db
+from api.models import User
+from api.http_client import get_http_client
+from api.config import SESSION_COOKIE, SESSION_MAX_AGE_SECONDS
+from api.sessions import issue_session_token
 
 load_dotenv()
 
@@ -37,7 +37,11 @@ def login():
     return RedirectResponse(linkedin_auth_url)
 
 @router.get("/callback")
-async def callback(code: str, db: Session = Depends(get_db)):
+async def callback(
+    code: str,
+    db: AsyncSession = Depends(get_async_db),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
     """
     1. Exchange Code for Token
     2. Get User Info
@@ -57,21 +61,20 @@ async def callback(code: str, db: Session = Depends(get_db)):
         "client_secret": CLIENT_SECRET,
     }
 
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(token_url, data=params)
-        token_json = token_response.json()
-        
-        if "access_token" not in token_json:
-            raise HTTPException(status_code=400, detail=f"LinkedIn Error: {token_json.get('error_description')}")
-        
-        access_token = token_json["access_token"]
+    token_response = await client.post(token_url, data=params)
+    token_json = token_response.json()
+    
+    if "access_token" not in token_json:
+        raise HTTPException(status_code=400, detail=f"LinkedIn Error: {token_json.get('error_description')}")
+    
+    access_token = token_json["access_token"]
 
-        # --- B. Get User Info ---
-        user_info_url = "https://api.linkedin.com/v2/userinfo"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        
-        user_response = await client.get(user_info_url, headers=headers)
-        user_data = user_response.json()
+    # --- B. Get User Info ---
+    user_info_url = "https://api.linkedin.com/v2/userinfo"
+    headers = {"Authorization": f"Bearer {access_token}"}
+    
+    user_response = await client.get(user_info_url, headers=headers)
+    user_data = user_response.json()
 
     # --- C. SAVE TO DATABASE (The New Part) ---
     linkedin_id = user_data.get("sub")
@@ -79,24 +82,35 @@ async def callback(code: str, db: Session = Depends(get_db)):
     pic = user_data.get("picture", "")
 
     # Check if user exists
-    db_user = db.query(User).filter(User.linkedin_id == linkedin_id).first()
+    db_user = (await db.execute(select(User).filter(User.linkedin_id == linkedin_id))).scalars().first()
     
     if not db_user:
         # Create new user
         db_user = User(linkedin_id=linkedin_id, name=name, pic_url=pic)
         db.add(db_user)
-        db.commit()
+        await db.commit()
     else:
         # Update existing user (in case they changed their photo)
         db_user.name = name
         db_user.pic_url = pic
-        db.commit()
+        await db.commit()
 
     # --- D. Redirect to Frontend ---
     safe_name = quote(name)
     safe_pic = quote(pic)
     
+    # Our own signed session identifies the user on every later request
+    # (sent back as a Bearer token or this cookie); see api/sessions.py
+    session_token = issue_session_token(db_user.id)
+    
     # We pass the token so the frontend can still use it for posting
-    frontend_redirect = f"{FRONTEND_URL}/dashboard?token={access_token}&name={safe_name}&pic={safe_pic}"
+    frontend_redirect = (
+        f"{FRONTEND_URL}/dashboard?token={access_token}&session={session_token}"
+        f"&name={safe_name}&pic={safe_pic}"
+    )
     
-    return RedirectResponse(url=frontend_redirect)
\ No newline at end of file
+    response = RedirectResponse(url=frontend_redirect)
+    response.set_cookie(
+        SESSION_COOKIE, session_token, max_age=SESSION_MAX_AGE_SECONDS, httponly=True, samesite="lax"
+    )
+    return response
\ No newline at end of file
@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+import asyncio
+import importlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from api.config import COORDINATION_BACKEND, COORDINATION_PATH, COORDINATION_LOCK_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# SHARED STATE BETWEEN WORKER PROCESSES
+# ==========================================
+# With WEB_CONCURRENCY > 1 every uvicorn worker is its own process. Anything
+# that must hold across all of them (the Gemini quota, "do this once" startup
+# work) goes through a coordinator. Caches and job/task state already live in
+# shared storage (llm_cache.db, PDF_CACHE_DIR, the database).
+#
+# A coordinator has three operations:
+#   await take(bucket, rate_per_second, capacity) -> seconds to wait (0.0: a token was taken)
+#   await pause(bucket, seconds)                  -> nobody takes from the bucket until then
+#   with lock(name): ...                          -> one holder at a time, blocking (sync code)
+
+def refill(tokens, updated, paused_until, now, rate, capacity):
+    """Token-bucket step shared by the backends: (new tokens, seconds to wait)."""
+    tokens = capacity if tokens is None else min(capacity, tokens + (now - updated) * rate)
+    if now < paused_until:
+        return tokens, paused_until - now
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class LocalCoordinator:
+    """One process: plain in-memory state (single worker, dev server, tests)."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    async def take(self, bucket: str, rate: float, capacity: int) -> float:
+        now = time.time()
+        tokens, updated, paused_until = self._buckets.get(bucket, (None, now, 0.0))
+        tokens, wait = refill(tokens, updated, paused_until, now, rate, capacity)
+        self._buckets[bucket] = (tokens, now, paused_until)
+        return wait
+
+    async def pause(self, bucket: str, seconds: float):
+        tokens, updated, paused_until = self._buckets.get(bucket, (None, time.time(), 0.0))
+        self._buckets[bucket] = (tokens, updated, max(paused_until, time.time() + seconds))
+
+    @contextmanager
+    def lock(self, name: str):
+        with self._guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            yield
+
+    def describe(self):
+        return {"backend": "local"}
+
+
+class SqliteCoordinator:
+    """
+    Every worker on the host shares one SQLite file: bucket state is read and
+    written inside a BEGIN IMMEDIATE transaction, so refills and takes from
+    different processes serialize. Locks are flock()ed files next to it.
+    """
+
+    def __init__(self, path: str, lock_timeout: float):
+        self.path = path
+        self.lock_timeout = lock_timeout
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.lock_timeout, isolation_level=None)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " name TEXT PRIMARY KEY, tokens REAL, updated REAL, paused_until REAL)"
+            )
+            self._ready = True
+        return conn
+
+    def _update(self, bucket: str, step):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated, paused_until FROM buckets WHERE name = ?", (bucket,)
+            ).fetchone()
+            tokens, updated, paused_until, result = step(*(row or (None, now, 0.0)), now)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated, paused_until) VALUES (?, ?, ?, ?)",
+                (bucket, tokens, updated, paused_until),
+            )
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _take(self, bucket: str, rate: float, capacity: int) -> float:
+        def step(tokens, updated, paused_until, now):
+            tokens, wait = refill(tokens, updated, paused_until, now, rate, capacity)
+            return tokens, now, paused_until, wait
+        return self._update(bucket, step)
+
+    def _pause(self, bucket: str, seconds: float):
+        def step(tokens, updated, paused_until, now):
+            return tokens, updated, max(paused_until, now + seconds), None
+        self._update(bucket, step)
+
+    async def take(self, bucket: str, rate: float, capacity: int) -> float:
+        return await asyncio.to_thread(self._take, bucket, rate, capacity)
+
+    async def pause(self, bucket: str, seconds: float):
+        await asyncio.to_thread(self._pause, bucket, seconds)
+
+    @contextmanager
+    def lock(self, name: str):
+        import fcntl   # POSIX only; multi-worker deployments run on Linux
+        with open(f"{self.path}.{name}.lock", "a") as f:
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Timed out waiting for the '{name}' lock")
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def describe(self):
+        return {"backend": "sqlite", "path": os.path.abspath(self.path)}
+
+
+def build_coordinator(backend: str):
+    """
+    "local", "sqlite", or "package.module:factory" for anything else (e.g. a
+    Redis-backed class with the same three operations), called with no arguments.
+    """
+    if backend == "local":
+        return LocalCoordinator()
+    if backend == "sqlite":
+        return SqliteCoordinator(COORDINATION_PATH, COORDINATION_LOCK_TIMEOUT)
+    module_name, _, factory = backend.partition(":")
+    if not factory:
+        raise ValueError(f"Unknown COORDINATION_BACKEND '{backend}'")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+coordinator = build_coordinator(COORDINATION_BACKEND)
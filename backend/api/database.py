@@ -1,23 +1,100 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-# 1. Define the database file path (it will be created in the 'backend' folder)
-DATABASE_URL = "sqlite:///./linkbrand.db"
+from api.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    SQLITE_WAL, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB,
+)
 
-# 2. Create the engine (The core connection)
-# check_same_thread=False is needed for SQLite with FastAPI
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
-# 3. Create the Session Local (Used to create database sessions for each request)
+# --- SQLITE CONNECTION SETUP ---
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: readers don't block the writer and vice versa; commits only append to the log
+    if SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is crash-safe under WAL and skips an fsync on every commit
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    # Wait for the write lock instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    # Negative = size in KiB (per connection)
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL):
+    """
+    Engine with an explicitly sized pool. SQLite files get the pragmas above
+    on every new connection; any other URL (Postgres) gets pre-ping/recycle
+    so idle pooled connections survive server-side timeouts.
+    """
+    pool_options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+    if url.startswith("sqlite"):
+        # check_same_thread=False is needed for SQLite with FastAPI
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            **pool_options,
+        )
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+        return engine
+
+    return create_engine(url, pool_pre_ping=True, pool_recycle=1800, **pool_options)
+
+
+def async_database_url(url: str) -> str:
+    """Same database through an asyncio driver: aiosqlite for SQLite, asyncpg for Postgres."""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def create_async_db_engine(url: str = DATABASE_URL):
+    """Async twin of create_db_engine(): same pool sizing, same SQLite pragmas."""
+    pool_options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+    if url.startswith("sqlite"):
+        engine = create_async_engine(
+            async_database_url(url),
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            poolclass=AsyncAdaptedQueuePool,
+            **pool_options,
+        )
+        event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+        return engine
+
+    return create_async_engine(async_database_url(url), pool_pre_ping=True, pool_recycle=1800, **pool_options)
+
+
+# 1. Create the engines (The core connections), configured by DATABASE_URL
+# Sync engine: sync (def) routes, scripts, migrations. Async engine: async def routes.
+engine = create_db_engine()
+async_engine = create_async_db_engine()
+
+# 2. Create the Session Local (Used to create database sessions for each request)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: rows stay readable after commit without another (awaited) load
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
-# 4. Base class (All your models will inherit from this)
+# 3. Base class (All your models will inherit from this)
 Base = declarative_base()
 
-# 5. Dependency (We use this in every API endpoint to get a DB session)
+# 4. Dependencies: get_db for plain `def` endpoints, get_async_db for `async def` ones
+# (a sync commit inside an async route blocks the whole event loop while it waits)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,143 @@
+import certifi
+import httpx
+import importlib.util
+import ssl
+import threading
+import time
+
+from api.config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_PER_HOST, HTTP_KEEPALIVE_EXPIRY,
+)
+
+# Hosts that get their own connection pool (everything else shares the default one)
+POOLED_HOSTS = [
+    "https://www.linkedin.com",
+    "https://api.linkedin.com",
+    "https://jsearch.p.rapidapi.com",
+]
+
+# HTTP/2 needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram (Prometheus style) of response latency in seconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def snapshot(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(LATENCY_BUCKETS + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.total,
+            "avg_seconds": round(self.sum / self.total, 4) if self.total else 0.0,
+            "buckets": buckets,
+        }
+
+
+class SharedHttpClient:
+    """
+    One application-scoped httpx.AsyncClient, opened and closed by the FastAPI lifespan.
+    Keeps TLS connections alive between requests, with a pool per upstream host,
+    explicit timeouts, and per-host latency / connection counters.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.connections_opened = {}
+
+    def _transport(self, ssl_context=None):
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncHTTPTransport(limits=limits, http2=HTTP2_AVAILABLE, verify=ssl_context or True)
+
+    def _build(self):
+        # Loading the CA bundle costs ~70ms; do it once for all the pools instead of per transport
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            transport=self._transport(ssl_context),
+            mounts={host: self._transport(ssl_context) for host in POOLED_HOSTS},
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily too, so background tasks and scripts work outside the lifespan
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build()
+        return self._client
+
+    def start(self):
+        return self.client
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    # --- EVENT HOOKS ---
+    async def _on_request(self, request: httpx.Request):
+        host = request.url.host
+        request.extensions["started_at"] = time.perf_counter()
+
+        # httpcore trace events tell us when a brand-new TCP connection is opened
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened[host] = self.connections_opened.get(host, 0) + 1
+        request.extensions["trace"] = trace
+
+    async def _on_response(self, response: httpx.Response):
+        request = response.request
+        started_at = request.extensions.get("started_at")
+        if started_at is None:
+            return
+        host = request.url.host
+        if host not in self.latency:
+            self.latency[host] = LatencyHistogram()
+        self.latency[host].observe(time.perf_counter() - started_at)
+
+    def stats(self):
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "hosts": {
+                host: {
+                    "connections_opened": self.connections_opened.get(host, 0),
+                    "latency": histogram.snapshot(),
+                }
+                for host, histogram in self.latency.items()
+            },
+        }
+
+
+shared_http = SharedHttpClient()
+
+
+# --- DEPENDENCY (used by the routers) ---
+def get_http_client() -> httpx.AsyncClient:
+    return shared_http.client
@@ -0,0 +1,257 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.routing import Match
+from contextlib import contextmanager
+import json
+import logging
+import os
+import time
+
+from api.config import LOG_LEVEL, LOG_FORMAT
+
+router = APIRouter()
+
+
+# ==========================================
+# STRUCTURED LOGGING
+# ==========================================
+# Attributes every LogRecord has; anything else was passed in through extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    `logger.info("Resume analysis started", extra={"upload": name})` becomes
+    `... INFO api.analysis: Resume analysis started upload=cv.pdf`, or one JSON
+    object per line with LOG_FORMAT=json.
+    """
+
+    def __init__(self, as_json: bool = False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+        if self.as_json:
+            entry = {
+                "ts": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "msg": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{k}={format_value(v)}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def format_value(value):
+    text = str(value)
+    return json.dumps(text) if (not text or " " in text or "=" in text) else text
+
+
+def configure_logging():
+    """One handler on the "api" logger; uvicorn keeps its own access/error loggers."""
+    logger = logging.getLogger("api")
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(as_json=LOG_FORMAT == "json"))
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+# ==========================================
+# METRICS
+# ==========================================
+# Pipelines run from ~10ms (cached) to a minute (scraping, 429 backoff)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "linkbrand_http_request_seconds", "Request latency per route (until the last body chunk is sent)",
+    ["method", "route"], buckets=STAGE_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "linkbrand_http_requests_total", "Requests per route and status code", ["method", "route", "status"],
+)
+STAGE_SECONDS = Histogram(
+    "linkbrand_stage_seconds", "Time spent in one stage of a pipeline (extract, prompt, llm, parse, persist, ...)",
+    ["pipeline", "stage"], buckets=STAGE_BUCKETS,
+)
+STAGE_FAILURES = Counter(
+    "linkbrand_stage_failures_total", "Stages that raised", ["pipeline", "stage"],
+)
+LLM_REQUESTS = Counter(
+    "linkbrand_llm_requests_total", "Gemini API requests, retries included", ["model", "outcome"],
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "linkbrand_llm_request_seconds", "Gemini API request latency (no queueing)", ["model"], buckets=STAGE_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "linkbrand_llm_retries_total", "429s retried after backoff", ["model"],
+)
+LLM_TOKENS = Counter(
+    "linkbrand_llm_tokens_total", "Tokens reported by Gemini usage metadata", ["model", "kind"],
+)
+LLM_JSON_PARSES = Counter(
+    "linkbrand_llm_json_parses_total", "LLM JSON answers by how they were parsed (ok / repaired / reprompted / failed)",
+    ["pipeline", "outcome"],
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    "linkbrand_single_flight_total", "Expensive calls by whether they ran, joined an identical one, or were turned away",
+    ["flight", "result"],
+)
+JOB_LOOKUPS = Counter(
+    "linkbrand_job_lookups_total", "Job searches by where the results came from", ["source"],
+)
+
+
+@contextmanager
+def stage_timer(pipeline: str, stage: str):
+    """
+    with stage_timer("resume", "extract"):
+        text = await pdf_service.extract_text(contents)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_FAILURES.labels(pipeline, stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(pipeline, stage).observe(time.perf_counter() - started)
+
+
+def record_llm_request(model_name: str, outcome: str, seconds: float, response=None):
+    """outcome: ok / rate_limited / error. Token counts come from the response's usage_metadata."""
+    LLM_REQUESTS.labels(model_name, outcome).inc()
+    LLM_REQUEST_SECONDS.labels(model_name).observe(seconds)
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        LLM_TOKENS.labels(model_name, "prompt").inc(getattr(usage, "prompt_token_count", 0) or 0)
+        LLM_TOKENS.labels(model_name, "completion").inc(getattr(usage, "candidates_token_count", 0) or 0)
+
+
+def route_template(scope) -> str:
+    """
+    "/api/user/analyses/resume" -> "/api/user/analyses/{kind}": the matched route's
+    path template, so label counts stay bounded.
+    """
+    if "endpoint" not in scope:
+        return "unmatched"
+    route = scope.get("route")
+    if route is None:
+        # Older Starlette doesn't record the matched route in the scope: find it again
+        route = next((r for r in getattr(scope.get("app"), "routes", []) if r.matches(scope)[0] == Match.FULL), None)
+    return getattr(route, "path", None) or "unmatched"
+
+
+# --- REQUEST LATENCY (plain ASGI, so streamed responses are timed to their last chunk) ---
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status[0])).inc()
+
+
+# --- CACHE / GATEWAY STATE (read from the existing stats counters at scrape time) ---
+class AppStatsCollector:
+    def __init__(self, pdf_cache, llm_cache, gateway, model_router):
+        self.pdf_cache = pdf_cache
+        self.llm_cache = llm_cache
+        self.gateway = gateway
+        self.model_router = model_router
+
+    def collect(self):
+        lookups = CounterMetricFamily("linkbrand_cache_lookups", "Cache lookups by result", labels=["cache", "result"])
+        ratio = GaugeMetricFamily("linkbrand_cache_hit_ratio", "Hits / lookups since start", labels=["cache"])
+
+        pdf = self.pdf_cache
+        lookups.add_metric(["pdf_text", "hit"], pdf.hits)
+        lookups.add_metric(["pdf_text", "disk_hit"], pdf.disk_hits)
+        lookups.add_metric(["pdf_text", "miss"], pdf.misses)
+        total = pdf.hits + pdf.disk_hits + pdf.misses
+        ratio.add_metric(["pdf_text"], (pdf.hits + pdf.disk_hits) / total if total else 0.0)
+
+        llm = self.llm_cache
+        lookups.add_metric(["llm", "hit"], llm.hits)
+        lookups.add_metric(["llm", "miss"], llm.misses)
+        total = llm.hits + llm.misses
+        ratio.add_metric(["llm"], llm.hits / total if total else 0.0)
+        yield lookups
+        yield ratio
+
+        yield GaugeMetricFamily("linkbrand_llm_queue_depth", "Calls waiting for a gateway slot", value=self.gateway.waiting)
+        yield GaugeMetricFamily("linkbrand_llm_in_flight", "Gemini calls in progress", value=self.gateway.in_flight)
+
+        hedges = CounterMetricFamily("linkbrand_llm_hedges", "Hedged requests sent / won by the hedge", labels=["result"])
+        hedges.add_metric(["sent"], self.model_router.hedges)
+        hedges.add_metric(["won"], self.model_router.hedge_wins)
+        yield hedges
+
+        cooldown = GaugeMetricFamily("linkbrand_model_in_cooldown", "1 while the router has a model benched", labels=["model"])
+        for name, health in self.model_router.health.items():
+            cooldown.add_metric([name], 1 if health.in_cooldown else 0)
+        yield cooldown
+
+
+_collector = None
+
+
+def register_stats_collector(pdf_cache, llm_cache, gateway, model_router):
+    global _collector
+    if _collector is None:
+        _collector = AppStatsCollector(pdf_cache, llm_cache, gateway, model_router)
+        REGISTRY.register(_collector)
+
+
+_multiprocess_registry = None
+
+
+def metrics_registry():
+    """
+    One process: the default registry. Under the multi-worker launcher
+    (PROMETHEUS_MULTIPROC_DIR set) every worker writes its counters and
+    histograms to files there and a scrape sums them over all workers.
+    The AppStatsCollector numbers are per process, so they are left out
+    then; /api/cache/stats and /api/llm/stats still show the answering worker's.
+    """
+    global _multiprocess_registry
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    if _multiprocess_registry is None:
+        from prometheus_client import multiprocess
+        _multiprocess_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(_multiprocess_registry)
+    return _multiprocess_registry
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
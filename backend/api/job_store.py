@@ -0,0 +1,101 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+
+from api.models import JobListing, JobQuery, JobQueryResult, JobKeyword
+from api.matching import tokenize
+
+
+# --- HELPER: QUERY / KEYWORD NORMALIZATION ---
+def normalize_query(skill: str) -> str:
+    return " ".join(tokenize(skill)) or skill.strip().lower()
+
+
+def job_keywords(job: JobListing):
+    return set(tokenize(f"{job.title or ''} {job.company or ''} {job.location or ''}"))
+
+
+def listing_to_dict(job: JobListing):
+    """Same shape /api/jobs/recommend has always returned to the frontend."""
+    return {
+        "id": job.id,
+        "title": job.title,
+        "company": job.company,
+        "location": job.location or "Remote",
+        "platform": job.platform or "LinkedIn",
+        "link": job.link
+    }
+
+
+def save_results(db: Session, query: str, raw_jobs, num_pages: int = 1):
+    """Upserts the fetched listings, re-indexes their keywords and records the query's result order."""
+    now = datetime.utcnow()
+    unique = {}
+    for raw in raw_jobs:
+        if raw.get("job_id") and raw["job_id"] not in unique:
+            unique[raw["job_id"]] = raw
+
+    for job_id, raw in unique.items():
+        job = db.get(JobListing, job_id)
+        if not job:
+            job = JobListing(id=job_id)
+            db.add(job)
+        job.title = raw.get("job_title")
+        job.company = raw.get("employer_name")
+        job.location = raw.get("job_city")
+        job.platform = raw.get("job_publisher")
+        job.link = raw.get("job_apply_link")
+        job.description = raw.get("job_description") or ""
+        job.fetched_at = now
+
+        db.query(JobKeyword).filter(JobKeyword.job_id == job_id).delete()
+        db.add_all([JobKeyword(keyword=k, job_id=job_id) for k in job_keywords(job)])
+
+    entry = db.get(JobQuery, query)
+    if not entry:
+        entry = JobQuery(query=query)
+        db.add(entry)
+    entry.fetched_at = now
+    entry.num_pages = num_pages
+    entry.results = [JobQueryResult(job_id=job_id, position=i) for i, job_id in enumerate(unique)]
+    db.commit()
+
+
+def lookup_query(db: Session, query: str, num_pages: int = 1):
+    """
+    Returns (listings in original order, age in seconds, pages fetched), or
+    (None, None, None) if the query was never fetched with at least num_pages
+    pages (a one-page fetch can't answer a three-page request).
+    """
+    entry = db.get(JobQuery, query)
+    if not entry or (entry.num_pages or 1) < num_pages:
+        return None, None, None
+    age = (datetime.utcnow() - entry.fetched_at).total_seconds()
+    return [r.job for r in entry.results], age, entry.num_pages or 1
+
+
+def search_index(db: Session, query: str, max_age_seconds: int, limit: int):
+    """
+    Serves related queries ("python" vs "python developer") from the inverted index:
+    jobs whose title/company/location contain every query keyword, newest first.
+    """
+    keywords = set(tokenize(query))
+    if not keywords:
+        return []
+
+    matches = (
+        db.query(JobKeyword.job_id)
+        .filter(JobKeyword.keyword.in_(keywords))
+        .group_by(JobKeyword.job_id)
+        .having(func.count(JobKeyword.keyword) == len(keywords))
+        .subquery()
+    )
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    return (
+        db.query(JobListing)
+        .join(matches, JobListing.id == matches.c.job_id)
+        .filter(JobListing.fetched_at > cutoff)
+        .order_by(JobListing.fetched_at.desc())
+        .limit(limit)
+        .all()
+    )
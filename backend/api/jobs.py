@@ -1,72 +1,177 @@
-from fastapi import APIRouter, HTTPException
-import httpx
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
 from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Form 
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import logging
 import sys
 import os
 from dotenv import load_dotenv
 
+from api.config import RAPIDAPI_KEY, JSEARCH_OFFLINE, JOBS_FRESH_SECONDS, JOBS_MAX_AGE_SECONDS
+from api.database import get_async_db, AsyncSessionLocal
+from api.instrumentation import JOB_LOOKUPS, stage_timer
+from api.job_store import normalize_query, save_results, lookup_query, search_index, listing_to_dict
+from api.jsearch import get_jsearch_client
+from api.matching import score_against, top_k, to_match_score
+from api.pdf_service import pdf_service
+from api.single_flight import single_flight
+from api.uploads import receive_upload
+
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 load_dotenv()
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# --- JOB LOOKUP: store first, JSearch only when needed ---
+# Minimum related-query hits from the inverted index before we skip the API
+MIN_INDEX_RESULTS = 10
+
+async def fetch_and_store(skill: str, num_pages: int, pipeline: str):
+    """
+    One JSearch call for the query, saved with its own DB session. Live lookups
+    and background refreshes of the same query share a single call in flight.
+    """
+    query = normalize_query(skill)
+
+    async def fetch():
+        async with AsyncSessionLocal() as db:
+            with stage_timer(pipeline, "fetch"):
+                raw_jobs = await get_jsearch_client().search(skill, num_pages)
+            with stage_timer(pipeline, "persist"):
+                for attempt in range(3):
+                    try:
+                        await db.run_sync(save_results, query, raw_jobs, num_pages)
+                        return
+                    except IntegrityError:
+                        # A fetch for an overlapping query inserted some of the same listings first
+                        await db.rollback()
+                        if attempt == 2:
+                            raise
+
+    await single_flight.do("jobs-fetch", (query, num_pages), fetch)
+
+async def refresh_query(skill: str, num_pages: int = 1):
+    """Background task: re-fetch a stale query into the store."""
+    try:
+        await fetch_and_store(skill, num_pages, "jobs-refresh")
+    except Exception:
+        logger.exception("Background job refresh failed", extra={"skill": skill})
+
+async def get_jobs(skill: str, db: AsyncSession, background_tasks: BackgroundTasks, num_pages: int = 1):
+    """
+    Returns (JobListing rows, source). Fresh stored results are served directly;
+    stale ones (or related queries found in the index) are served while a
+    background task refreshes them; everything else is fetched live.
+    The job_store helpers are sync ORM code; run_sync runs them on the async connection.
+    """
+    jobs, source = await _get_jobs(skill, db, background_tasks, num_pages)
+    JOB_LOOKUPS.labels(source).inc()
+    return jobs, source
+
+async def _get_jobs(skill, db, background_tasks, num_pages):
+    query = normalize_query(skill)
+    with stage_timer("jobs", "lookup"):
+        jobs, age, stored_pages = await db.run_sync(lookup_query, query, num_pages)
+
+    if jobs is not None and age < JOBS_FRESH_SECONDS:
+        return jobs, "cache"
+    if jobs is not None and age < JOBS_MAX_AGE_SECONDS:
+        # Refresh with as many pages as are stored, so a one-page request doesn't shrink a ranked entry
+        background_tasks.add_task(refresh_query, skill, stored_pages)
+        return jobs, "stale"
+
+    with stage_timer("jobs", "index"):
+        related = await db.run_sync(search_index, query, JOBS_MAX_AGE_SECONDS, 10 * num_pages)
+    if len(related) >= max(MIN_INDEX_RESULTS, 10 * num_pages):
+        background_tasks.add_task(refresh_query, skill, num_pages)
+        return related, "index"
+
+    await fetch_and_store(skill, num_pages, "jobs")
+    # Rows loaded above predate the fetch (it saved through another session)
+    db.expire_all()
+    with stage_timer("jobs", "lookup"):
+        jobs, _, _ = await db.run_sync(lookup_query, query, num_pages)
+    return jobs, "live"
 
-# Get Key from .env (Add RAPIDAPI_KEY=your_key to your .env file)
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
-RAPIDAPI_HOST = "jsearch.p.rapidapi.com"
+def mock_jobs():
+    return {
+        "status": "mock",
+        "jobs": [
+            {"id": 1, "title": "Mock Python Job", "company": "Test Co", "location": "Remote", "link": "#"}
+        ]
+    }
 
 @router.get("/jobs/recommend")
-async def recommend_jobs(skill: str = "Python"):
-    if not RAPIDAPI_KEY:
-        print("⚠️ No API Key found. Returning Mock Data.")
+async def recommend_jobs(
+    background_tasks: BackgroundTasks,
+    skill: str = "Python",
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not RAPIDAPI_KEY and not JSEARCH_OFFLINE:
+        logger.warning("No RAPIDAPI_KEY found, returning mock jobs")
         # Fallback to mock data if key is missing
+        return mock_jobs()
+
+    try:
+        jobs, source = await get_jobs(skill, db, background_tasks)
+
+        # Transform stored rows to match YOUR frontend
+        clean_jobs = [listing_to_dict(job) for job in jobs[:limit]]
+
         return {
-            "status": "mock",
-            "jobs": [
-                {"id": 1, "title": "Mock Python Job", "company": "Test Co", "location": "Remote", "link": "#"}
-            ]
+            "status": "success",
+            "source": source,
+            "count": len(clean_jobs),
+            "jobs": clean_jobs
         }
 
-    url = "https://jsearch.p.rapidapi.com/search"
-    
-    # Customize query: "Python developer in USA", etc.
-    querystring = {"query": f"{skill} developer", "page": "1", "num_pages": "1"}
+    except Exception:
+        logger.exception("Job fetch failed", extra={"skill": skill})
+        return {"status": "error", "jobs": []}
 
-    headers = {
-        "X-RapidAPI-Key": RAPIDAPI_KEY,
-        "X-RapidAPI-Host": RAPIDAPI_HOST
-    }
+@router.post("/jobs/recommend/ranked")
+async def recommend_jobs_ranked(
+    background_tasks: BackgroundTasks,
+    resume: UploadFile = File(...),
+    skill: str = Form("Python"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Same search as /jobs/recommend, but pulls a few pages of results and ranks
+    every job against the uploaded resume locally before keeping the top 10.
+    """
+    if not RAPIDAPI_KEY and not JSEARCH_OFFLINE:
+        logger.warning("No RAPIDAPI_KEY found, returning mock jobs")
+        return mock_jobs()
+
+    upload = await receive_upload(resume)
+    try:
+        with stage_timer("jobs-ranked", "extract"):
+            resume_text = await pdf_service.extract_text(upload)
+        upload.cleanup()
+        jobs, source = await get_jobs(skill, db, background_tasks, num_pages=3)
+
+        with stage_timer("jobs-ranked", "rank"):
+            job_texts = [f"{job.title or ''} {job.company or ''} {job.description or ''}" for job in jobs]
+            scores = await asyncio.to_thread(score_against, resume_text, job_texts)
+
+        ranked_jobs = []
+        for i in top_k(scores, 10):
+            ranked_jobs.append({**listing_to_dict(jobs[i]), "match_score": to_match_score(float(scores[i]))})
+
+        return {
+            "status": "success",
+            "source": source,
+            "count": len(ranked_jobs),
+            "jobs": ranked_jobs
+        }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            print(f"🌍 Fetching real jobs for: {skill}...")
-            response = await client.get(url, headers=headers, params=querystring)
-            
-            if response.status_code != 200:
-                print(f"API Error: {response.status_code}")
-                raise HTTPException(status_code=500, detail="External API Error")
-
-            data = response.json()
-            raw_jobs = data.get("data", [])
-
-            # Transform their data format to match YOUR frontend
-            clean_jobs = []
-            for job in raw_jobs[:10]: # Limit to 10 jobs
-                clean_jobs.append({
-                    "id": job.get("job_id"),
-                    "title": job.get("job_title"),
-                    "company": job.get("employer_name"),
-                    "location": job.get("job_city") or "Remote",
-                    "platform": job.get("job_publisher") or "LinkedIn",
-                    "link": job.get("job_apply_link")
-                })
-
-            return {
-                "status": "success",
-                "count": len(clean_jobs),
-                "jobs": clean_jobs
-            }
-
-        except Exception as e:
-            print(f"❌ Job Fetch Error: {e}")
-            return {"status": "error", "jobs": []}
\ No newline at end of file
+    except Exception:
+        logger.exception("Ranked job fetch failed", extra={"skill": skill})
+        return {"status": "error", "jobs": []}
+    finally:
+        upload.cleanup()
@@ -0,0 +1,79 @@
+from fastapi import HTTPException
+import logging
+import zlib
+
+from api.config import RAPIDAPI_KEY, JSEARCH_OFFLINE
+from api.http_client import shared_http
+
+logger = logging.getLogger(__name__)
+
+RAPIDAPI_HOST = "jsearch.p.rapidapi.com"
+JSEARCH_URL = "https://jsearch.p.rapidapi.com/search"
+
+
+class JSearchClient:
+    """Thin wrapper over the RapidAPI JSearch endpoint. Returns raw job dicts."""
+
+    async def search(self, skill: str, num_pages: int = 1):
+        # Customize query: "Python developer in USA", etc.
+        querystring = {"query": f"{skill} developer", "page": "1", "num_pages": str(num_pages)}
+
+        headers = {
+            "X-RapidAPI-Key": RAPIDAPI_KEY,
+            "X-RapidAPI-Host": RAPIDAPI_HOST
+        }
+
+        logger.info("Fetching jobs from JSearch", extra={"skill": skill, "pages": num_pages})
+        response = await shared_http.client.get(JSEARCH_URL, headers=headers, params=querystring)
+
+        if response.status_code != 200:
+            logger.error("JSearch error", extra={"status": response.status_code})
+            raise HTTPException(status_code=500, detail="External API Error")
+
+        return response.json().get("data", [])
+
+
+class OfflineJSearchClient:
+    """
+    Local stand-in for JSearch with the same response shape.
+    Results are deterministic per query so the job store can be exercised
+    (and benchmarked) without network access or a RapidAPI key.
+    """
+
+    TITLES = ["Developer", "Senior Engineer", "Backend Engineer", "Full Stack Engineer", "Data Engineer",
+              "Platform Engineer", "Software Engineer", "Tech Lead", "Consultant", "Intern"]
+    COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+    CITIES = ["Bengaluru", "London", "New York", "Berlin", None, "Toronto", "Singapore"]
+    PUBLISHERS = ["LinkedIn", "Indeed", "Glassdoor"]
+
+    def __init__(self):
+        self.calls = 0
+
+    async def search(self, skill: str, num_pages: int = 1):
+        self.calls += 1
+        seed = zlib.crc32(skill.lower().encode())
+        jobs = []
+        for i in range(10 * num_pages):
+            n = seed + i
+            title = f"{skill} {self.TITLES[n % len(self.TITLES)]}"
+            company = self.COMPANIES[n % len(self.COMPANIES)]
+            jobs.append({
+                "job_id": f"offline-{seed:x}-{i}",
+                "job_title": title,
+                "employer_name": company,
+                "job_city": self.CITIES[n % len(self.CITIES)],
+                "job_publisher": self.PUBLISHERS[n % len(self.PUBLISHERS)],
+                "job_apply_link": f"https://example.com/jobs/{seed:x}/{i}",
+                "job_description": f"{company} is hiring a {title}. You will build and ship {skill} services.",
+            })
+        return jobs
+
+
+def get_jsearch_client():
+    if JSEARCH_OFFLINE:
+        return offline_client
+    return jsearch_client
+
+
+jsearch_client = JSearchClient()
+offline_client = OfflineJSearchClient()
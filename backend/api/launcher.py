@@ -0,0 +1,52 @@
+import logging
+import os
+import shutil
+
+from api.config import (
+    WEB_CONCURRENCY, SERVER_HOST, SERVER_PORT, SESSION_SECRET, METRICS_ENABLED, METRICS_MULTIPROC_DIR,
+    COORDINATION_BACKEND,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# LAUNCH MODES (python -m api.main)
+# ==========================================
+# WEB_CONCURRENCY=1 (default): one process with auto-reload, for development.
+# WEB_CONCURRENCY=N: N uvicorn worker processes, no reload. They share the
+# Gemini quota and startup locks through api/coordination.py, and caches,
+# tasks and jobs through the database, llm_cache.db and PDF_CACHE_DIR.
+# Request coalescing (api/single_flight.py) stays per worker.
+
+def prepare_workers():
+    """Environment every worker process inherits; runs once, in the parent, before they start."""
+    if "SESSION_SECRET" not in os.environ:
+        # Otherwise each worker signs sessions with its own random secret
+        logger.warning("SESSION_SECRET not set; generated one for this run (sessions end on restart)")
+        os.environ["SESSION_SECRET"] = SESSION_SECRET
+
+    if COORDINATION_BACKEND == "local":
+        logger.warning("COORDINATION_BACKEND=local with several workers: each one gets the full Gemini quota")
+
+    # Schema first, so the workers' lifespans find nothing left to create
+    from api.database import engine
+    from api.migrations import init_db
+    init_db(engine)
+
+    if METRICS_ENABLED:
+        # Stale files from the previous run would be summed into the new counters
+        shutil.rmtree(METRICS_MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(METRICS_MULTIPROC_DIR)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.abspath(METRICS_MULTIPROC_DIR)
+
+
+def run(app: str = "api.main:app", reload: bool = None):
+    """Serves `app` ("module:attribute"); reload defaults to on for a single worker only."""
+    import uvicorn
+    workers = max(1, WEB_CONCURRENCY)
+    if workers > 1:
+        prepare_workers()
+        logger.info("Starting workers", extra={"workers": workers, "coordination": COORDINATION_BACKEND})
+    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT, workers=workers,
+                reload=workers == 1 if reload is None else reload)
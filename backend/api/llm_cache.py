@@ -0,0 +1,136 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+from api.config import LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+
+
+# --- HELPER: CACHE KEY ---
+def normalize_prompt(prompt: str) -> str:
+    # Indentation and blank lines in the f-string prompts should not change the key
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def cache_key(model_name: str, prompt: str, json_mode: bool = False) -> str:
+    digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    # A JSON-mode answer and a plain-text one to the same prompt are different entries
+    return f"{model_name}:json:{digest}" if json_mode else f"{model_name}:{digest}"
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of Gemini completions keyed on model + normalized prompt
+    (+ JSON mode). Entries expire after ttl_seconds; once the table grows past
+    max_entries the least recently used rows are evicted. hits / misses count
+    one per lookup, however many models it checks.
+    """
+
+    EVICT_EVERY = 50  # writes between eviction sweeps
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._ready = False
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+                " created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, model_name: str, prompt: str, json_mode: bool = False):
+        hit = self.lookup([model_name], prompt, json_mode)
+        return hit[0] if hit else None
+
+    def lookup(self, model_names, prompt: str, json_mode: bool = False, accept=None):
+        """
+        (response, model_name) of the first of model_names with a live entry,
+        else None. Entries accept(response) rejects are passed over. Counts
+        as one hit or one miss.
+        """
+        keys = {cache_key(name, prompt, json_mode): name for name in model_names}
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = dict(conn.execute(
+                f"SELECT key, response FROM llm_cache WHERE key IN ({', '.join('?' * len(keys))}) AND created_at > ?",
+                (*keys, now - self.ttl_seconds),
+            ).fetchall())
+            hit = next(
+                ((rows[key], name) for key, name in keys.items()
+                 if key in rows and (accept is None or accept(rows[key]))),
+                None,
+            )
+            if hit:
+                conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, cache_key(hit[1], prompt, json_mode)))
+                conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def set(self, model_name: str, prompt: str, response: str, json_mode: bool = False):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (cache_key(model_name, prompt, json_mode), model_name, response, now, now),
+            )
+            conn.commit()
+
+            with self._lock:
+                self._writes += 1
+                sweep = self._writes % self.EVICT_EVERY == 0
+            if sweep:
+                self._evict(conn, now)
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+llm_cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
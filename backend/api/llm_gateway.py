@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import random
+import time
+
+from api.config import (
+    GEMINI_API_KEY, GEMINI_MODEL, GEMINI_RPM, GEMINI_BURST,
+    GEMINI_MAX_IN_FLIGHT, GEMINI_MAX_RETRIES, GEMINI_BACKOFF_SECONDS, GEMINI_JSON_MODE,
+)
+from api.coordination import coordinator
+from api.llm_cache import llm_cache
+from api.instrumentation import LLM_RETRIES, record_llm_request
+
+logger = logging.getLogger(__name__)
+
+JSON_MODE_UNSUPPORTED = ("gemini-pro", "gemini-1.0")
+
+_genai = None
+
+
+def load_genai():
+    """google.generativeai takes ~0.3s to import, so it is loaded on the first Gemini call, not at startup."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        if GEMINI_API_KEY:
+            genai.configure(api_key=GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    from google.api_core.exceptions import ResourceExhausted
+    return isinstance(e, ResourceExhausted) or "429" in str(e)
+
+
+class TokenBucket:
+    """
+    Async token bucket: callers queue (FIFO) until a request token is available.
+    The tokens themselves are kept by the coordinator, so with several worker
+    processes they all draw from the one Gemini quota.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, coordinator):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.coordinator = coordinator
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                wait = await self.coordinator.take(self.name, self.rate, self.capacity)
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+
+    async def pause(self, seconds: float):
+        """After a 429: no worker sends another request for `seconds`."""
+        await self.coordinator.pause(self.name, seconds)
+
+
+class LLMGateway:
+    """
+    The one place every route talks to Gemini through.
+    Quota pressure turns into queuing on the bucket/semaphore and
+    async backoff, never into a blocked event loop.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int, max_in_flight: int,
+                 max_retries: int, backoff_seconds: float, coordinator):
+        self.bucket = TokenBucket("gemini", requests_per_minute, burst, coordinator)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._models = {}
+
+        # Metrics
+        self.waiting = 0
+        self.max_waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_wait_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(GEMINI_API_KEY)
+
+    def _model(self, model_name: str):
+        if model_name not in self._models:
+            self._models[model_name] = load_genai().GenerativeModel(model_name)
+        return self._models[model_name]
+
+    def _options(self, model_name: str, json_mode: bool):
+        # gemini-pro / 1.0 reject response_mime_type; they still get the JSON-only prompt
+        if json_mode and GEMINI_JSON_MODE and not model_name.startswith(JSON_MODE_UNSUPPORTED):
+            return {"generation_config": {"response_mime_type": "application/json"}}
+        return {}
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with jitter so queued callers don't retry in lockstep
+        return random.uniform(0.5, 1.5) * self.backoff_seconds * (2 ** attempt)
+
+    async def generate(self, prompt: str, model_name: str = GEMINI_MODEL, max_retries: int = None,
+                       cache: bool = False, fresh: bool = False, json_mode: bool = False) -> str:
+        """
+        Returns the completion text. Retries 429s with async backoff, re-raises anything else.
+        cache=True serves/stores the response in the persistent LLM cache;
+        fresh=True skips the lookup (new output) but still refreshes the stored entry.
+        json_mode=True asks the model for a bare JSON document.
+        """
+        if cache and not fresh:
+            cached = await asyncio.to_thread(llm_cache.get, model_name, prompt, json_mode)
+            if cached is not None:
+                return cached
+
+        text = await self._call(prompt, model_name, max_retries, json_mode)
+
+        if cache and text:
+            await asyncio.to_thread(llm_cache.set, model_name, prompt, text, json_mode)
+        return text
+
+    async def _call(self, prompt: str, model_name: str, max_retries: int = None, json_mode: bool = False) -> str:
+        if max_retries is None:
+            max_retries = self.max_retries
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                await self.bucket.acquire()
+                if attempt == 0:
+                    self.calls += 1
+                    self.total_wait_seconds += time.monotonic() - queued_at
+                self.requests += 1
+                started = time.perf_counter()
+                try:
+                    response = await self._model(model_name).generate_content_async(
+                        prompt, **self._options(model_name, json_mode)
+                    )
+                    record_llm_request(model_name, "ok", time.perf_counter() - started, response)
+                    return response.text
+                except Exception as e:
+                    record_llm_request(
+                        model_name, "rate_limited" if is_rate_limit_error(e) else "error", time.perf_counter() - started
+                    )
+                    if not is_rate_limit_error(e) or attempt >= max_retries:
+                        if is_rate_limit_error(e):
+                            self.rate_limited += 1
+                        self.failures += 1
+                        raise
+                    self.rate_limited += 1
+                    self.retries += 1
+                    LLM_RETRIES.labels(model_name).inc()
+                    delay = self._backoff(attempt)
+                    logger.warning(
+                        "Gemini quota hit, backing off",
+                        extra={"model": model_name, "delay_s": round(delay, 1), "attempt": attempt + 1, "max_retries": max_retries},
+                    )
+                    # Every other caller (in every worker) holds off too instead of burning more 429s
+                    await self.bucket.pause(delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def stream(self, prompt: str, model_name: str = GEMINI_MODEL, cache: bool = False, fresh: bool = False):
+        """
+        Async generator over completion text chunks as Gemini produces them.
+        No retries: an error before the first chunk lets the caller fall back
+        to another model. A cached response comes back as a single chunk.
+        """
+        if cache and not fresh:
+            cached = await asyncio.to_thread(llm_cache.get, model_name, prompt)
+            if cached is not None:
+                yield cached
+                return
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        # The slot stays taken until the stream is drained (or the client goes away)
+        self.in_flight += 1
+        chunks = []
+        try:
+            await self.bucket.acquire()
+            self.calls += 1
+            self.requests += 1
+            self.total_wait_seconds += time.monotonic() - queued_at
+            started = time.perf_counter()
+            try:
+                response = await self._model(model_name).generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    text = chunk.text
+                    if text:
+                        chunks.append(text)
+                        yield text
+                # usage_metadata arrives with the last chunk
+                record_llm_request(model_name, "ok", time.perf_counter() - started, response)
+            except Exception as e:
+                record_llm_request(
+                    model_name, "rate_limited" if is_rate_limit_error(e) else "error", time.perf_counter() - started
+                )
+                if is_rate_limit_error(e):
+                    self.rate_limited += 1
+                self.failures += 1
+                raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+        if cache and chunks:
+            await asyncio.to_thread(llm_cache.set, model_name, prompt, "".join(chunks))
+
+    def stats(self):
+        return {
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "calls": self.calls,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "failures": self.failures,
+            "avg_queue_wait_seconds": round(self.total_wait_seconds / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+llm_gateway = LLMGateway(
+    GEMINI_RPM, GEMINI_BURST, GEMINI_MAX_IN_FLIGHT, GEMINI_MAX_RETRIES, GEMINI_BACKOFF_SECONDS, coordinator,
+)
@@ -0,0 +1,392 @@
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from typing import List
+import json
+import logging
+import re
+
+from api.instrumentation import LLM_JSON_PARSES, stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+class LLMJSONError(ValueError):
+    """The model's answer could not be turned into the expected schema, even after repair and a re-prompt."""
+
+
+# ==========================================
+# 1. EXTRACTION: first balanced {...} / [...] in the text, one pass
+# ==========================================
+class JsonExtractor:
+    """
+    Scans text once, tracking bracket depth outside of string literals, and
+    returns the first complete top-level object or array. Works on streamed
+    text too: feed() chunks and it returns the value as soon as it closes.
+    Prose, ```json fences and trailing chatter around the value are ignored;
+    a `}` inside a string never ends the object (the greedy regex's failure).
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._pos = 0
+        self.start = None        # offset of the current candidate's opening bracket
+        self._depth = 0
+        self._in_string = None   # the quote char while inside a string
+        self._escaped = False
+
+    def feed(self, chunk: str):
+        for ch in chunk:
+            self._pos += 1
+            if self._depth == 0:
+                if ch in "{[":
+                    self._buffer = [ch]
+                    self.start = self._pos - 1
+                    self._depth = 1
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == self._in_string:
+                    self._in_string = None
+            elif ch in "\"'":
+                self._in_string = ch
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return "".join(self._buffer)
+        return None
+
+    def partial(self):
+        """Whatever was opened but never closed (a truncated answer), or None."""
+        return "".join(self._buffer) if self._depth else None
+
+
+def json_candidates(text: str):
+    """
+    Yields (candidate, complete) for every balanced value in order, each
+    scan resuming at the bracket after the previous candidate's opening one,
+    then the truncated tail (if any). Brackets in prose ("Score [0-100]
+    below") don't hide the object that follows them.
+    """
+    offset = 0
+    while True:
+        extractor = JsonExtractor()
+        candidate = extractor.feed(text[offset:])
+        if candidate is None:
+            partial = extractor.partial()
+            if partial is not None:
+                yield partial, False
+            return
+        yield candidate, True
+        offset += extractor.start + 1
+
+
+def extract_json(text: str):
+    """(candidate, complete): the first balanced JSON value, else the truncated tail, else (None, False)."""
+    return next(json_candidates(text), (None, False))
+
+
+# ==========================================
+# 2. LOCAL REPAIR (no extra LLM call)
+# ==========================================
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def repair_json(candidate: str) -> str:
+    """
+    Fixes what models commonly get wrong, in one string-aware pass:
+    single-quoted strings, unquoted keys, Python True/False/None, trailing
+    commas, // comments, and output cut off mid-string or mid-object.
+    """
+    text = candidate.translate(SMART_QUOTES)
+    out = []
+    stack = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            # Re-emit every string double-quoted, escaping as needed
+            quote, i = ch, i + 1
+            chars = []
+            while i < n and text[i] != quote:
+                if text[i] == "\\" and i + 1 < n:
+                    chars.append(text[i:i + 2])
+                    i += 2
+                    continue
+                chars.append('\\"' if text[i] == '"' else text[i])
+                i += 1
+            out.append('"' + "".join(chars) + '"')
+            i += 1
+            continue
+        if ch == "/" and text[i:i + 2] == "//":
+            while i < n and text[i] != "\n":
+                i += 1
+            continue
+        if ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            # Drop a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+        elif ch.isalpha() or ch == "_":
+            match = re.match(r"[A-Za-z_][A-Za-z0-9_\-]*", text[i:])
+            word = match.group(0)
+            i += len(word)
+            rest = text[i:].lstrip()
+            if rest.startswith(":"):
+                out.append(json.dumps(word))          # unquoted key
+            elif word in PY_LITERALS:
+                out.append(PY_LITERALS[word])
+            else:
+                out.append(word)                     # true / false / null (or garbage json.loads will reject)
+            continue
+        out.append(ch)
+        i += 1
+
+    # Truncated output: drop a dangling comma / key, then close whatever is still open
+    repaired = "".join(out).rstrip()
+    repaired = re.sub(r',\s*("[^"]*"\s*:?\s*)?$', "", repaired)
+    repaired = re.sub(r':\s*$', ": null", repaired)
+    return repaired + "".join(reversed(stack))
+
+
+def load_json(text: str):
+    """
+    (value, how): how is "ok" or "repaired". A candidate that neither parses
+    nor repairs (bracketed prose) is skipped for the next one. Raises
+    LLMJSONError if nothing parses.
+    """
+    error = None
+    for candidate, complete in json_candidates(text or ""):
+        if complete:
+            try:
+                return json.loads(candidate), "ok"
+            except json.JSONDecodeError:
+                pass
+        try:
+            return json.loads(repair_json(candidate)), "repaired"
+        except json.JSONDecodeError as e:
+            error = e
+    if error is None:
+        raise LLMJSONError("No JSON object in the model output.")
+    raise LLMJSONError(f"Unrepairable JSON: {error}")
+
+
+# ==========================================
+# 3. SCHEMAS (one per prompt; lenient coercion of what models return)
+# ==========================================
+def coerce_int(value):
+    """85 / "85" / "85/100" / "5+ years" -> int; anything without a number is invalid."""
+    if isinstance(value, bool):
+        raise ValueError("expected a number")
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"-?\d+", str(value).replace(",", ""))
+    if not match:
+        raise ValueError("expected a number")
+    return int(match.group(0))
+
+
+def coerce_list(value):
+    """A list of strings; a single string or a comma/newline list becomes one."""
+    if value is None:
+        raise ValueError("expected a list")
+    if isinstance(value, str):
+        value = [part.strip(" -•*") for part in re.split(r"[\n;]|,(?![^()]*\))", value)]
+    if not isinstance(value, list):
+        raise ValueError("expected a list")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def coerce_text(value):
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value)
+    if value is None:
+        raise ValueError("expected text")
+    return str(value)
+
+
+class LLMSchema(BaseModel):
+    @classmethod
+    def fields(cls):
+        return list(cls.model_fields)
+
+
+# Skill lists (top / missing skills) come from api/skills.py; the *SkillsResult schemas
+# ask the model for them only when the taxonomy barely covers the text (non-tech roles)
+class AtsResult(LLMSchema):
+    ats_score: int
+    missing_sections: str
+    feedback_list: List[str]
+
+    _score = field_validator("ats_score", mode="before")(lambda v: max(0, min(100, coerce_int(v))))
+    _lists = field_validator("feedback_list", mode="before")(coerce_list)
+    _text = field_validator("missing_sections", mode="before")(coerce_text)
+
+
+class AtsSkillsResult(AtsResult):
+    top_skills: List[str]
+
+    _skills = field_validator("top_skills", mode="before")(coerce_list)
+
+
+class PackedAtsItem(AtsResult):
+    resume_id: int
+
+    _id = field_validator("resume_id", mode="before")(coerce_int)
+
+
+class PackedAtsSkillsItem(AtsSkillsResult):
+    resume_id: int
+
+    _id = field_validator("resume_id", mode="before")(coerce_int)
+
+
+class PackedAtsResults(LLMSchema):
+    results: List[dict]
+
+    @model_validator(mode="before")
+    @classmethod
+    def bare_list(cls, data):
+        # Some models answer with the list itself
+        return {"results": data} if isinstance(data, list) else data
+
+
+class LinkedInResult(LLMSchema):
+    top_experience: str
+    years_experience: int
+    connections_count: str
+    summary_rating: int
+    feedback_list: List[str]
+
+    _ints = field_validator("years_experience", mode="before")(coerce_int)
+    _rating = field_validator("summary_rating", mode="before")(lambda v: max(0, min(100, coerce_int(v))))
+    _text = field_validator("top_experience", "connections_count", mode="before")(coerce_text)
+    _lists = field_validator("feedback_list", mode="before")(coerce_list)
+
+
+class ProfilePdfResult(LLMSchema):
+    score: int
+    years_experience: int
+    feedback: List[str]
+
+    _score = field_validator("score", mode="before")(lambda v: max(0, min(100, coerce_int(v))))
+    _ints = field_validator("years_experience", mode="before")(coerce_int)
+    _lists = field_validator("feedback", mode="before")(coerce_list)
+
+
+class ProfilePdfSkillsResult(ProfilePdfResult):
+    top_skills: List[str]
+    missing_keywords: List[str]
+
+    _skills = field_validator("top_skills", "missing_keywords", mode="before")(coerce_list)
+
+
+class MatchResult(LLMSchema):
+    match_score: int
+    analysis: str
+
+    _score = field_validator("match_score", mode="before")(lambda v: max(0, min(100, coerce_int(v))))
+    _text = field_validator("analysis", mode="before")(coerce_text)
+
+
+class MatchSkillsResult(MatchResult):
+    missing_skills: List[str]
+
+    _lists = field_validator("missing_skills", mode="before")(coerce_list)
+
+
+def validate(schema, data):
+    """(instance or None, fields that are missing or invalid)."""
+    if not isinstance(data, (dict, list)):
+        return None, schema.fields()
+    try:
+        return schema.model_validate(data), []
+    except ValidationError as e:
+        bad = sorted({str(err["loc"][0]) for err in e.errors() if err["loc"]}) or schema.fields()
+        return None, bad
+
+
+def parse_llm_json(text: str, schema):
+    """Extract + repair + validate, no LLM call: (instance or None, raw value, bad fields, "ok"/"repaired")."""
+    data, how = load_json(text)
+    instance, bad = validate(schema, data)
+    return instance, data, bad, how
+
+
+# ==========================================
+# 4. THE ONE ENTRY POINT THE PIPELINES USE
+# ==========================================
+def reprompt_for(prompt: str, fields):
+    return (
+        f"{prompt}\n\n"
+        f"Your previous answer was missing these fields or had invalid values for them: {', '.join(fields)}.\n"
+        f"Return ONLY a JSON object with exactly these keys: {', '.join(fields)}."
+    )
+
+
+def merge_patch(data, patch):
+    return {**(data if isinstance(data, dict) else {}), **(patch if isinstance(patch, dict) else {})}
+
+
+def parses_into(schema, base=None):
+    """accept() for a cached answer: it (merged over `base`, for a re-prompt) validates into schema."""
+    def accept(text):
+        try:
+            value, _ = load_json(text)
+        except LLMJSONError:
+            return False
+        if base is not None:
+            value = merge_patch(base, value)
+        return validate(schema, value)[0] is not None
+    return accept
+
+
+async def generate_json(generate, prompt: str, schema, pipeline: str):
+    """
+    generate(prompt, json_mode=True, accept=...) -> text, e.g. a
+    model_router.generate partial; accept(text) tells a caching generate
+    whether the answer is worth storing (only ones that end up valid are).
+    Parses the answer into `schema`; fields still missing or invalid after
+    local repair are asked for once more, on their own, and merged in.
+    Raises LLMJSONError rather than inventing values, so callers keep their
+    own fallback. Times the llm / parse / reprompt stages of `pipeline`.
+    """
+    with stage_timer(pipeline, "llm"):
+        text = await generate(prompt, json_mode=True, accept=parses_into(schema))
+    with stage_timer(pipeline, "parse"):
+        try:
+            instance, data, bad, how = parse_llm_json(text, schema)
+        except LLMJSONError:
+            instance, data, bad, how = None, {}, schema.fields(), "failed"
+
+    if instance is not None:
+        LLM_JSON_PARSES.labels(pipeline, how).inc()
+        return instance
+
+    # Re-prompt for just the bad fields (a much shorter answer than a full retry)
+    logger.info("LLM JSON incomplete, re-prompting", extra={"pipeline": pipeline, "fields": ",".join(bad)})
+    with stage_timer(pipeline, "reprompt"):
+        follow_up = await generate(reprompt_for(prompt, bad), json_mode=True, accept=parses_into(schema, data))
+    try:
+        patch, _ = load_json(follow_up)
+    except LLMJSONError:
+        patch = {}
+    merged = merge_patch(data, patch)
+    instance, still_bad = validate(schema, merged)
+    if instance is not None:
+        LLM_JSON_PARSES.labels(pipeline, "reprompted").inc()
+        return instance
+
+    LLM_JSON_PARSES.labels(pipeline, "failed").inc()
+    raise LLMJSONError(f"{pipeline}: no valid value for {', '.join(still_bad)}")
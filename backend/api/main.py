@@ -1,37 +1,79 @@
 from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Form
-from pypdf import PdfReader
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import asyncio
 import json
-import io
-import os
+import logging
 import re
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+# Logging first, so messages logged while importing (migrations) are formatted too
+from api.instrumentation import configure_logging
+configure_logging()
+
 # Import your features
 from api.auth import router as auth_router
-from api.analysis import router as analysis_router
+from api.analysis import router as analysis_router, save_analysis_run, ask_gemini_for_json
+from api.analytics import router as analytics_router
 from api.jobs import router as jobs_router
-from api.ai_agent import router as ai_router
-from api.database import get_db, engine, Base
-from api.models import User, Post
+from api.ai_agent import router as ai_router, list_posts
+from api.database import get_db, get_async_db, engine, async_engine
+from api.models import User, AnalysisTask
+from api.migrations import init_db
+from api.coordination import coordinator
+from api.sessions import get_current_user, get_optional_user_id
+from api.single_flight import single_flight
+from api.profile_store import latest_analyses, analysis_history, analysis_to_dict, linkedin_stats
+from api.pdf_cache import pdf_cache, file_hash
+from api.uploads import UploadLimitMiddleware, receive_upload, received_upload, remove_stale_uploads
+from api.pdf_service import pdf_service
+from api.config import (
+    MATCH_PRESCORE_MIN, MATCH_TOP_K, MATCH_MAX_JOBS, MATCH_TOP_K_MAX, METRICS_ENABLED, PROMPT_TOKENS_PROFILE_PDF,
+    PROMPT_TOKENS_MATCH_RESUME, PROMPT_TOKENS_MATCH_JOB,
+)
+from api.instrumentation import (
+    router as metrics_router, RequestMetricsMiddleware, register_stats_collector, stage_timer,
+)
+from api.matching import score_against, top_k, to_match_score
+from api.skills import covers, skill_index, skill_gaps
+from api.resume_text import prepare_text, prepare_plain, SKILLS_PRIORITY
+from api.llm_gateway import llm_gateway
+from api.llm_json import LLMJSONError, MatchResult, MatchSkillsResult, ProfilePdfResult, ProfilePdfSkillsResult
+from api.model_router import model_router
+from api.llm_cache import llm_cache
+from api.http_client import shared_http
+from api.scraper import scraper_pool
+from api.tasks import router as tasks_router, task_queue, task_to_dict, no_progress, require_pdf, require_field
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
-# --- CONFIGURATION ---
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+# --- APP LIFESPAN (schema once, then start/stop shared workers) ---
+def locked_init_db():
+    with coordinator.lock("init-db"):
+        init_db(engine)
 
-# Use the model that worked for you in the logs
-AI_MODEL_NAME = "gemini-2.5-flash" 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables and upgrade existing linkbrand.db files (one worker at a time)
+    await asyncio.to_thread(locked_init_db)
+    await asyncio.to_thread(remove_stale_uploads)
+    # Resume text spilled by an earlier run may have expired while the server was down
+    await asyncio.to_thread(pdf_cache.sweep_disk)
+    pdf_service.start()
+    scraper_pool.start()
+    shared_http.start()
+    task_queue.start()
+    yield
+    await task_queue.stop()
+    await shared_http.close()
+    scraper_pool.shutdown()
+    pdf_service.shutdown()
+    await async_engine.dispose()
 
-# Create Tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,76 +82,112 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Oversized multipart bodies get a 413 before they are parsed and spooled
+app.add_middleware(UploadLimitMiddleware)
+
+# --- METRICS (Prometheus scrape endpoint at GET /metrics) ---
+if METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+    register_stats_collector(pdf_cache, llm_cache, llm_gateway, model_router)
+    app.include_router(metrics_router, tags=["Metrics"])
 
 # Register Routers
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(analysis_router, prefix="/api", tags=["Analysis"])
 app.include_router(jobs_router, prefix="/api", tags=["Jobs"])
 app.include_router(ai_router, prefix="/api", tags=["AI"])
+app.include_router(tasks_router, prefix="/api", tags=["Tasks"])
+app.include_router(analytics_router, prefix="/api", tags=["Analytics"])
 
 @app.get("/")
 def read_root():
     return {"status": "LinkBrand AI is running"}
 
-# --- REAL AI RESUME ANALYZER ---
-@app.post("/api/analyze/profile-pdf")
-async def analyze_profile_pdf(file: UploadFile = File(...)):
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
+# --- CACHE STATS (used to size the caches) ---
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {"pdf_text": pdf_cache.stats(), "llm": llm_cache.stats()}
 
-    try:
-        # 1. Extract Text from PDF
-        content = await file.read()
-        reader = PdfReader(io.BytesIO(content))
-        extracted_text = ""
-        for page in reader.pages:
-            extracted_text += page.extract_text() or ""
+# --- LLM GATEWAY STATS (queue depth, 429s, retries, per-model health) ---
+@app.get("/api/llm/stats")
+def llm_stats():
+    return {**llm_gateway.stats(), "router": model_router.stats()}
 
-        if len(extracted_text.strip()) < 50:
-             raise HTTPException(status_code=400, detail="PDF seems empty or is an image.")
+# --- OUTBOUND HTTP STATS (per-host latency + connections opened) ---
+@app.get("/api/http/stats")
+def http_stats():
+    return shared_http.stats()
 
-        # 2. Prepare AI Prompt
-        # We ask Gemini to act as an ATS Scanner and return strict JSON
-        prompt = f"""
+# --- HELPER: PROFILE PDF PROMPT ---
+def build_profile_pdf_prompt(extracted_text, with_skills=False):
+    # We ask Gemini to act as an ATS Scanner and return strict JSON (skills only if the taxonomy can't find them)
+    skill_keys = """
+        - "top_skills": (list of strings, top 5 technical skills found)""" if with_skills else ""
+    keyword_keys = """
+        - "missing_keywords": (list of 3 important industry keywords that seem missing based on the context)""" if with_skills else ""
+    return f"""
         Act as an expert ATS (Applicant Tracking System) Resume Scanner. 
         Analyze the resume text below.
         
         Return a valid JSON object with exactly these keys:
         - "score": (integer 0-100 based on keyword density, formatting, and impact)
-        - "years_experience": (integer, estimated from the dates in text)
-        - "top_skills": (list of strings, top 5 technical skills found)
-        - "feedback": (list of 3 specific strings telling the candidate how to improve. Be critical.)
-        - "missing_keywords": (list of 3 important industry keywords that seem missing based on the context)
+        - "years_experience": (integer, estimated from the dates in text){skill_keys}
+        - "feedback": (list of 3 specific strings telling the candidate how to improve. Be critical.){keyword_keys}
 
         RESUME TEXT:
-        {extracted_text[:3000]} 
+        {prepare_text(extracted_text, PROMPT_TOKENS_PROFILE_PDF)}
         """
 
-        # 3. Call Gemini AI
-        model = genai.GenerativeModel(AI_MODEL_NAME)
-        response = model.generate_content(prompt)
-        
-        # 4. Parse AI Response (Clean up JSON)
-        ai_data = {}
+# --- REAL AI RESUME ANALYZER ---
+async def profile_pdf_pipeline(content, filename, report=no_progress, db=None, user_id=None):
+    try:
+        # 1. Extract Text from PDF
+        await report(10, "extracting")
+        with stage_timer("profile-pdf", "extract"):
+            extracted_text = await pdf_service.extract_text(content)
+
+        if len(extracted_text.strip()) < 50:
+             raise HTTPException(status_code=400, detail="PDF seems empty or is an image.")
+
+        # 2. Prepare AI Prompt
+        with stage_timer("profile-pdf", "prompt"):
+            found = skill_index.extract(extracted_text)
+            with_skills = not covers(found)
+            prompt = build_profile_pdf_prompt(extracted_text, with_skills)
+
+        # 3. Call Gemini AI (JSON mode; repaired / re-prompted until it fits the schema)
+        await report(40, "analyzing")
         try:
-            # Remove markdown code blocks if AI adds them (e.g. ```json ... ```)
-            clean_json = response.text.replace("```json", "").replace("```", "").strip()
-            ai_data = json.loads(clean_json)
-        except:
-            # Fallback if AI output is messy
-            print("⚠️ AI JSON Parsing failed. Using fallback stats.")
-            ai_data = {
-                "score": 65,
-                "years_experience": 2,
-                "top_skills": ["Communication", "Analysis"],
-                "feedback": ["Could not parse AI details. Ensure resume text is clear.", "Add more quantifiable results.", "Check date formatting."],
-                "missing_keywords": ["Leadership", "Python", "Agile"]
+            schema = ProfilePdfSkillsResult if with_skills else ProfilePdfResult
+            ai_data = await ask_gemini_for_json(prompt, schema, "profile-pdf")
+        except LLMJSONError:
+            # No made-up stats: the UI shows the retry hint instead
+            logger.warning("AI JSON unusable after repair and re-prompt", extra={"upload": filename})
+            return {
+                "status": "partial_error",
+                "years": 0, "score": 0, "posts": 0,
+                "feedback_list": ["Could not read the AI analysis. Please try again."],
+                "skills": []
             }
 
-        # 5. Return Data to Frontend
+        # 4. Skills + missing keywords from the local taxonomy (the model's lists for non-tech resumes)
+        with stage_timer("profile-pdf", "skills"):
+            if with_skills:
+                skills = skill_index.normalize(ai_data["top_skills"])
+                missing = skill_index.normalize(ai_data["missing_keywords"])
+            else:
+                skills, missing = skill_index.ranked(found), skill_index.suggest_missing(found)
+            ai_data = {**ai_data, "top_skills": skills, "missing_keywords": missing}
+
+        # 5. Save (only real results go into the user's analysis history)
+        await report(90, "saving")
+        with stage_timer("profile-pdf", "persist"):
+            await save_analysis_run(db, user_id, "profile-pdf", ai_data)
+
+        # 6. Return Data to Frontend
         return {
             "status": "success",
-            "filename": file.filename,
+            "filename": filename,
             "extracted_text": extracted_text[:200],
             
             # Map AI data to what Frontend expects
@@ -124,7 +202,7 @@ async def analyze_profile_pdf(file: UploadFile = File(...)):
         }
 
     except Exception as e:
-        print(f"Error processing PDF: {e}")
+        logger.exception("Profile PDF analysis failed", extra={"upload": filename})
         # Return a soft error so the UI doesn't crash completely
         return {
             "status": "partial_error",
@@ -133,73 +211,231 @@ async def analyze_profile_pdf(file: UploadFile = File(...)):
             "skills": []
         }
 
-# --- JOB MATCHER (UPDATED TO USE AI TOO) ---
-@app.post("/api/analyze/match-job")
-async def match_job(
-    resume: UploadFile = File(...), 
-    job_description: str = Form(...)
+@app.post("/api/analyze/profile-pdf")
+async def analyze_profile_pdf(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_optional_user_id)
 ):
-    try:
-        # 1. Read Resume
-        content = await resume.read()
-        reader = PdfReader(io.BytesIO(content))
-        resume_text = ""
-        for page in reader.pages:
-            resume_text += page.extract_text() or ""
-            
-        # 2. AI Prompt for Matching
-        prompt = f"""
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
+
+    async with received_upload(file) as upload:
+        return await single_flight.do(
+            "profile-pdf", (upload.sha256, file.filename, user_id),
+            lambda: profile_pdf_pipeline(upload, file.filename, db=db, user_id=user_id),
+        )
+
+# --- HELPER: AI MATCH NARRATIVE ---
+async def ai_match(resume_text, job_description, with_skills=False):
+    # Missing skills come from api/skills.py unless the taxonomy barely covers the posting
+    skill_keys = """,
+            "missing_skills": (list of strings)""" if with_skills else ""
+    prompt = f"""
         Compare this Resume against the Job Description.
         
         JOB DESCRIPTION:
-        {job_description[:1000]}
+        {prepare_plain(job_description, PROMPT_TOKENS_MATCH_JOB)}
         
         RESUME:
-        {resume_text[:1000]}
+        {prepare_text(resume_text, PROMPT_TOKENS_MATCH_RESUME, SKILLS_PRIORITY)}
         
         Return JSON:
         {{
             "match_score": (integer 0-100),
-            "analysis": (string, 2 sentences explaining why it fits or doesn't),
-            "missing_skills": (list of strings)
+            "analysis": (string, 2 sentences explaining why it fits or doesn't){skill_keys}
         }}
         """
-        
-        model = genai.GenerativeModel(AI_MODEL_NAME)
-        response = model.generate_content(prompt)
-        
-        # Parse JSON
-        clean_json = response.text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(clean_json)
+    return await ask_gemini_for_json(prompt, MatchSkillsResult if with_skills else MatchResult, "match")
+
+# --- HELPER: LOCAL RESULT (obvious mismatch, no LLM call) ---
+def local_match(similarity):
+    return {
+        "match_score": to_match_score(similarity),
+        "analysis": "Very little overlap between this resume and the job description. The core requirements are not reflected in the resume.",
+    }
+
+# --- JOB MATCHER (UPDATED TO USE AI TOO) ---
+async def match_job_pipeline(content, job_description, report=no_progress):
+    try:
+        # 1. Read Resume
+        await report(10, "extracting")
+        with stage_timer("match", "extract"):
+            resume_text = await pdf_service.extract_text(content)
+
+        # 2. Local pre-score: obvious mismatches never reach Gemini
+        with stage_timer("match", "prescore"):
+            similarity = float(score_against(resume_text, [job_description])[0])
+            wanted = skill_index.extract(job_description)
+        if similarity < MATCH_PRESCORE_MIN:
+            data = local_match(similarity)
+        else:
+            await report(40, "analyzing")
+            data = await ai_match(resume_text, job_description, with_skills=not covers(wanted))
+
+        # 3. Skill gaps against the posting: local, or the model's list for a posting the taxonomy barely covers
+        with stage_timer("match", "skills"):
+            if "missing_skills" in data:
+                missing = skill_index.normalize(data["missing_skills"])
+            else:
+                missing = skill_gaps(skill_index.extract(resume_text), wanted, resume_text, job_description)
 
         return {
             "match_score": data.get("match_score", 50),
             "analysis": data.get("analysis", "Analysis complete."),
-            "missing_sections": ", ".join(data.get("missing_skills", []))
+            "missing_sections": ", ".join(missing)
         }
     except Exception as e:
-        print(f"Error matching job: {e}")
+        logger.exception("Job match failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze/match-job")
+async def match_job(
+    resume: UploadFile = File(...), 
+    job_description: str = Form(...)
+):
+    async with received_upload(resume) as upload:
+        key = (upload.sha256, file_hash(job_description.encode()))
+        return await single_flight.do("match-job", key, lambda: match_job_pipeline(upload, job_description))
+
+# --- MULTI-JOB MATCHER (rank locally, narrate only the top-k) ---
+@app.post("/api/analyze/match-jobs")
+async def match_jobs(
+    resume: UploadFile = File(...),
+    jobs: str = Form(...),
+    top_k_count: int = Form(MATCH_TOP_K, ge=1, le=MATCH_TOP_K_MAX),
+):
+    """
+    `jobs` is a JSON list of up to MATCH_MAX_JOBS {"title", "company", "description"}
+    objects. All of them are scored against the resume locally, off the event
+    loop; only the best `top_k_count` get a Gemini narrative.
+    """
+    try:
+        job_list = json.loads(jobs)
+        if not isinstance(job_list, list) or not all(isinstance(job, dict) for job in job_list):
+            raise ValueError("jobs must be a JSON list of objects")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid jobs payload: {e}")
+    if len(job_list) > MATCH_MAX_JOBS:
+        raise HTTPException(status_code=413, detail=f"Too many jobs: the limit is {MATCH_MAX_JOBS} per request.")
+
+    upload = await receive_upload(resume)
+    try:
+        with stage_timer("match-jobs", "extract"):
+            resume_text = await pdf_service.extract_text(upload)
+        # The spooled file isn't needed while the (slow) narratives run
+        upload.cleanup()
+
+        job_texts = [
+            f"{job.get('title', '')} {job.get('company', '')} {job.get('description', '')}" for job in job_list
+        ]
+        # Ranking and skill extraction are CPU work over every job: keep them off the event loop
+        with stage_timer("match-jobs", "rank"):
+            scores = await asyncio.to_thread(score_against, resume_text, job_texts)
+            ranked = top_k(scores, len(job_list))
+        best = [i for i in ranked[:top_k_count] if scores[i] >= MATCH_PRESCORE_MIN]
+
+        with stage_timer("match-jobs", "skills"):
+            resume_skills = await asyncio.to_thread(skill_index.extract, resume_text)
+            wanted = await asyncio.to_thread(lambda: [skill_index.extract(text) for text in job_texts])
+
+        narratives = {}
+        if best and llm_gateway.enabled:
+            results = await asyncio.gather(
+                *[ai_match(resume_text, job_texts[i], with_skills=not covers(wanted[i])) for i in best],
+                return_exceptions=True,
+            )
+            for i, result in zip(best, results):
+                if isinstance(result, Exception):
+                    logger.warning("Job narrative failed", extra={"job_index": i, "error": str(result)})
+                else:
+                    narratives[i] = result
+
+        def missing(i):
+            ai_data = narratives.get(i)
+            if ai_data and "missing_skills" in ai_data:
+                return skill_index.normalize(ai_data["missing_skills"])
+            return skill_gaps(resume_skills, wanted[i], resume_text, job_texts[i])
+
+        with stage_timer("match-jobs", "gaps"):
+            gaps = await asyncio.to_thread(lambda: [missing(i) for i in ranked])
+
+        matches = []
+        for i, missing_skills in zip(ranked, gaps):
+            ai_data = narratives.get(i)
+            matches.append({
+                **job_list[i],
+                "local_score": to_match_score(float(scores[i])),
+                "match_score": ai_data.get("match_score") if ai_data else to_match_score(float(scores[i])),
+                "analysis": ai_data.get("analysis") if ai_data else None,
+                "missing_sections": ", ".join(missing_skills),
+            })
+
+        return {"status": "success", "count": len(matches), "matches": matches}
+    except Exception as e:
+        logger.exception("Multi-job match failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.cleanup()
+
+
+# --- Background task versions of the main.py pipelines ---
+task_queue.register(
+    "profile-pdf",
+    lambda payload, db, report: profile_pdf_pipeline(
+        require_pdf(payload), payload["filename"], report, db, payload.get("user_id")
+    )
+)
+task_queue.register(
+    "match-job",
+    lambda payload, db, report: match_job_pipeline(require_pdf(payload), require_field(payload, "job_description"), report)
+)
+
+def latest_task_results(db: Session, user_id: int):
+    latest = {}
+    finished = (
+        db.query(AnalysisTask)
+        .filter(AnalysisTask.user_id == user_id, AnalysisTask.status == "done")
+        .order_by(AnalysisTask.updated_at.desc())
+        .limit(50)
+        .all()
+    )
+    for task in finished:
+        if task.kind not in latest:
+            latest[task.kind] = task_to_dict(task)
+    return latest
 
 # --- Endpoint to Fetch User Data on Refresh ---
 @app.get("/api/user/data")
-def get_user_data(db: Session = Depends(get_db)):
-    user = db.query(User).first()
-    if not user:
-        return {"stats": None, "posts": []}
-    
-    try:
-        stats = json.loads(user.profile_summary) if user.profile_summary else None
-    except:
-        stats = None
+def get_user_data(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    # Newest run of every analysis kind, skills included: one indexed query
+    latest = latest_analyses(db, user.id)
+    stats = linkedin_stats(latest["linkedin"]) if "linkedin" in latest else None
         
-    posts = [p.content for p in user.posts][::-1]
+    # First page only (newest first); older posts via /api/user/posts?cursor=...
+    posts, next_cursor = list_posts(db, user.id)
     
     return {
         "stats": stats,
-        "posts": posts
+        "posts": [p.content for p in posts],
+        "next_cursor": next_cursor,
+        "profile": {kind: analysis_to_dict(a) for kind, a in latest.items()},
+        # Finished background analyses, newest per kind (no recomputation)
+        "analyses": latest_task_results(db, user.id)
     }
 
+# --- Versioned history of one analysis kind (newest first) ---
+@app.get("/api/user/analyses/{kind}")
+def get_analysis_history(
+    kind: str,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    runs = analysis_history(db, user.id, kind, max(1, min(limit, 100)))
+    return {"kind": kind, "runs": [analysis_to_dict(a) for a in runs]}
+
 if __name__ == "__main__":
-    uvicorn.run("api.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    # WEB_CONCURRENCY=4 python -m api.main starts 4 workers (see api/launcher.py)
+    from api.launcher import run
+    run()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import numpy as np
+from collections import Counter
+import re
+import zlib
+
+# Hashed feature space for word unigrams + bigrams. Vectors are kept sparse
+# (one entry per distinct gram), so memory grows with the text, not 2**14 per job.
+N_FEATURES = 2 ** 14
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "will",
+    "with", "you", "your", "who", "what", "role", "job", "work", "team", "years", "experience",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+# --- HELPER: TOKENIZE ---
+def tokenize(text: str):
+    """Lowercased word tokens; keeps things like c++, c#, node.js intact."""
+    tokens = [t.rstrip(".") for t in TOKEN_RE.findall(text.lower())]
+    return [t for t in tokens if t and t not in STOPWORDS]
+
+
+def _feature_ids(text: str) -> np.ndarray:
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    # crc32 instead of hash(): Python's str hash changes on every process start
+    return np.fromiter((zlib.crc32(g.encode()) % N_FEATURES for g in grams), dtype=np.int64, count=len(grams))
+
+
+def vectorize(texts):
+    """
+    TF-IDF rows (sublinear tf, smoothed idf over this corpus), L2-normalized,
+    as sparse (row, column, weight) arrays: a row's weights dot another row's
+    is their cosine similarity.
+    """
+    ids = [_feature_ids(text) for text in texts]
+    rows = np.repeat(np.arange(len(texts)), [len(i) for i in ids])
+    # One entry per distinct (row, column), with its count
+    cells, counts = np.unique(rows * N_FEATURES + np.concatenate(ids or [np.zeros(0, np.int64)]), return_counts=True)
+    rows, cols = cells // N_FEATURES, cells % N_FEATURES
+
+    df = np.bincount(cols, minlength=N_FEATURES)
+    idf = np.log((1 + len(texts)) / (1 + df)).astype(np.float32) + 1.0
+    weights = (1.0 + np.log(counts)).astype(np.float32) * idf[cols]
+
+    norms = np.sqrt(np.bincount(rows, weights * weights, minlength=len(texts))).astype(np.float32)
+    norms[norms == 0] = 1.0
+    return rows, cols, weights / norms[rows]
+
+
+def score_against(resume_text: str, job_texts) -> np.ndarray:
+    """Cosine similarity (0-1) of one resume against every job text, one pass over the sparse job rows."""
+    if not job_texts:
+        return np.zeros(0, dtype=np.float32)
+    rows, cols, weights = vectorize([resume_text] + list(job_texts))
+    resume = np.zeros(N_FEATURES, dtype=np.float32)
+    is_resume = rows == 0
+    resume[cols[is_resume]] = weights[is_resume]
+    jobs = ~is_resume
+    scores = np.bincount(rows[jobs] - 1, weights[jobs] * resume[cols[jobs]], minlength=len(job_texts))
+    return scores.astype(np.float32)
+
+
+def top_k(scores: np.ndarray, k: int):
+    """Indices of the k best scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])].tolist()
+
+
+def to_match_score(similarity: float) -> int:
+    # Resume/JD cosine similarities rarely pass ~0.5 even for strong fits,
+    # so stretch them onto the 0-100 scale the frontend shows.
+    return int(round(min(1.0, similarity / 0.5) * 100))
+
+
+def missing_terms(resume_text: str, job_text: str, limit: int = 5):
+    """Most frequent job-description words the resume never mentions."""
+    resume_tokens = set(tokenize(resume_text))
+    counts = Counter(t for t in tokenize(job_text) if len(t) > 2 and not t.isdigit() and t not in resume_tokens)
+    return [term for term, _ in counts.most_common(limit)]
@@ -0,0 +1,103 @@
+from sqlalchemy import DateTime, String, bindparam, inspect, text
+from sqlalchemy.orm import Session
+from datetime import datetime
+import json
+import logging
+
+from api.profile_store import save_analysis
+
+logger = logging.getLogger(__name__)
+
+
+# --- SCHEMA UPGRADES FOR EXISTING DATABASES ---
+# create_all() only creates missing tables; columns and indexes added to an
+# existing table need an explicit step here. Every step checks the live schema
+# first, so running this on each startup is safe (and a no-op on a fresh DB).
+
+def add_post_created_at(conn, inspector):
+    columns = {c["name"] for c in inspector.get_columns("posts")}
+    if "created_at" not in columns:
+        # DATETIME on SQLite, TIMESTAMP on Postgres
+        column_type = DateTime().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE posts ADD COLUMN created_at {column_type}"))
+        # Old posts get the migration time; the id tie-break keeps their order
+        # (bound as a DateTime so it is stored in the same format the ORM writes)
+        backfill = text("UPDATE posts SET created_at = :now WHERE created_at IS NULL")
+        conn.execute(backfill.bindparams(bindparam("now", type_=DateTime())), {"now": datetime.utcnow()})
+        logger.info("Migration: added posts.created_at")
+
+    indexes = {i["name"] for i in inspector.get_indexes("posts")}
+    if "ix_posts_user_id_created_at" not in indexes:
+        conn.execute(text("CREATE INDEX ix_posts_user_id_created_at ON posts (user_id, created_at)"))
+        logger.info("Migration: added ix_posts_user_id_created_at")
+
+
+def backfill_profile_analyses(conn, inspector):
+    # Legacy users.profile_summary blobs become version 1 of the user's "linkedin" analysis
+    rows = conn.execute(text(
+        "SELECT id, profile_summary FROM users "
+        "WHERE profile_summary IS NOT NULL AND profile_summary NOT IN ('', '{}') "
+        "AND id NOT IN (SELECT user_id FROM profile_analyses WHERE kind = 'linkedin')"
+    )).all()
+    if not rows:
+        return
+
+    session = Session(bind=conn)
+    migrated = 0
+    for user_id, blob in rows:
+        try:
+            data = json.loads(blob)
+        except ValueError:
+            continue
+        if isinstance(data, dict) and data:
+            save_analysis(session, user_id, "linkedin", data)
+            migrated += 1
+    session.close()
+    logger.info("Migration: moved profile_summary blobs into profile_analyses", extra={"rows": migrated})
+
+
+def add_task_worker(conn, inspector):
+    columns = {c["name"] for c in inspector.get_columns("analysis_tasks")}
+    if "worker" not in columns:
+        # Left NULL on old rows: nothing can still be running them
+        conn.execute(text(f"ALTER TABLE analysis_tasks ADD COLUMN worker {String().compile(dialect=conn.dialect)}"))
+        logger.info("Migration: added analysis_tasks.worker")
+
+
+def add_task_owner_key(conn, inspector):
+    columns = {c["name"] for c in inspector.get_columns("analysis_tasks")}
+    if "owner_key" not in columns:
+        # Old anonymous tasks stay NULL, so nobody can read them any more
+        conn.execute(text(f"ALTER TABLE analysis_tasks ADD COLUMN owner_key {String().compile(dialect=conn.dialect)}"))
+        logger.info("Migration: added analysis_tasks.owner_key")
+
+
+def add_job_query_pages(conn, inspector):
+    columns = {c["name"] for c in inspector.get_columns("job_queries")}
+    if "num_pages" not in columns:
+        # Old rows count as one page: a ranked (three-page) request refetches them once
+        conn.execute(text("ALTER TABLE job_queries ADD COLUMN num_pages INTEGER DEFAULT 1"))
+        logger.info("Migration: added job_queries.num_pages")
+
+
+MIGRATIONS = [
+    add_post_created_at,
+    backfill_profile_analyses,
+    add_task_worker,
+    add_task_owner_key,
+    add_job_query_pages,
+]
+
+
+def init_db(engine):
+    """Creates missing tables, then upgrades existing ones. Runs once, from the app lifespan."""
+    from api.database import Base
+    from api import models  # noqa: F401 (registers every table on Base.metadata)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn, inspect(conn))
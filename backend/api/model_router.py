@@ -0,0 +1,223 @@
+from collections import deque
+import asyncio
+import logging
+import time
+
+from api.config import (
+    GEMINI_MODELS, ROUTER_WINDOW, ROUTER_COOLDOWN_SECONDS, ROUTER_ERROR_RATE_MAX,
+    ROUTER_MIN_SAMPLES, ROUTER_HEDGE_PERCENTILE, ROUTER_HEDGE_DEFAULT_SECONDS,
+)
+from api.llm_cache import llm_cache
+from api.llm_gateway import llm_gateway, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+
+class ModelHealth:
+    """Rolling latency / error / 429 window for one model, plus its cooldown."""
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.outcomes = deque(maxlen=window)   # "ok" | "error" | "rate_limited" | "slow" (lost a hedge)
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.cooldown_until = 0.0
+        self.cooldowns = 0
+
+    @property
+    def in_cooldown(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def rate(self, outcome: str) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for o in self.outcomes if o == outcome) / len(self.outcomes)
+
+    def error_rate(self) -> float:
+        # Losing hedge races counts too, so a model that is always slow ends up benched
+        return self.rate("error") + self.rate("rate_limited") + self.rate("slow")
+
+    def record(self, outcome: str, seconds: float = None):
+        self.outcomes.append(outcome)
+        if outcome == "ok" and seconds is not None:
+            self.latencies.append(seconds)
+
+        # A 429 means the quota is gone for a while: bench the model right away
+        if outcome == "rate_limited" or (
+            len(self.outcomes) >= ROUTER_MIN_SAMPLES and self.error_rate() > ROUTER_ERROR_RATE_MAX
+        ):
+            self.cooldown_until = time.monotonic() + ROUTER_COOLDOWN_SECONDS
+            self.cooldowns += 1
+            # Start from a clean slate once the cooldown is over
+            self.outcomes.clear()
+
+    def latency_percentile(self, percentile: float):
+        if len(self.latencies) < ROUTER_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def hedge_delay(self) -> float:
+        observed = self.latency_percentile(ROUTER_HEDGE_PERCENTILE)
+        return observed if observed is not None else ROUTER_HEDGE_DEFAULT_SECONDS
+
+    def snapshot(self):
+        p50 = self.latency_percentile(0.5)
+        p90 = self.latency_percentile(0.9)
+        return {
+            "samples": len(self.outcomes),
+            "error_rate": round(self.rate("error"), 3),
+            "rate_limited_rate": round(self.rate("rate_limited"), 3),
+            "slow_rate": round(self.rate("slow"), 3),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p90_seconds": round(p90, 3) if p90 is not None else None,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+            "in_cooldown": self.in_cooldown,
+            "cooldown_remaining_seconds": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "cooldowns": self.cooldowns,
+        }
+
+
+class ModelRouter:
+    """
+    Picks the Gemini model for each call instead of walking a fixed list.
+    Models in cooldown go to the back of the line, and when a call runs past
+    its model's latency percentile a hedged request goes to the next model;
+    whichever answers first wins and the other one is cancelled.
+    """
+
+    def __init__(self, models, gateway, hedge_percentile: float):
+        self.models = list(models)
+        self.gateway = gateway
+        self.hedge_percentile = hedge_percentile
+        self.health = {name: ModelHealth(name, ROUTER_WINDOW) for name in self.models}
+
+        # Metrics
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.cache_hits = 0
+
+    def order(self):
+        """Healthy models in preference order, then benched ones (soonest back first) as a last resort."""
+        healthy = [m for m in self.models if not self.health[m].in_cooldown]
+        benched = sorted(
+            (m for m in self.models if self.health[m].in_cooldown),
+            key=lambda m: self.health[m].cooldown_until,
+        )
+        return healthy + benched
+
+    def record(self, model_name: str, error: Exception = None, seconds: float = None, slow: bool = False):
+        if model_name not in self.health:
+            self.health[model_name] = ModelHealth(model_name, ROUTER_WINDOW)
+        if slow:
+            self.health[model_name].record("slow")
+        elif error is None:
+            self.health[model_name].record("ok", seconds)
+        elif is_rate_limit_error(error):
+            self.health[model_name].record("rate_limited")
+        else:
+            self.health[model_name].record("error")
+
+    # --- CALLS ---
+    async def _attempt(self, model_name: str, prompt: str, max_retries, json_mode: bool = False):
+        started = time.monotonic()
+        try:
+            text = await self.gateway.generate(prompt, model_name, max_retries=max_retries, json_mode=json_mode)
+            if not text:
+                raise ValueError(f"Empty response from {model_name}")
+        except asyncio.CancelledError:
+            # Lost a hedge race: says nothing about the model's health
+            raise
+        except Exception as e:
+            self.record(model_name, error=e)
+            raise
+        self.record(model_name, seconds=time.monotonic() - started)
+        return text
+
+    def cached(self, prompt: str, json_mode: bool = False, accept=None):
+        """(text, model_name) from the LLM cache for any of our models, else None. One lookup; blocking."""
+        return llm_cache.lookup(self.models, prompt, json_mode, accept)
+
+    async def generate_with_model(self, prompt: str, cache: bool = False, fresh: bool = False,
+                                  max_retries: int = None, hedge: bool = True, json_mode: bool = False,
+                                  accept=None):
+        """
+        Returns (text, model_name). Every model but the last one tried gets no
+        429 retries (the next model is the retry); the last gets max_retries
+        (None = gateway default). Raises the last error if every model fails.
+        accept(text) -> bool gates the cache: answers it rejects (e.g. JSON that
+        fails its schema) are neither stored nor served from an older entry.
+        """
+        if cache and not fresh:
+            hit = await asyncio.to_thread(self.cached, prompt, json_mode, accept)
+            if hit is not None:
+                self.cache_hits += 1
+                return hit
+
+        self.calls += 1
+        remaining = self.order()
+        first_model = remaining[0]
+        attempts = {}  # task -> (model_name, started)
+        last_error = None
+
+        def launch():
+            model_name = remaining.pop(0)
+            retries = max_retries if not remaining else 0
+            task = asyncio.create_task(self._attempt(model_name, prompt, retries, json_mode))
+            attempts[task] = (model_name, time.monotonic())
+
+        launch()
+        try:
+            while attempts:
+                timeout = None
+                # Hedge only one call at a time, and never while the gateway is already queuing
+                if hedge and self.hedge_percentile > 0 and remaining and len(attempts) == 1 \
+                        and self.gateway.waiting == 0:
+                    (model_name, started), = attempts.values()
+                    timeout = max(0.0, self.health[model_name].hedge_delay() - (time.monotonic() - started))
+
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges += 1
+                    logger.info("Slow model, hedging", extra={"model": attempts[next(iter(attempts))][0], "hedge_to": remaining[0]})
+                    launch()
+                    continue
+
+                for task in done:
+                    model_name, _ = attempts.pop(task)
+                    if task.exception() is None:
+                        text = task.result()
+                        if model_name != first_model and attempts:
+                            self.hedge_wins += 1
+                        for loser, _ in attempts.values():
+                            self.record(loser, slow=True)
+                        if cache and (accept is None or accept(text)):
+                            await asyncio.to_thread(llm_cache.set, model_name, prompt, text, json_mode)
+                        return text, model_name
+                    last_error = task.exception()
+                    logger.warning("Model call failed", extra={"model": model_name, "error": str(last_error)})
+
+                if not attempts and remaining:
+                    launch()
+            raise last_error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def generate(self, prompt: str, cache: bool = False, fresh: bool = False,
+                       max_retries: int = None, hedge: bool = True, json_mode: bool = False, accept=None) -> str:
+        text, _ = await self.generate_with_model(prompt, cache, fresh, max_retries, hedge, json_mode, accept)
+        return text
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "order": self.order(),
+            "models": {name: health.snapshot() for name, health in self.health.items()},
+        }
+
+
+model_router = ModelRouter(GEMINI_MODELS, llm_gateway, ROUTER_HEDGE_PERCENTILE)
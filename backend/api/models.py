@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, Boolean
+from datetime import datetime
 from sqlalchemy.orm import relationship
 from api.database import Base
 
@@ -12,11 +13,13 @@ class User(Base):
     name = Column(String)
     pic_url = Column(String)
     
-    # JSON Data stored as a large text string
+    # Legacy JSON blob of the last LinkedIn analysis. No longer written:
+    # results live in profile_analyses (migrated there on startup)
     profile_summary = Column(Text, default="{}") 
     
     # Relationship to Posts (One User -> Many Posts)
-    posts = relationship("Post", back_populates="owner")
+    # Never loaded: touching user.posts raises, read history with the paginated list_posts() query
+    posts = relationship("Post", back_populates="owner", lazy="raise")
 
 class Post(Base):
     __tablename__ = "posts"
@@ -25,5 +28,118 @@ class Post(Base):
     content = Column(Text)
     # Foreign Key links this post to a specific user ID
     user_id = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
     
-    owner = relationship("User", back_populates="posts")
\ No newline at end of file
+    owner = relationship("User", back_populates="posts")
+    
+    # Post history is read per user, newest first (see list_posts in ai_agent.py)
+    __table_args__ = (Index("ix_posts_user_id_created_at", "user_id", "created_at"),)
+
+# --- JOB STORE (filled by /api/jobs/recommend fetches) ---
+class JobListing(Base):
+    __tablename__ = "job_listings"
+    
+    # JSearch job_id
+    id = Column(String, primary_key=True)
+    title = Column(String)
+    company = Column(String)
+    location = Column(String)
+    platform = Column(String)
+    link = Column(String)
+    description = Column(Text, default="")
+    fetched_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class JobQuery(Base):
+    __tablename__ = "job_queries"
+    
+    # Normalized skill string, e.g. "python"
+    query = Column(String, primary_key=True)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    # JSearch pages the results were fetched with (10 jobs a page)
+    num_pages = Column(Integer, default=1)
+    
+    results = relationship("JobQueryResult", order_by="JobQueryResult.position", cascade="all, delete-orphan")
+
+class JobQueryResult(Base):
+    __tablename__ = "job_query_results"
+    
+    query = Column(String, ForeignKey("job_queries.query"), primary_key=True)
+    job_id = Column(String, ForeignKey("job_listings.id"), primary_key=True)
+    # Order JSearch returned the job in
+    position = Column(Integer)
+    
+    job = relationship("JobListing")
+
+class JobKeyword(Base):
+    """Inverted index: one row per (keyword, job) over title/company/location."""
+    __tablename__ = "job_keywords"
+    
+    keyword = Column(String, primary_key=True)
+    job_id = Column(String, ForeignKey("job_listings.id"), primary_key=True, index=True)
+
+
+# --- BACKGROUND ANALYSIS TASKS (see api/tasks.py) ---
+class AnalysisTask(Base):
+    __tablename__ = "analysis_tasks"
+    
+    id = Column(String, primary_key=True)
+    # Pipeline name, e.g. "resume", "linkedin", "scrape-url"
+    kind = Column(String, index=True)
+    # queued -> running -> done / failed
+    status = Column(String, default="queued", index=True)
+    progress = Column(Integer, default=0)
+    stage = Column(String, default="queued")
+    # JSON result (or error message) once finished
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # sha256 of the key an anonymous submitter reads the task with (logged-in owners go by user_id)
+    owner_key = Column(String, nullable=True)
+    # "host:pid" of the worker process holding the payload (only it can run the task)
+    worker = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# --- PROFILE ANALYSES (one row per analysis run, see api/profile_store.py) ---
+class ProfileAnalysis(Base):
+    __tablename__ = "profile_analyses"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # "linkedin" (PDF export or scraped URL), "resume", "profile-pdf"
+    kind = Column(String, nullable=False)
+    # 1, 2, 3... per (user, kind); only the newest run has is_latest set
+    version = Column(Integer, nullable=False)
+    is_latest = Column(Boolean, default=True, nullable=False)
+    # summary_rating / ats_score / score, whichever the analysis returns
+    score = Column(Integer, nullable=True)
+    years_experience = Column(Integer, nullable=True)
+    headline = Column(String, nullable=True)
+    connections_count = Column(Integer, nullable=True)
+    # JSON list of tips (display only, never queried)
+    feedback = Column(Text, default="[]")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    skills = relationship("AnalysisSkill", cascade="all, delete-orphan", order_by="AnalysisSkill.position")
+    
+    __table_args__ = (
+        # Dashboard: a user's latest runs / history of one kind
+        Index("ix_profile_analyses_user_kind_version", "user_id", "kind", "version", unique=True),
+        # Analytics over everyone's latest run, answered from the index alone
+        Index("ix_profile_analyses_latest_kind_score", "is_latest", "kind", "score"),
+    )
+
+class AnalysisSkill(Base):
+    __tablename__ = "analysis_skills"
+    
+    analysis_id = Column(Integer, ForeignKey("profile_analyses.id"), primary_key=True)
+    # Normalized (lowercase) skill name, e.g. "python"
+    skill = Column(String, primary_key=True)
+    # As the analysis spelled it, e.g. "Python"
+    name = Column(String)
+    # True for skills the analysis flagged as missing
+    missing = Column(Boolean, default=False, nullable=False)
+    position = Column(Integer, default=0)
+    
+    __table_args__ = (Index("ix_analysis_skills_skill", "skill", "missing", "analysis_id"),)
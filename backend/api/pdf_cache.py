@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from api.config import (
+    PDF_CACHE_DIR, PDF_CACHE_MAX_ITEMS, PDF_CACHE_DISK_MAX_AGE_SECONDS, PDF_CACHE_DISK_MAX_BYTES, WEB_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# --- HELPER: CONTENT HASH ---
+def file_hash(content: bytes) -> str:
+    """Cache key for an upload: the same PDF bytes always give the same key."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class PdfTextCache:
+    """
+    Two-level cache of extracted PDF text keyed on the file hash.
+    The most recent entries are kept in an in-memory LRU; entries pushed
+    out of it are written to disk so a repeated upload never hits pypdf.
+    With write_through (several worker processes) every new entry goes to
+    disk right away, so the other workers find it there. Files older than
+    disk_max_age are ignored and deleted; once the folder passes
+    disk_max_bytes the oldest files are deleted first.
+    """
+
+    SWEEP_EVERY = 50  # disk writes between eviction sweeps
+
+    def __init__(self, max_items: int, cache_dir: str, write_through: bool = False,
+                 disk_max_age: float = PDF_CACHE_DISK_MAX_AGE_SECONDS, disk_max_bytes: int = PDF_CACHE_DISK_MAX_BYTES):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.write_through = write_through
+        self.disk_max_age = disk_max_age
+        self.disk_max_bytes = disk_max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.disk_evictions = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def _write_disk(self, key: str, text: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._disk_writes += 1
+            sweep = self._disk_writes % self.SWEEP_EVERY == 0
+        if sweep:
+            self.sweep_disk()
+
+    def _read_disk(self, key: str):
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_max_age:
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return  # another worker got there first
+        with self._lock:
+            self.disk_evictions += 1
+
+    def sweep_disk(self):
+        """Deletes expired files, then the oldest ones until the folder fits disk_max_bytes. Blocking."""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith(".txt")]
+        except FileNotFoundError:
+            return
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        cutoff = time.time() - self.disk_max_age
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime > cutoff and total <= self.disk_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+
+        text = self._read_disk(key)
+        if text is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self.put(key, text, on_disk=True)
+        return text
+
+    def put(self, key: str, text: str, on_disk: bool = False):
+        evicted = []
+        with self._lock:
+            self._items[key] = text
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                evicted.append(self._items.popitem(last=False))
+
+        # Written through: evicted entries are already on disk
+        if self.write_through:
+            evicted = [] if on_disk else [(key, text)]
+        # Evicted entries go to disk outside the lock (file IO is slow)
+        for old_key, old_text in evicted:
+            try:
+                self._write_disk(old_key, old_text)
+            except OSError as e:
+                logger.warning("PDF cache spill failed", extra={"error": str(e)})
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "memory_items": len(self._items),
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_evictions": self.disk_evictions,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+pdf_cache = PdfTextCache(PDF_CACHE_MAX_ITEMS, PDF_CACHE_DIR, write_through=WEB_CONCURRENCY > 1)
+
@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import io
+import logging
+import mmap
+import multiprocessing
+
+from api.config import PDF_WORKERS, PDF_PAGES_PER_CHUNK, PDF_EXTRACT_TIMEOUT
+from api.pdf_cache import file_hash, pdf_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PdfExtractionTimeout(Exception):
+    pass
+
+
+# --- WORKER FUNCTIONS (run inside the pool processes) ---
+def _extract_page_range(source, start: int, end: int):
+    """
+    Returns (total_page_count, text of pages[start:end]). `source` is the PDF
+    bytes, or the path of a spooled upload (api/uploads.py), which is
+    memory-mapped so each worker pages in only what pypdf reads.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _read_pages(mapped, start, end)
+    return _read_pages(io.BytesIO(source), start, end)
+
+
+def _read_pages(stream, start: int, end: int):
+    # Imported here: only the pool workers parse PDFs, so the server process never loads pypdf
+    from pypdf import PdfReader
+    reader = PdfReader(stream)
+    pages = reader.pages
+    # Form feed after each page so repeated headers/footers can be found later (api/resume_text.py)
+    text = "".join([(pages[i].extract_text() or "") + "\f" for i in range(start, min(end, len(pages)))])
+    return len(pages), text
+
+
+class PdfExtractionService:
+    """
+    Async front-end over a process pool. Routes await extract_text();
+    the first chunk of pages tells us the page count, and the rest of a
+    large document is split by page range across the remaining workers.
+    """
+
+    def __init__(self, max_workers: int, pages_per_chunk: int, timeout: float):
+        self.max_workers = max_workers
+        self.pages_per_chunk = pages_per_chunk
+        self.timeout = timeout
+        self._pool = None
+
+    def start(self):
+        if self._pool is None:
+            # "spawn" keeps forked copies of the server's threads out of the workers
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self, kill: bool = False, only=None):
+        """Stops the pool. With only=, does nothing if that pool was already replaced."""
+        if only is not None and self._pool is not only:
+            return
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        if kill:
+            # A stuck parse never returns, so its worker has to be terminated
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=not kill, cancel_futures=True)
+
+    async def _run_chunks(self, pool, source) -> str:
+        loop = asyncio.get_running_loop()
+        size = self.pages_per_chunk
+
+        page_count, first_text = await loop.run_in_executor(pool, _extract_page_range, source, 0, size)
+        if page_count <= size:
+            return first_text
+
+        rest = [
+            loop.run_in_executor(pool, _extract_page_range, source, start, start + size)
+            for start in range(size, page_count, size)
+        ]
+        results = await asyncio.gather(*rest)
+        return first_text + "".join([text for _, text in results])
+
+    async def extract_text(self, content) -> str:
+        """
+        `content` is the PDF bytes or an api.uploads.Upload. A spooled Upload
+        reaches the workers as its temp file path, not pickled bytes per chunk.
+        """
+        if isinstance(content, (bytes, bytearray)):
+            key, source = file_hash(content), content
+        else:
+            key, source = content.sha256, content.source
+        cached = await asyncio.to_thread(pdf_cache.get, key)
+        if cached is not None:
+            return cached
+
+        for attempt in range(2):
+            pool = self.start()
+            try:
+                text = await asyncio.wait_for(self._run_chunks(pool, source), timeout=self.timeout)
+                break
+            except asyncio.TimeoutError:
+                logger.warning("PDF extraction timed out, recycling worker pool", extra={"timeout_s": self.timeout})
+                self.shutdown(kill=True, only=pool)
+                raise PdfExtractionTimeout(f"PDF took longer than {self.timeout}s to parse.")
+            except BrokenProcessPool:
+                # Another request's timeout recycled the pool under us; retry once on a fresh one
+                self.shutdown(kill=True, only=pool)
+                if attempt == 1:
+                    raise
+
+        await asyncio.to_thread(pdf_cache.put, key, text)
+        return text
+
+
+pdf_service = PdfExtractionService(PDF_WORKERS, PDF_PAGES_PER_CHUNK, PDF_EXTRACT_TIMEOUT)
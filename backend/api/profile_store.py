@@ -0,0 +1,200 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased, joinedload
+import json
+import re
+
+from api.models import ProfileAnalysis, AnalysisSkill, User
+from api.skills import skill_index
+
+# Analysis kinds whose output includes a skills list
+SKILL_KINDS = ["resume", "profile-pdf"]
+
+
+# --- HELPER: COERCE LLM OUTPUT INTO COLUMNS ---
+def to_int(value):
+    """5 -> 5, "5+" -> 5, "500+ connections" -> 500, "--" / None -> None."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"\d+", str(value).replace(",", ""))
+    return int(match.group(0)) if match else None
+
+
+def skill_label(name) -> str:
+    """Taxonomy name for known skills ("reactjs" -> "React"), otherwise the name as given."""
+    return skill_index.canonical(name) or str(name)
+
+
+def normalize_skill(name) -> str:
+    return " ".join(skill_label(name).lower().split())
+
+
+def first_present(data: dict, *keys):
+    for key in keys:
+        if data.get(key) not in (None, ""):
+            return data[key]
+    return None
+
+
+def as_list(value):
+    if isinstance(value, list):
+        return [v for v in value if v not in (None, "")]
+    if isinstance(value, str) and value.strip():
+        return [value]
+    return []
+
+
+# --- WRITE ---
+def save_analysis(db: Session, user_id: int, kind: str, data: dict) -> ProfileAnalysis:
+    """
+    Adds the next version of (user, kind) and clears is_latest on the previous
+    one. Flushes but does not commit; the caller owns the transaction.
+    """
+    previous = db.execute(
+        select(func.max(ProfileAnalysis.version))
+        .where(ProfileAnalysis.user_id == user_id, ProfileAnalysis.kind == kind)
+    ).scalar()
+    if previous:
+        db.execute(
+            update(ProfileAnalysis)
+            .where(ProfileAnalysis.user_id == user_id, ProfileAnalysis.kind == kind, ProfileAnalysis.is_latest)
+            .values(is_latest=False)
+        )
+
+    analysis = ProfileAnalysis(
+        user_id=user_id,
+        kind=kind,
+        version=(previous or 0) + 1,
+        is_latest=True,
+        score=to_int(first_present(data, "summary_rating", "ats_score", "score")),
+        years_experience=to_int(data.get("years_experience")),
+        headline=first_present(data, "top_experience"),
+        connections_count=to_int(data.get("connections_count")),
+        feedback=json.dumps(as_list(first_present(data, "feedback_list", "feedback"))),
+    )
+
+    skills = {}
+    for missing, key_names in ((False, ("top_skills", "skills")), (True, ("missing_keywords", "missing_skills"))):
+        for name in as_list(first_present(data, *key_names)):
+            skill = normalize_skill(name)
+            # A skill that is both listed and "missing" counts as present
+            if skill and skill not in skills:
+                skills[skill] = AnalysisSkill(skill=skill, name=skill_label(name), missing=missing, position=len(skills))
+    analysis.skills = list(skills.values())
+
+    db.add(analysis)
+    db.flush()
+    return analysis
+
+
+# --- READ: ONE USER ---
+def latest_analyses(db: Session, user_id: int):
+    """{kind: ProfileAnalysis} for the user's newest run of each kind, skills included, in one query."""
+    rows = db.execute(
+        select(ProfileAnalysis)
+        .where(ProfileAnalysis.user_id == user_id, ProfileAnalysis.is_latest)
+        .options(joinedload(ProfileAnalysis.skills))
+    ).unique().scalars().all()
+    return {row.kind: row for row in rows}
+
+
+def analysis_history(db: Session, user_id: int, kind: str, limit: int = 20):
+    return db.execute(
+        select(ProfileAnalysis)
+        .where(ProfileAnalysis.user_id == user_id, ProfileAnalysis.kind == kind)
+        .order_by(ProfileAnalysis.version.desc())
+        .limit(limit)
+        .options(joinedload(ProfileAnalysis.skills))
+    ).unique().scalars().all()
+
+
+def analysis_to_dict(analysis: ProfileAnalysis):
+    return {
+        "kind": analysis.kind,
+        "version": analysis.version,
+        "score": analysis.score,
+        "years_experience": analysis.years_experience,
+        "headline": analysis.headline,
+        "connections_count": analysis.connections_count,
+        "feedback_list": json.loads(analysis.feedback or "[]"),
+        "skills": [s.name for s in analysis.skills if not s.missing],
+        "missing_skills": [s.name for s in analysis.skills if s.missing],
+        "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
+    }
+
+
+def linkedin_stats(analysis: ProfileAnalysis):
+    """The dashboard's old profile_summary shape, built from the typed columns."""
+    return {
+        "top_experience": analysis.headline,
+        "years_experience": analysis.years_experience,
+        "connections_count": analysis.connections_count,
+        "summary_rating": analysis.score,
+        "feedback_list": json.loads(analysis.feedback or "[]"),
+        "version": analysis.version,
+        "analyzed_at": analysis.created_at.isoformat() if analysis.created_at else None,
+    }
+
+
+# --- READ: ANALYTICS ACROSS USERS (latest run per user only) ---
+def score_summary(db: Session):
+    """Per kind: how many users, average / min / max score. Covered by ix_profile_analyses_latest_kind_score."""
+    rows = db.execute(
+        select(
+            ProfileAnalysis.kind,
+            func.count(),
+            func.avg(ProfileAnalysis.score),
+            func.min(ProfileAnalysis.score),
+            func.max(ProfileAnalysis.score),
+        )
+        .where(ProfileAnalysis.is_latest)
+        .group_by(ProfileAnalysis.kind)
+    ).all()
+    return {
+        kind: {
+            "users": count,
+            "avg_score": round(avg, 1) if avg is not None else None,
+            "min_score": low,
+            "max_score": high,
+        }
+        for kind, count, avg, low, high in rows
+    }
+
+
+def top_skills(db: Session, limit: int = 20, missing: bool = False):
+    """Most common skills (or most common gaps) across users' latest analyses."""
+    rows = db.execute(
+        select(AnalysisSkill.skill, func.count().label("users"))
+        .join(ProfileAnalysis, ProfileAnalysis.id == AnalysisSkill.analysis_id)
+        .where(AnalysisSkill.missing == missing, ProfileAnalysis.is_latest)
+        .group_by(AnalysisSkill.skill)
+        .order_by(func.count().desc(), AnalysisSkill.skill)
+        .limit(limit)
+    ).all()
+    return [{"skill": skill, "users": users} for skill, users in rows]
+
+
+def users_missing_skill(db: Session, skill: str, limit: int = 100):
+    """Users with a resume / profile analysis where none of their latest runs lists the skill."""
+    latest = aliased(ProfileAnalysis)
+    has_skill = (
+        select(AnalysisSkill.analysis_id)
+        .join(latest, latest.id == AnalysisSkill.analysis_id)
+        .where(
+            latest.user_id == User.id,
+            latest.is_latest,
+            AnalysisSkill.skill == normalize_skill(skill),
+            AnalysisSkill.missing.is_(False),
+        )
+        .exists()
+    )
+    rows = db.execute(
+        select(User.id, User.name)
+        .join(ProfileAnalysis, ProfileAnalysis.user_id == User.id)
+        .where(ProfileAnalysis.is_latest, ProfileAnalysis.kind.in_(SKILL_KINDS), ~has_skill)
+        .distinct()
+        .order_by(User.id)
+        .limit(limit)
+    ).all()
+    return [{"user_id": user_id, "name": name} for user_id, name in rows]
@@ -0,0 +1,177 @@
+from collections import Counter
+import math
+import re
+
+# Gemini's rule of thumb for English text; good enough to size a prompt without a count_tokens round trip
+CHARS_PER_TOKEN = 4
+
+# pdf_service joins pages with a form feed
+PAGE_BREAK = "\f"
+
+# Canonical section -> headings that introduce it (resumes and LinkedIn PDF exports)
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "about", "about me", "objective", "career objective"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "career history", "relevant experience"),
+    "skills": ("skills", "top skills", "technical skills", "core skills", "key skills", "skills & tools",
+               "technologies", "tech stack", "core competencies", "competencies", "tools"),
+    "education": ("education", "academic background", "qualifications", "education and training"),
+    "projects": ("projects", "personal projects", "key projects", "selected projects"),
+    "certifications": ("certifications", "certificates", "licenses & certifications", "licenses and certifications",
+                       "courses", "training"),
+    "achievements": ("achievements", "awards", "honors", "honors-awards", "accomplishments", "publications"),
+    "languages": ("languages",),
+    "contact": ("contact", "contact information", "contact details"),
+    "interests": ("interests", "hobbies", "volunteering", "volunteer experience"),
+}
+HEADING_TO_SECTION = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Which sections each prompt needs most; "header" is the name/headline block before the first heading
+RESUME_PRIORITY = ("header", "summary", "experience", "skills", "education", "projects", "certifications", "achievements")
+SKILLS_PRIORITY = ("skills", "experience", "summary", "projects", "header", "certifications", "education")
+PROFILE_PRIORITY = ("header", "summary", "experience", "skills", "education", "certifications", "languages")
+
+PAGE_FOOTER_RE = re.compile(r"^\s*(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*(of|/)\s*\d+|-\s*\d+\s*-)\s*$", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# --- 1. BOILERPLATE: page footers + repeats of lines found at the edges of most pages ---
+def strip_boilerplate(text: str) -> str:
+    pages = [page.splitlines() for page in text.split(PAGE_BREAK)]
+    repeated = set()
+    if len(pages) > 1:
+        # Headers/footers sit in the first or last few lines of a page
+        edges = Counter(
+            line.strip().lower()
+            for lines in pages
+            for line in set(lines[:3] + lines[-3:]) if line.strip()
+        )
+        threshold = max(2, math.ceil(len(pages) / 2))
+        repeated = {line for line, count in edges.items() if count >= threshold and len(line) <= 120}
+
+    kept = []
+    seen = set()
+    for lines in pages:
+        for line in lines:
+            key = line.strip().lower()
+            # The first copy of a running header is usually the name / title block itself
+            if key in seen or PAGE_FOOTER_RE.match(line):
+                continue
+            if key in repeated:
+                seen.add(key)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+# --- 2. WHITESPACE: one space between words, one blank line max, no stuttered lines ---
+def normalize_whitespace(text: str) -> str:
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t\u00a0]+", " ", line).strip()
+        if line and lines and line == lines[-1]:
+            continue   # the same line twice in a row (overlapping text layers)
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+# --- 3. SECTIONS ---
+def section_for(line: str):
+    """The canonical section a heading line starts, or None for body text."""
+    words = line.strip().rstrip(":").strip()
+    if not words or len(words) > 40:
+        return None
+    return HEADING_TO_SECTION.get(re.sub(r"\s+", " ", words.lower()))
+
+
+def split_sections(text: str):
+    """[(section, heading, body)] in document order; text before the first heading is "header"."""
+    sections = []
+    name, heading, body = "header", "", []
+    for line in text.splitlines():
+        found = section_for(line)
+        if found:
+            if heading or any(body):
+                sections.append((name, heading, "\n".join(body).strip()))
+            name, heading, body = found, line.strip(), []
+        else:
+            body.append(line)
+    if heading or any(body):
+        sections.append((name, heading, "\n".join(body).strip()))
+    return sections
+
+
+def cut(text: str, max_chars: int) -> str:
+    """Longest prefix under max_chars, ending at a line (else word) boundary."""
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    for sep in ("\n", " "):
+        at = head.rfind(sep)
+        if at > max_chars // 2:
+            return head[:at].rstrip()
+    return head
+
+
+# --- 4. PACKING ---
+def pack_sections(sections, max_tokens: int, priority):
+    """
+    Fits sections into max_tokens. Every wanted section first gets a fair
+    share of the budget (so a long experience section can't starve skills),
+    then what the short ones leave is handed out in priority order. Sections
+    not named in `priority` only get budget that is left over after that.
+    Output keeps document order and headings.
+    """
+    # The blank lines between sections spend budget too
+    budget = max_tokens * CHARS_PER_TOKEN - 2 * len(sections)
+    rank = {name: i for i, name in enumerate(priority)}
+    full = [f"{heading}\n{body}".strip() for _, heading, body in sections]
+    order = sorted(range(len(sections)), key=lambda i: (rank.get(sections[i][0], len(priority)), i))
+    wanted = [i for i in order if sections[i][0] in rank]
+
+    allowance = [0] * len(sections)
+    remaining = budget
+    # Max-min fair split among the wanted sections
+    pending = sorted(wanted, key=lambda i: len(full[i]))
+    while pending and remaining > 0:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        allowance[i] = min(len(full[i]), share)
+        remaining -= allowance[i]
+    # Leftovers in priority order (unwanted sections last)
+    for i in order:
+        extra = min(len(full[i]) - allowance[i], remaining)
+        if extra > 0:
+            allowance[i] += extra
+            remaining -= extra
+
+    parts = []
+    for i, text in enumerate(full):
+        # A heading with no room for its body is left out
+        if allowance[i] > len(sections[i][1]) + 1:
+            parts.append(cut(text, allowance[i]))
+    return "\n\n".join(parts)
+
+
+def prepare_text(text: str, max_tokens: int, priority=RESUME_PRIORITY) -> str:
+    """
+    Resume / profile text for a prompt: boilerplate and repeated whitespace
+    removed, then the most relevant sections packed into max_tokens.
+    Text without recognisable headings is just cut at the budget.
+    """
+    clean = normalize_whitespace(strip_boilerplate(text or ""))
+    if estimate_tokens(clean) <= max_tokens:
+        return clean
+    sections = split_sections(clean)
+    if len(sections) < 2:
+        return cut(clean, max_tokens * CHARS_PER_TOKEN)
+    return pack_sections(sections, max_tokens, priority)
+
+
+def prepare_plain(text: str, max_tokens: int) -> str:
+    """Whitespace-normalized text cut to max_tokens (job descriptions, scraped blurbs)."""
+    return cut(normalize_whitespace(text or ""), max_tokens * CHARS_PER_TOKEN)
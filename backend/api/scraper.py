@@ -1,57 +1,256 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import time
-import os
-
-def scrape_linkedin_profile(target_url: str):
-    email = os.getenv("SCRAPER_EMAIL")
-    password = os.getenv("SCRAPER_PASSWORD")
-    
-    # If no credentials, return mock data to prevent crash
-    if not email or not password:
-        print("Scraper Error: Missing SCRAPER_EMAIL or SCRAPER_PASSWORD in .env")
-        return None
-
-    options = webdriver.ChromeOptions()
-    # options.add_argument("--headless") # Keep browser visible to debug login
-    
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-
-    try:
-        driver.get("https://www.linkedin.com/login")
-        time.sleep(3)
-        driver.find_element(By.ID, "username").send_keys(email)
-        driver.find_element(By.ID, "password").send_keys(password)
-        driver.find_element(By.ID, "password").send_keys(Keys.RETURN)
-        time.sleep(15) # Wait long for manual captcha if needed
-
-        driver.get(target_url)
-        time.sleep(5)
-        
-        # Scroll to load data
+# Selenium, webdriver_manager and BeautifulSoup are imported where they are used:
+# together they add ~0.25s to every app start, and most processes never scrape.
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import asyncio
+import logging
+import queue
+import re
+import threading
+
+from api.config import (
+    SCRAPER_EMAIL, SCRAPER_PASSWORD, SCRAPER_POOL_SIZE, SCRAPER_HEADLESS,
+    SCRAPER_LOGIN_TIMEOUT, SCRAPER_PAGE_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+LINKEDIN_HOME = "https://www.linkedin.com/"
+LINKEDIN_LOGIN = "https://www.linkedin.com/login"
+
+
+# --- HELPER: PARSE PROFILE PAGE (pure, testable against saved HTML fixtures) ---
+def parse_profile_html(html: str):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Simple Extraction
+    name_tag = soup.find('h1', {'class': 'text-heading-xlarge'})
+    name = name_tag.get_text().strip() if name_tag else "Unknown User"
+
+    about_tag = soup.find('div', {'class': 'display-flex ph5 pv3'})
+    about = about_tag.get_text().strip() if about_tag else ""
+
+    return {
+        "raw_text": f"Name: {name}\nAbout: {about}",
+        "name": name
+    }
+
+
+# --- HELPER: WHICH URLS THE SERVER'S CHROME MAY OPEN ---
+# Only public LinkedIn profile pages. Anything else (file://, localhost,
+# internal hosts) would let a client read server files or reach the internal
+# network through the browser.
+PROFILE_PATH_RE = re.compile(r"^/in/[A-Za-z0-9%_-]{1,100}/?$")
+
+
+def profile_url(url: str) -> str:
+    """Canonical https://www.linkedin.com/in/<slug>/ for a profile URL; ValueError for anything else."""
+    parsed = urlparse(str(url).strip())
+    if (parsed.scheme != "https" or parsed.netloc.lower() != "www.linkedin.com"
+            or not PROFILE_PATH_RE.match(parsed.path)):
+        raise ValueError("Only https://www.linkedin.com/in/... profile URLs can be scraped.")
+    return f"https://www.linkedin.com{parsed.path.rstrip('/')}/"
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.logged_in = False
+
+
+class ScraperPool:
+    """
+    Pool of warm headless Chrome drivers. A driver is logged in once; its
+    cookies are shared so the other drivers skip the login form. All methods
+    block, so async code runs scrape() on the pool's own executor (one thread
+    per driver, see start()) through loop.run_in_executor.
+    """
+
+    def __init__(self, size: int, headless: bool):
+        self.size = size
+        self.headless = headless
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._driver_path = None
+        self._cookies = []
+        self._executor = None
+
+    # --- DRIVER LIFECYCLE ---
+    def _start_chrome(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+        with self._lock:
+            if self._driver_path is None:
+                # Resolve the chromedriver binary once, not on every scrape
+                self._driver_path = ChromeDriverManager().install()
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--window-size=1280,2000")
+        return webdriver.Chrome(service=Service(self._driver_path), options=options)
+
+    def _new_driver(self):
+        driver = self._start_chrome()
+        # A page that never finishes loading raises instead of holding the driver forever
+        driver.set_page_load_timeout(SCRAPER_PAGE_TIMEOUT)
+        return _PooledDriver(driver)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._new_driver()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def _release(self, pooled, broken: bool = False):
+        from selenium.common.exceptions import WebDriverException
+        if broken:
+            try:
+                pooled.driver.quit()
+            except WebDriverException:
+                pass
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(pooled)
+
+    def start(self):
+        """The executor scrapes run on: queued scrapes wait here instead of tying up the default one."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="scraper")
+            return self._executor
+
+    def shutdown(self):
+        # Drop queued scrapes and let running ones hand their drivers back before quitting them
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._release(pooled, broken=True)
+
+    # --- SESSION ---
+    def _login(self, pooled):
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        driver = pooled.driver
+        if self._cookies:
+            driver.get(LINKEDIN_HOME)
+            for cookie in self._cookies:
+                try:
+                    driver.add_cookie(cookie)
+                except WebDriverException:
+                    pass
+            pooled.logged_in = True
+            return
+
+        if not SCRAPER_EMAIL or not SCRAPER_PASSWORD:
+            raise RuntimeError("Missing SCRAPER_EMAIL or SCRAPER_PASSWORD in .env")
+
+        driver.get(LINKEDIN_LOGIN)
+        wait = WebDriverWait(driver, SCRAPER_PAGE_TIMEOUT)
+        wait.until(EC.presence_of_element_located((By.ID, "username"))).send_keys(SCRAPER_EMAIL)
+        password = driver.find_element(By.ID, "password")
+        password.send_keys(SCRAPER_PASSWORD)
+        password.send_keys(Keys.RETURN)
+
+        # Leaves the login page once authenticated (or once a captcha is solved by hand)
+        WebDriverWait(driver, SCRAPER_LOGIN_TIMEOUT).until(
+            lambda d: "/login" not in d.current_url and "/checkpoint" not in d.current_url
+        )
+        self._cookies = driver.get_cookies()
+        pooled.logged_in = True
+
+    def _load_profile(self, pooled, url: str):
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        driver = pooled.driver
+        driver.get(url)
+        if "/authwall" in driver.current_url or "/login" in driver.current_url:
+            # Shared cookies expired: log in for real once, then retry
+            self._cookies = []
+            pooled.logged_in = False
+            self._login(pooled)
+            driver.get(url)
+
+        try:
+            WebDriverWait(driver, SCRAPER_PAGE_TIMEOUT).until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
+        except TimeoutException:
+            logger.warning("No profile header after timeout", extra={"url": url, "timeout_s": SCRAPER_PAGE_TIMEOUT})
+
+        # Scroll to trigger lazy sections, then wait for the page to settle
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-        time.sleep(2)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        
-        # Simple Extraction
-        name_tag = soup.find('h1', {'class': 'text-heading-xlarge'})
-        name = name_tag.get_text().strip() if name_tag else "Unknown User"
-        
-        about_tag = soup.find('div', {'class': 'display-flex ph5 pv3'})
-        about = about_tag.get_text().strip() if about_tag else ""
-
-        return {
-            "raw_text": f"Name: {name}\nAbout: {about}",
-            "name": name
-        }
-
-    except Exception as e:
-        print(f"Scraping Error: {e}")
-        return None
-    finally:
-        driver.quit()
\ No newline at end of file
+        WebDriverWait(driver, SCRAPER_PAGE_TIMEOUT).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        return driver.page_source
+
+    # --- PUBLIC ---
+    def scrape(self, url: str):
+        """Returns parse_profile_html() output for the URL, or None on failure."""
+        try:
+            url = profile_url(url)
+        except ValueError:
+            logger.warning("Refusing to scrape a non-profile URL", extra={"url": url})
+            return None
+        if not self._cookies and (not SCRAPER_EMAIL or not SCRAPER_PASSWORD):
+            # No credentials: don't even start Chrome
+            logger.error("Missing SCRAPER_EMAIL or SCRAPER_PASSWORD in .env")
+            return None
+
+        from selenium.common.exceptions import WebDriverException
+        pooled = self._acquire()
+        broken = False
+        try:
+            if not pooled.logged_in:
+                self._login(pooled)
+            return parse_profile_html(self._load_profile(pooled, url))
+        except WebDriverException as e:
+            logger.warning("Scraping failed, recycling driver", extra={"url": url, "error": str(e)})
+            broken = True
+            return None
+        except Exception:
+            logger.exception("Scraping failed", extra={"url": url})
+            return None
+        finally:
+            self._release(pooled, broken=broken)
+
+
+scraper_pool = ScraperPool(SCRAPER_POOL_SIZE, SCRAPER_HEADLESS)
+
+
+# --- ASYNC ENTRY POINTS (browser work runs in worker threads, off the event loop) ---
+async def scrape_linkedin_profile(target_url: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(scraper_pool.start(), scraper_pool.scrape, target_url)
+
+
+async def scrape_linkedin_profiles(target_urls):
+    """Bulk scrape: URLs are spread over the warm drivers; results keep the input order."""
+    return await asyncio.gather(*[scrape_linkedin_profile(url) for url in target_urls])
@@ -0,0 +1,53 @@
+from fastapi import Depends, HTTPException, Request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy.orm import Session
+
+from api.config import SESSION_SECRET, SESSION_MAX_AGE_SECONDS, SESSION_COOKIE
+from api.database import get_db
+from api.models import User
+
+serializer = URLSafeTimedSerializer(SESSION_SECRET, salt="linkbrand-session")
+
+
+def issue_session_token(user_id: int) -> str:
+    return serializer.dumps({"uid": user_id})
+
+
+def read_session_token(request: Request):
+    """Session token from `Authorization: Bearer ...` or the session cookie, else None."""
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        return header[7:].strip() or None
+    return request.cookies.get(SESSION_COOKIE)
+
+
+def user_id_from_token(token: str) -> int:
+    try:
+        data = serializer.loads(token, max_age=SESSION_MAX_AGE_SECONDS)
+    except SignatureExpired:
+        raise HTTPException(status_code=401, detail="Session expired. Log in again.")
+    except BadSignature:
+        raise HTTPException(status_code=401, detail="Invalid session.")
+    return data["uid"]
+
+
+# --- DEPENDENCIES ---
+def get_optional_user_id(request: Request):
+    """
+    Id of the logged-in user, or None for anonymous requests (results are
+    returned but not saved). A bad or expired token is still a 401.
+    """
+    token = read_session_token(request)
+    if not token:
+        return None
+    return user_id_from_token(token)
+
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+    token = read_session_token(request)
+    if not token:
+        raise HTTPException(status_code=401, detail="Not logged in.")
+    user = db.get(User, user_id_from_token(token))
+    if not user:
+        raise HTTPException(status_code=401, detail="Unknown user. Log in again.")
+    return user
@@ -0,0 +1,92 @@
+from fastapi import HTTPException
+import asyncio
+import copy
+import logging
+
+from api.config import SINGLE_FLIGHT_MAX_WAITERS
+from api.instrumentation import SINGLE_FLIGHT_CALLS
+
+logger = logging.getLogger(__name__)
+
+
+class _LeaderCancelled(Exception):
+    """The caller doing the work went away (client disconnect); a waiter takes over."""
+
+
+class _Flight:
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: the first caller for a key runs the
+    work, concurrent callers with the same key await its result instead of
+    starting their own (double-clicks, frontend retries).
+
+    The work runs inline in the first caller's request, so it keeps using
+    that request's DB session. Waiters get a deep copy of the result (the
+    caller may mutate its dict) or the same exception. If the first caller is
+    cancelled, one waiter re-runs the work. At most max_waiters callers wait
+    per key; more than that get a 429 instead of queueing without bound.
+    """
+
+    def __init__(self, max_waiters: int):
+        self.max_waiters = max_waiters
+        self._flights = {}
+
+    async def do(self, name: str, key, fn):
+        """await fn() once per (name, key) at a time. `name` also labels the metrics."""
+        flight_key = (name, key)
+        while True:
+            flight = self._flights.get(flight_key)
+            if flight is None:
+                return await self._lead(name, flight_key, fn)
+
+            if flight.waiters >= self.max_waiters:
+                SINGLE_FLIGHT_CALLS.labels(name, "rejected").inc()
+                raise HTTPException(status_code=429, detail="This request is already being processed. Try again shortly.")
+
+            SINGLE_FLIGHT_CALLS.labels(name, "joined").inc()
+            flight.waiters += 1
+            try:
+                # shield: a waiter that disconnects must not cancel everyone else's result
+                result = await asyncio.shield(flight.future)
+            except _LeaderCancelled:
+                continue
+            finally:
+                flight.waiters -= 1
+            return copy.deepcopy(result)
+
+    async def _lead(self, name, flight_key, fn):
+        future = asyncio.get_running_loop().create_future()
+        flight = self._flights[flight_key] = _Flight(future)
+        SINGLE_FLIGHT_CALLS.labels(name, "leader").inc()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            if flight.waiters:
+                logger.info("Single-flight leader cancelled, handing over", extra={"flight": name, "waiters": flight.waiters})
+            self._fail(future, _LeaderCancelled())
+            raise
+        except BaseException as e:
+            self._fail(future, e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[flight_key]
+
+    @staticmethod
+    def _fail(future, error):
+        future.set_exception(error)
+        # Marks it retrieved: with no waiters, asyncio would log "exception was never retrieved"
+        future.exception()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+single_flight = SingleFlight(SINGLE_FLIGHT_MAX_WAITERS)
@@ -0,0 +1,351 @@
+from collections import Counter
+import numpy as np
+import re
+import zlib
+
+from api.config import SKILLS_LOCAL_MIN
+from api.matching import missing_terms, top_k
+
+# ==========================================
+# TAXONOMY: category -> [(canonical name, aliases...)], most in-demand first
+# ==========================================
+SKILL_TAXONOMY = {
+    "languages": [
+        ("Python", "python3"), ("JavaScript", "js", "es6", "ecmascript"), ("TypeScript", "ts"), ("SQL",),
+        ("Java",), ("Go", "golang"), ("C#", "csharp", "c sharp"), ("C++", "cpp"), ("Rust",), ("Kotlin",),
+        ("Ruby",), ("PHP",), ("Scala",), ("Swift",), ("R",), ("C",), ("Bash", "shell scripting", "shell"),
+    ],
+    "frontend": [
+        ("React", "reactjs", "react.js"), ("HTML", "html5"), ("CSS", "css3"), ("Next.js", "nextjs"),
+        ("Redux",), ("Vue.js", "vue", "vuejs"), ("Angular", "angularjs"), ("Tailwind CSS", "tailwind"),
+        ("Sass", "scss"), ("Jest",), ("Webpack",), ("Vite",), ("Cypress",), ("Storybook",),
+    ],
+    "backend": [
+        ("REST APIs", "rest", "restful", "rest api", "restful apis"), ("Node.js", "node", "nodejs"),
+        ("Django",), ("FastAPI",), ("Flask",), ("Spring Boot", "spring"), ("Express", "express.js", "expressjs"),
+        ("GraphQL",), ("Microservices", "microservice", "microservice architecture"), ("gRPC",),
+        ("ASP.NET", ".net", "dotnet", ".net core"), ("Ruby on Rails", "rails"), ("Celery",), ("RabbitMQ",),
+    ],
+    "data": [
+        ("PostgreSQL", "postgres", "psql"), ("Pandas",), ("Apache Spark", "spark", "pyspark"),
+        ("Apache Kafka", "kafka"), ("Airflow", "apache airflow"), ("ETL", "elt", "etl pipelines"),
+        ("MySQL",), ("MongoDB", "mongo"), ("Redis",), ("Snowflake",), ("BigQuery", "big query"), ("dbt",),
+        ("NumPy",), ("Data Warehousing", "data warehouse"), ("Elasticsearch", "elastic search"),
+        ("Tableau",), ("Power BI", "powerbi"), ("Excel", "microsoft excel", "ms excel"), ("Hadoop",),
+    ],
+    "machine_learning": [
+        ("Machine Learning", "ml"), ("PyTorch", "torch"), ("TensorFlow",), ("scikit-learn", "sklearn"),
+        ("Deep Learning",), ("NLP", "natural language processing"), ("LLMs", "llm", "large language models"),
+        ("MLOps",), ("Statistics", "statistical analysis", "statistical modeling"), ("Computer Vision",),
+        ("Hugging Face", "huggingface"), ("XGBoost",), ("Keras",),
+    ],
+    "cloud_devops": [
+        ("AWS", "amazon web services"), ("Docker",), ("Kubernetes", "k8s"), ("CI/CD", "ci cd",
+        "continuous integration", "continuous delivery", "continuous deployment"), ("Terraform",),
+        ("Linux",), ("GCP", "google cloud", "google cloud platform"), ("Azure", "microsoft azure"),
+        ("GitHub Actions",), ("Jenkins",), ("Prometheus",), ("Grafana",), ("Helm",), ("Ansible",),
+        ("Serverless", "aws lambda", "lambda"),
+    ],
+    "practices": [
+        ("Git", "github", "gitlab"), ("Unit Testing", "unit tests", "tdd", "test driven development"),
+        ("Agile",), ("System Design",), ("Scrum",), ("Code Review", "code reviews"), ("Jira",),
+    ],
+    "product_design": [
+        ("Product Management", "product manager"), ("Stakeholder Management",), ("A/B Testing", "ab testing",
+        "experimentation"), ("Roadmapping", "roadmap", "product roadmap"), ("Figma",), ("UI/UX", "ux",
+        "ui design", "ux design", "user experience"), ("Google Analytics",), ("SEO",),
+    ],
+    "mobile": [
+        ("React Native",), ("Flutter",), ("iOS",), ("Android",), ("SwiftUI",),
+    ],
+    "security": [
+        ("OAuth", "oauth2", "oauth 2.0"), ("Application Security", "appsec", "cybersecurity"),
+        ("Penetration Testing", "pentesting", "pen testing"),
+    ],
+}
+
+# Aliases that are also everyday words, letters or names ("Go-to-market", "Worked at Shell",
+# "at the helm", "R&D"): in running text they only count next to technical context
+AMBIGUOUS_ALIASES = {
+    "go", "r", "c", "ts", "rest", "express", "spring", "swift", "excel", "shell", "lambda", "node", "ml", "llm",
+    "helm", "spark", "roadmap", "experimentation", "airflow", "jenkins", "flutter", "rails", "ruby", "rust",
+    "java", "pandas", "celery", "storybook", "cypress", "angular", "dbt", "tableau", "snowflake", "jest", "sass",
+}
+# Technical context: an unambiguous skill or one of these words within CONTEXT_TOKENS, same sentence / line
+CONTEXT_CUES = {
+    "skills", "languages", "language", "programming", "technologies", "tech", "stack", "tools", "tooling",
+    "frameworks", "framework", "libraries", "library", "software", "developer", "developers", "code", "coding",
+    "scripting", "scripts", "api", "apis", "backend", "frontend", "cloud", "database", "databases", "devops",
+}
+CONTEXT_TOKENS = 3
+SEGMENT_BREAK_RE = re.compile(r"[.!?;](?=\s|$)|\n")
+# Characters that glue an ambiguous alias into an ordinary word: "Go-to-market", "R&D", "C-level", "Shell's"
+COMPOUND_CHARS = "-&'’"
+
+# Hashed character bigram + trigram space for the fuzzy lookup (typos, spacing, punctuation variants)
+N_FEATURES = 2 ** 11
+# Nearest aliases by cosine are only candidates: a typo must also be within a small edit distance
+FUZZY_CANDIDATES = 3
+FUZZY_MIN = 0.5
+# Shorter words are too often one edit away from an unrelated word ("scrub" / "scrum")
+FUZZY_MIN_CHARS = 6
+# Typo lookups remembered per word ("requirements", "remote" recur in every posting)
+FUZZY_MEMO_SIZE = 50_000
+
+SKILL_TOKEN_RE = re.compile(r"\.?[A-Za-z0-9][A-Za-z0-9+#]*(?:\.[A-Za-z0-9]+)*")
+
+
+def squash(phrase: str) -> str:
+    """Lookup key: "Node.js" / "node js" / "NodeJS" -> "nodejs". A leading dot stays (".NET" is not "net")."""
+    phrase = phrase.strip().lower()
+    key = re.sub(r"[^a-z0-9+#]", "", phrase)
+    return f".{key}" if phrase.startswith(".") else key
+
+
+def char_vectors(keys) -> np.ndarray:
+    """L2-normalized hashed bigram + trigram counts of each key, one row each; a matrix product gives cosine similarity."""
+    matrix = np.zeros((len(keys), N_FEATURES), dtype=np.float32)
+    for row, key in enumerate(keys):
+        padded = f"^{key}$"
+        ids = [zlib.crc32(padded[i:i + n].encode()) % N_FEATURES for n in (2, 3) for i in range(len(padded) - n + 1)]
+        if ids:
+            matrix[row] = np.bincount(ids, minlength=N_FEATURES)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (a swap of neighbours is one edit); anything over limit is limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+def is_typo_of(word: str, alias: str) -> bool:
+    """
+    "kubernets" / "terrafrom" / "tensorflw", but not an alias with an ordinary
+    suffix ("dockers", "scalar") or a different word ("docket", "locker"):
+    same first two and last letters, one edit (two for long aliases).
+    """
+    if word.startswith(alias) or word[:2] != alias[:2] or word[-1] != alias[-1]:
+        return False
+    limit = 2 if len(alias) >= 10 else 1
+    return edit_distance(word, alias, limit) <= limit
+
+
+def in_compound(part: str, match) -> bool:
+    before = part[match.start() - 1] if match.start() else ""
+    after = part[match.end()] if match.end() < len(part) else ""
+    return bool(before and before in COMPOUND_CHARS) or bool(after and after in COMPOUND_CHARS)
+
+
+class SkillIndex:
+    """
+    In-memory index over the taxonomy: exact alias lookup for the common
+    case, then cosine top-k over a matrix of hashed character n-gram vectors
+    (one row per alias) to find typo candidates, confirmed by edit distance.
+    Maps free text, or the skill strings a model returns, onto canonical
+    skill names without an LLM call. Aliases that are also everyday words
+    only count in technical context.
+    """
+
+    def __init__(self, taxonomy, ambiguous):
+        self.skills = []       # canonical names, taxonomy order
+        self.category = []     # category of each skill
+        self.rank = []         # position within its category (0 = most in demand)
+        self.exact = {}        # squashed alias -> skill id
+        self.ambiguous = {squash(a) for a in ambiguous}
+        alias_keys, alias_skill = [], []
+        for category, entries in taxonomy.items():
+            for rank, (name, *aliases) in enumerate(entries):
+                skill_id = len(self.skills)
+                self.skills.append(name)
+                self.category.append(category)
+                self.rank.append(rank)
+                for alias in (name, *aliases):
+                    key = squash(alias)
+                    if key and key not in self.exact:
+                        self.exact[key] = skill_id
+                        alias_keys.append(key)
+                        alias_skill.append(skill_id)
+        self.by_name = {name: i for i, name in enumerate(self.skills)}
+        self.alias_keys = alias_keys
+        self.alias_skill = np.array(alias_skill)
+        self.matrix = char_vectors(alias_keys)
+        self.max_words = max(len(alias.split()) for entries in taxonomy.values() for entry in entries for alias in entry)
+        # Typos are only matched to long, unambiguous aliases
+        self.fuzzy_targets = {
+            i for i, key in enumerate(alias_keys) if len(key) >= FUZZY_MIN_CHARS and key not in self.ambiguous
+        }
+        # Cheap pre-filter: a word only gets a fuzzy lookup if some alias starts like it
+        self.prefixes = {alias_keys[i][:2] for i in self.fuzzy_targets}
+        self._typos = {}
+
+    # --- LOOKUP ---
+    def search(self, phrases, k: int = 3):
+        """[(skill, cosine)] best first, for each phrase: k nearest aliases, one entry per skill."""
+        if not phrases:
+            return []
+        scores = char_vectors([squash(p) for p in phrases]) @ self.matrix.T
+        results = []
+        for row in scores:
+            found = {}
+            for i in top_k(row, k * 2):
+                skill = self.skills[self.alias_skill[i]]
+                found.setdefault(skill, round(float(row[i]), 3))
+            results.append(list(found.items())[:k])
+        return results
+
+    def fuzzy(self, words):
+        """Skill id of the alias each (squashed) word is a typo of, or None: cosine candidates, then edit distance."""
+        # Read through a local dict: match-jobs extracts from worker threads, and the memo may be swapped meanwhile
+        memo = self._typos
+        found = {word: memo[word] for word in dict.fromkeys(words) if word in memo}
+        new = [word for word in dict.fromkeys(words) if word not in found]
+        if len(memo) + len(new) > FUZZY_MEMO_SIZE:
+            memo = self._typos = {}
+        if new:
+            scores = char_vectors(new) @ self.matrix.T
+            for word, row in zip(new, scores):
+                match = None
+                for i in top_k(row, FUZZY_CANDIDATES):
+                    if row[i] >= FUZZY_MIN and i in self.fuzzy_targets and is_typo_of(word, self.alias_keys[i]):
+                        match = int(self.alias_skill[i])
+                        break
+                found[word] = memo[word] = match
+        return [found[word] for word in words]
+
+    def _fuzzy_candidate(self, key: str) -> bool:
+        return len(key) >= FUZZY_MIN_CHARS and key[:2] in self.prefixes and not key.isdigit()
+
+    def canonical(self, name):
+        """The canonical skill for one name ("reactjs", "Amazon Web Services"), or None if it isn't in the taxonomy."""
+        key = squash(str(name))
+        if key in self.exact:
+            return self.skills[self.exact[key]]
+        # "Python (Django)", "AWS / GCP": the first recognizable part wins
+        for part in re.split(r"[(),/&]| and ", str(name)):
+            if squash(part) in self.exact:
+                return self.skills[self.exact[squash(part)]]
+        if not self._fuzzy_candidate(key):
+            return None
+        skill_id = self.fuzzy([key])[0]
+        return None if skill_id is None else self.skills[skill_id]
+
+    def normalize(self, names):
+        """Canonical names for a model's / user's skill list, de-duplicated in order; unknown ones kept as given."""
+        seen, out = set(), []
+        for name in names:
+            label = self.canonical(name) or " ".join(str(name).split())
+            if label and label.lower() not in seen:
+                seen.add(label.lower())
+                out.append(label)
+        return out
+
+    # --- TEXT ---
+    def extract(self, text: str) -> Counter:
+        """Canonical skill -> mentions in the text (resume, profile, job description), in order of first mention."""
+        found = Counter()
+        first = {}
+        anchors = {}      # segment -> token positions of unambiguous skills and context cues
+        pending = []      # (segment, position, skill id): ambiguous aliases waiting for context
+        unknown = {}      # word -> [(segment, position)] for the typo pass
+
+        def count(segment, position, skill_id):
+            skill = self.skills[skill_id]
+            found[skill] += 1
+            first[skill] = min(first.get(skill, (segment, position)), (segment, position))
+            anchors[segment].append(position)
+
+        for segment, part in enumerate(SEGMENT_BREAK_RE.split(text or "")):
+            matches = list(SKILL_TOKEN_RE.finditer(part))
+            keys = [squash(m.group(0)) for m in matches]
+            anchors[segment] = []
+            i = 0
+            while i < len(keys):
+                # Longest alias first: "React Native" before "React"
+                for size in range(min(self.max_words, len(keys) - i), 0, -1):
+                    skill_id = self.exact.get("".join(keys[i:i + size]))
+                    if skill_id is None:
+                        continue
+                    if size > 1 or keys[i] not in self.ambiguous:
+                        count(segment, i, skill_id)
+                    elif not in_compound(part, matches[i]):
+                        pending.append((segment, i, skill_id))
+                    i += size
+                    break
+                else:
+                    if keys[i] in CONTEXT_CUES:
+                        anchors[segment].append(i)
+                    elif self._fuzzy_candidate(keys[i]):
+                        unknown.setdefault(keys[i], []).append((segment, i))
+                    i += 1
+
+        for word, skill_id in zip(unknown, self.fuzzy(list(unknown))):
+            if skill_id is not None:
+                for segment, position in unknown[word]:
+                    count(segment, position, skill_id)
+
+        # Accepted ambiguous aliases are context for their neighbours too ("Skills: Java, Ruby, Rust")
+        while pending:
+            near = [p for p in pending if any(abs(p[1] - a) <= CONTEXT_TOKENS for a in anchors[p[0]])]
+            if not near:
+                break
+            for segment, position, skill_id in near:
+                count(segment, position, skill_id)
+            pending = [p for p in pending if p not in near]
+
+        return Counter({skill: found[skill] for skill in sorted(found, key=first.get)})
+
+    def ranked(self, found, limit: int = 5):
+        """Most mentioned skills, ties broken by how in-demand the skill is."""
+        return sorted(found, key=lambda s: (-found[s], self.rank[self.by_name[s]], s))[:limit]
+
+    def top_skills(self, text: str, limit: int = 5):
+        return self.ranked(self.extract(text), limit)
+
+    def missing_skills(self, resume_skills, wanted, limit: int = 5):
+        """Skills a job description asks for (extract() of it; most, then first mentioned) that resume_skills lacks."""
+        ranked = sorted(wanted, key=lambda s: -wanted[s])
+        return [s for s in ranked if s not in resume_skills][:limit]
+
+    def suggest_missing(self, found, limit: int = 3):
+        """
+        No job description: the most in-demand skills of the categories the
+        resume leans on (by mentions) that it doesn't list yet.
+        """
+        weight = Counter()
+        for skill, mentions in found.items():
+            weight[self.category[self.by_name[skill]]] += mentions
+        suggestions = []
+        for category, _ in weight.most_common(2):
+            for skill_id, name in enumerate(self.skills):
+                if self.category[skill_id] == category and name not in found:
+                    suggestions.append((self.rank[skill_id], name))
+        return [name for _, name in sorted(suggestions)][:limit]
+
+
+def covers(found) -> bool:
+    """Whether the taxonomy found enough to answer locally; otherwise the skill lists are asked of the model as before."""
+    return len(found) >= SKILLS_LOCAL_MIN
+
+
+def skill_gaps(resume_skills, wanted, resume_text: str, job_text: str, limit: int = 5):
+    """Missing skills for one job (`wanted` = extract() of it); a non-tech posting falls back to its unmatched words."""
+    if covers(wanted):
+        return skill_index.missing_skills(resume_skills, wanted, limit)
+    return missing_terms(resume_text, job_text, limit)
+
+
+skill_index = SkillIndex(SKILL_TAXONOMY, AMBIGUOUS_ALIASES)
@@ -0,0 +1,333 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
+from datetime import datetime
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import uuid
+
+from api.config import TASK_WORKERS
+from api.database import SessionLocal, AsyncSessionLocal
+from api.models import AnalysisTask
+from api.sessions import get_optional_user_id
+from api.uploads import receive_upload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+FINISHED = ("done", "failed")
+
+# Tasks are tagged with the process that holds their payload
+WORKER_HOST = socket.gethostname()
+
+
+def worker_id() -> str:
+    return f"{WORKER_HOST}:{os.getpid()}"
+
+
+def worker_alive(worker: str) -> bool:
+    """False once the process that took a task is gone (crash, restart). Other hosts' workers count as alive."""
+    if not worker:
+        return False
+    host, _, pid = worker.rpartition(":")
+    if host != WORKER_HOST:
+        return True
+    if int(pid) == os.getpid():
+        # A previous process that had our pid; this one has not taken any tasks yet
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+async def no_progress(progress: int, stage: str):
+    """Default `report` callback for pipelines called straight from an HTTP route."""
+    return None
+
+
+# --- HELPERS: PAYLOAD VALIDATION (used by the registered handlers) ---
+def require_pdf(payload):
+    if not payload.get("contents") or not (payload.get("filename") or "").endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Upload a PDF.")
+    return payload["contents"]
+
+
+def cleanup_payload(payload):
+    """Removes the spooled upload (if any) once its task is finished or dropped."""
+    upload = (payload or {}).get("contents")
+    if upload is not None:
+        upload.cleanup()
+
+
+def require_field(payload, name):
+    if not payload.get(name):
+        raise HTTPException(status_code=400, detail=f"Missing form field '{name}'.")
+    return payload[name]
+
+
+class TaskQueue:
+    """
+    In-process queue for long-running analyses. Submitting returns a task id
+    right away; TASK_WORKERS coroutines run the registered pipeline and keep
+    the task row in SQLite up to date, so clients can poll or follow SSE and
+    the final result stays in the database.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._handlers = {}
+        self._payloads = {}
+        self._queue = None
+        self._worker_tasks = []
+        self._events = {}
+
+    def register(self, kind: str, handler):
+        """handler(payload: dict, db: AsyncSession, report) -> JSON-serializable result."""
+        self._handlers[kind] = handler
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        # Payloads (uploaded files) only live in the process that took the task, so tasks of a
+        # process that is gone can't resume. Other workers' tasks are left alone.
+        # (runs once at startup, so the sync session is fine here)
+        db = SessionLocal()
+        try:
+            unfinished = db.query(AnalysisTask.id, AnalysisTask.worker).filter(
+                AnalysisTask.status.in_(["queued", "running"])
+            ).all()
+            orphaned = [task_id for task_id, worker in unfinished if not worker_alive(worker)]
+            if orphaned:
+                db.query(AnalysisTask).filter(AnalysisTask.id.in_(orphaned)).update(
+                    {"status": "failed", "error": "Server restarted before the task finished."},
+                    synchronize_session=False,
+                )
+                db.commit()
+        finally:
+            db.close()
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        # Queued tasks never run now; drop their spooled uploads
+        for payload in self._payloads.values():
+            cleanup_payload(payload)
+        self._payloads.clear()
+
+    def _replace_dead_workers(self):
+        """A worker that ended anyway (it only stops on cancel) would leave its share of the queue unserved."""
+        dead = [task for task in self._worker_tasks if task.done()]
+        for task in dead:
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("Task worker died, restarting it", exc_info=task.exception())
+            self._worker_tasks.remove(task)
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    # --- SUBMIT / UPDATE ---
+    async def submit(self, kind: str, payload: dict, user_id: int = None, owner_key: str = None) -> str:
+        if kind not in self._handlers:
+            raise HTTPException(status_code=404, detail=f"Unknown task type '{kind}'.")
+        if not self._worker_tasks:
+            self.start()
+        self._replace_dead_workers()
+
+        task_id = uuid.uuid4().hex
+        async with AsyncSessionLocal() as db:
+            db.add(AnalysisTask(id=task_id, kind=kind, user_id=user_id, owner_key=owner_key, worker=worker_id()))
+            await db.commit()
+
+        self._payloads[task_id] = payload
+        await self._queue.put(task_id)
+        return task_id
+
+    async def _update(self, task_id: str, **fields):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(AnalysisTask).where(AnalysisTask.id == task_id)
+                .values(**fields, updated_at=datetime.utcnow())
+            )
+            await db.commit()
+        self._notify(task_id)
+
+    def _notify(self, task_id: str):
+        event = self._events.pop(task_id, None)
+        if event:
+            event.set()
+
+    async def wait_for_change(self, task_id: str, timeout: float) -> bool:
+        """True if this process updated the task before the timeout."""
+        event = self._events.setdefault(task_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # --- WORKER ---
+    async def _worker(self):
+        while True:
+            task_id = await self._queue.get()
+            payload = self._payloads.pop(task_id, None)
+            try:
+                await self._run(task_id, payload)
+            except Exception:
+                # e.g. the database failing while recording the failure: lose the task, keep the worker
+                logger.exception("Task worker error", extra={"task_id": task_id})
+            finally:
+                cleanup_payload(payload)
+                self._queue.task_done()
+
+    async def _run(self, task_id: str, payload: dict):
+        async with AsyncSessionLocal() as db:
+            try:
+                task = await db.get(AnalysisTask, task_id)
+                handler = self._handlers[task.kind]
+                await self._update(task_id, status="running", stage="started", progress=1)
+
+                async def report(progress: int, stage: str):
+                    await self._update(task_id, progress=progress, stage=stage)
+
+                result = await handler(payload, db, report)
+                await self._update(task_id, status="done", stage="done", progress=100, result=json.dumps(result))
+            except HTTPException as e:
+                await self._update(task_id, status="failed", stage="failed", error=str(e.detail))
+            except Exception as e:
+                logger.exception("Task failed", extra={"task_id": task_id})
+                await self._update(task_id, status="failed", stage="failed", error=str(e))
+
+
+task_queue = TaskQueue(TASK_WORKERS)
+
+
+# --- HELPERS ---
+def task_to_dict(task: AnalysisTask):
+    return {
+        "id": task.id,
+        "kind": task.kind,
+        "status": task.status,
+        "progress": task.progress,
+        "stage": task.stage,
+        "result": json.loads(task.result) if task.result else None,
+        "error": task.error,
+        "created_at": task.created_at.isoformat() if task.created_at else None,
+        "updated_at": task.updated_at.isoformat() if task.updated_at else None,
+    }
+
+
+def hash_task_key(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def owns_task(task: AnalysisTask, user_id: int = None, key: str = None) -> bool:
+    """A user's task is theirs alone; an anonymous one needs the key its submit returned."""
+    if task.user_id is not None:
+        return task.user_id == user_id
+    return bool(task.owner_key and key) and hmac.compare_digest(task.owner_key, hash_task_key(key))
+
+
+async def load_task(task_id: str, user_id: int = None, key: str = None):
+    """The task as a dict, or None if it doesn't exist or isn't the caller's (same 404 either way)."""
+    async with AsyncSessionLocal() as db:
+        task = await db.get(AnalysisTask, task_id)
+        return task_to_dict(task) if task and owns_task(task, user_id, key) else None
+
+
+def task_key(key: str = Query(None), x_task_key: str = Header(None)):
+    """The anonymous task key, from ?key= (EventSource can't send headers) or X-Task-Key."""
+    return x_task_key or key
+
+
+# ==========================================
+# TASK API: submit, poll, stream
+# ==========================================
+@router.post("/tasks/{kind}")
+async def submit_task(
+    kind: str,
+    file: UploadFile = File(None),
+    url: str = Form(None),
+    job_description: str = Form(None),
+    user_id: int = Depends(get_optional_user_id)
+):
+    """
+    Starts a pipeline in the background and returns its id immediately.
+    Send the same fields the synchronous endpoint takes (file / url / job_description).
+    """
+    payload = {"url": url, "job_description": job_description, "user_id": user_id}
+    # Anonymous callers get a random key instead; only its hash is stored
+    key = secrets.token_urlsafe(24) if user_id is None else None
+    if file is not None:
+        payload["filename"] = file.filename
+        # Spooled to disk when large; the worker removes it after the task
+        payload["contents"] = await receive_upload(file)
+
+    try:
+        task_id = await task_queue.submit(kind, payload, user_id, hash_task_key(key) if key else None)
+    except BaseException:
+        cleanup_payload(payload)
+        raise
+    query = f"?key={key}" if key else ""
+    response = {
+        "task_id": task_id, "status": "queued",
+        "poll": f"/api/tasks/{task_id}{query}", "events": f"/api/tasks/{task_id}/events{query}",
+    }
+    if key:
+        response["key"] = key
+    return response
+
+
+@router.get("/tasks/{task_id}")
+async def get_task(task_id: str, user_id: int = Depends(get_optional_user_id), key: str = Depends(task_key)):
+    task = await load_task(task_id, user_id, key)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.get("/tasks/{task_id}/events")
+async def task_events(task_id: str, user_id: int = Depends(get_optional_user_id), key: str = Depends(task_key)):
+    """Server-Sent Events: one `progress` event per change, then a final `done` or `failed` event."""
+    if not await load_task(task_id, user_id, key):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def stream():
+        last = None
+        idle_seconds = 0
+        while True:
+            task = await load_task(task_id, user_id, key)
+            if task is None:
+                # The row is gone (deleted or cleaned up) while we were streaming
+                yield f"event: failed\ndata: {json.dumps({'id': task_id, 'status': 'failed', 'error': 'Task not found'})}\n\n"
+                break
+            snapshot = (task["status"], task["progress"], task["stage"])
+            if snapshot != last:
+                last = snapshot
+                idle_seconds = 0
+                event = task["status"] if task["status"] in FINISHED else "progress"
+                yield f"event: {event}\ndata: {json.dumps(task)}\n\n"
+            if task["status"] in FINISHED:
+                break
+
+            # Woken at once by a local worker; the 1s poll covers other processes
+            if not await task_queue.wait_for_change(task_id, timeout=1):
+                idle_seconds += 1
+                if idle_seconds % 15 == 0:
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
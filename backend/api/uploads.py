@@ -0,0 +1,198 @@
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+
+from api.config import (
+    UPLOAD_MAX_BYTES, UPLOAD_MAX_REQUEST_BYTES, UPLOAD_SPOOL_BYTES, UPLOAD_CHUNK_BYTES, UPLOAD_TMP_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+SPOOL_PREFIX = "upload-"
+
+
+class Upload:
+    """
+    A received file, hashed while it streamed in. Up to UPLOAD_SPOOL_BYTES it
+    stays in memory (`data`); bigger files live in a temp file (`path`) that the
+    PDF workers memory-map, so the bytes are never held or pickled in full.
+    """
+
+    def __init__(self, filename: str, sha256: str, size: int, data: bytes = None, path: str = None):
+        self.filename = filename or ""
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+        self.path = path
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def source(self):
+        """What pdf_service hands to a worker: the temp file path, or the bytes."""
+        return self.path if self.path is not None else self.data
+
+    def open(self):
+        return open(self.path, "rb") if self.path is not None else io.BytesIO(self.data)
+
+    def cleanup(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+class _Spooler:
+    """Accumulates chunks: hash + size check on every chunk, spill to disk past the spool threshold."""
+
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.buffer = bytearray()
+        self.file = None
+
+    def spills(self, chunk: bytes) -> bool:
+        """True if this chunk means file IO (callers on the event loop push it to a thread)."""
+        return self.file is not None or self.size + len(chunk) > UPLOAD_SPOOL_BYTES
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.discard()
+            raise HTTPException(status_code=413, detail=f"{self.filename or 'Upload'} is larger than {self.max_bytes // (1024 * 1024)} MB.")
+        self.hasher.update(chunk)
+        if self.file is None and self.size > UPLOAD_SPOOL_BYTES:
+            os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+            self.file = tempfile.NamedTemporaryFile(dir=UPLOAD_TMP_DIR, prefix=SPOOL_PREFIX, delete=False)
+            self.file.write(self.buffer)
+            self.buffer = None
+        if self.file is not None:
+            self.file.write(chunk)
+        else:
+            self.buffer += chunk
+
+    def finish(self) -> Upload:
+        if self.file is None:
+            return Upload(self.filename, self.hasher.hexdigest(), self.size, data=bytes(self.buffer))
+        self.file.close()
+        return Upload(self.filename, self.hasher.hexdigest(), self.size, path=self.file.name)
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            os.unlink(self.file.name)
+            self.file = None
+        self.buffer = None
+
+
+# ==========================================
+# RECEIVING
+# ==========================================
+async def receive_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> Upload:
+    """Streams an UploadFile in chunks (never one big read()), rejecting it with a 413 as soon as it passes max_bytes."""
+    spooler = _Spooler(file.filename, max_bytes)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if spooler.spills(chunk):
+                await asyncio.to_thread(spooler.write, chunk)
+            else:
+                spooler.write(chunk)
+    except BaseException:
+        spooler.discard()
+        raise
+    return spooler.finish()
+
+
+@asynccontextmanager
+async def received_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES):
+    """async with received_upload(file) as upload: ...  (the temp file is removed afterwards)"""
+    upload = await receive_upload(file, max_bytes)
+    try:
+        yield upload
+    finally:
+        upload.cleanup()
+
+
+def spool_stream(filename: str, stream, max_bytes: int = UPLOAD_MAX_BYTES) -> Upload:
+    """Blocking twin of receive_upload() for file-like sources, e.g. a member of an uploaded zip."""
+    spooler = _Spooler(filename, max_bytes)
+    try:
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b""):
+            spooler.write(chunk)
+    except BaseException:
+        spooler.discard()
+        raise
+    return spooler.finish()
+
+
+def remove_stale_uploads(max_age_seconds: float = 6 * 3600):
+    """Startup sweep: spool files left behind by a crashed process (or a task that never ran)."""
+    try:
+        names = os.listdir(UPLOAD_TMP_DIR)
+    except FileNotFoundError:
+        return
+    cutoff = time.time() - max_age_seconds
+    for name in names:
+        path = os.path.join(UPLOAD_TMP_DIR, name)
+        try:
+            if name.startswith(SPOOL_PREFIX) and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+# ==========================================
+# REQUEST BODY LIMIT (before multipart parsing spools anything)
+# ==========================================
+class UploadLimitMiddleware:
+    """
+    Multipart bodies over max_bytes are refused up front from Content-Length,
+    or, for chunked uploads without one, as soon as the running count passes
+    the limit, instead of after the whole body has been written to disk.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            return await self.app(scope, receive, send)
+
+        detail = f"Request body is larger than {self.max_bytes // (1024 * 1024)} MB."
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _is_multipart(scope) -> bool:
+        content_type = dict(scope["headers"]).get(b"content-type", b"")
+        return content_type.startswith(b"multipart/form-data")
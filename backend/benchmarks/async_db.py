@@ -0,0 +1,130 @@
+"""
+Event-loop blocking: a commit that has to wait for the SQLite write lock,
+done with the old sync Session vs the async session, inside an async route.
+
+Another connection holds the write lock for --hold seconds. Meanwhile one
+request saves a post (and so waits on the lock) while a second client keeps
+pinging GET /. With the sync session the whole event loop waits with the
+commit, so the pings stall; with the async session they keep answering.
+
+    cd backend
+    python -m benchmarks.async_db --hold 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Point the app at a throwaway database before api.* is imported
+TMP_DIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(TMP_DIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx
+import uvicorn
+
+from api.main import app
+from api.database import SessionLocal, engine
+from api.migrations import init_db
+from api.models import User, Post
+from api.ai_agent import save_post_in_new_session
+
+PORT = 8766
+
+
+# --- THE TWO WAYS OF SAVING (same row, same lock wait) ---
+@app.post("/bench/sync-save")
+async def sync_save():
+    # The pre-aiosqlite pattern: blocking Session.commit() inside an async def route
+    db = SessionLocal()
+    try:
+        db.add(Post(content="bench", user_id=1))
+        db.commit()
+    finally:
+        db.close()
+    return {"ok": True}
+
+
+@app.post("/bench/async-save")
+async def async_save():
+    await save_post_in_new_session(1, "bench")
+    return {"ok": True}
+
+
+def start_server():
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def hold_write_lock(seconds: float, locked: threading.Event):
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute("BEGIN IMMEDIATE")
+    locked.set()
+    time.sleep(seconds)
+    conn.rollback()
+    conn.close()
+
+
+async def measure(client: httpx.AsyncClient, save_path: str, hold: float):
+    locked = threading.Event()
+    holder = threading.Thread(target=hold_write_lock, args=(hold, locked))
+    holder.start()
+    locked.wait()
+
+    base = f"http://127.0.0.1:{PORT}"
+    started = time.perf_counter()
+    save = asyncio.create_task(client.post(base + save_path))
+    await asyncio.sleep(0.1)
+
+    # Ping for as long as the save is stuck behind the lock
+    latencies = []
+    while not save.done():
+        t = time.perf_counter()
+        await client.get(base + "/")
+        latencies.append(time.perf_counter() - t)
+        await asyncio.sleep(0.05)
+
+    (await save).raise_for_status()
+    save_seconds = time.perf_counter() - started
+    holder.join()
+    return {
+        "save_seconds": round(save_seconds, 3),
+        "pings_answered_during_save": len(latencies),
+        "max_ping_ms": round(max(latencies) * 1000, 1) if latencies else None,
+    }
+
+
+async def main(hold: float):
+    async with httpx.AsyncClient(timeout=60) as client:
+        results = {
+            "lock_held_seconds": hold,
+            "sync_session": await measure(client, "/bench/sync-save", hold),
+            "async_session": await measure(client, "/bench/async-save", hold),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hold", type=float, default=2.0)
+    args = parser.parse_args()
+
+    init_db(engine)
+    db = SessionLocal()
+    db.add(User(id=1, linkedin_id="bench", name="Bench"))
+    db.commit()
+    db.close()
+
+    server = start_server()
+    try:
+        asyncio.run(main(args.hold))
+    finally:
+        server.should_exit = True
@@ -0,0 +1,126 @@
+"""
+Write concurrency: the old default SQLite engine vs the tuned one in api/database.py.
+
+Writer threads do what the analysis and post routes do on every request
+(update users.profile_summary, insert a Post, commit) while reader threads
+page through post history. Reports commits/s, "database is locked" failures
+and reader latency for each engine, each on a fresh database file.
+
+    cd backend
+    python -m benchmarks.db_writes --writers 16 --ops 100 --readers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base, create_db_engine
+from api.models import User, Post
+from api.ai_agent import list_posts
+
+
+def baseline_engine(url: str):
+    # What database.py used to build: default pool, rollback journal, no pragmas
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def run(engine, writers: int, ops: int, readers: int):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    db.add_all([User(linkedin_id=f"bench-{i}", name=f"User {i}") for i in range(writers)])
+    db.commit()
+    user_ids = [u.id for u in db.query(User).all()]
+    db.close()
+
+    commits, locked = [0], [0]
+    read_latencies = []
+    lock = threading.Lock()
+    stop_readers = threading.Event()
+
+    def writer(user_id):
+        for i in range(ops):
+            db = Session()
+            try:
+                user = db.get(User, user_id)
+                user.profile_summary = json.dumps({"score": i, "skills": ["python"] * 10})
+                db.add(Post(content=f"post {i} " + "x" * 500, user_id=user_id))
+                db.commit()
+                with lock:
+                    commits[0] += 1
+            except OperationalError as e:
+                db.rollback()
+                if "locked" not in str(e):
+                    raise
+                with lock:
+                    locked[0] += 1
+            finally:
+                db.close()
+
+    def reader(user_id):
+        while not stop_readers.is_set():
+            db = Session()
+            try:
+                started = time.perf_counter()
+                list_posts(db, user_id, limit=20)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    read_latencies.append(elapsed)
+            except OperationalError:
+                pass
+            finally:
+                db.close()
+
+    reader_threads = [threading.Thread(target=reader, args=(user_ids[i % len(user_ids)],)) for i in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(uid,)) for uid in user_ids]
+    for t in reader_threads:
+        t.start()
+
+    started = time.perf_counter()
+    for t in writer_threads:
+        t.start()
+    for t in writer_threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    stop_readers.set()
+    for t in reader_threads:
+        t.join()
+    engine.dispose()
+
+    read_latencies.sort()
+    return {
+        "seconds": round(elapsed, 3),
+        "commits": commits[0],
+        "commits_per_second": round(commits[0] / elapsed, 1),
+        "database_is_locked": locked[0],
+        "reads": len(read_latencies),
+        "read_p50_ms": round(statistics.median(read_latencies) * 1000, 2) if read_latencies else None,
+        "read_p95_ms": round(read_latencies[int(0.95 * len(read_latencies))] * 1000, 2) if read_latencies else None,
+    }
+
+
+def main(writers: int, ops: int, readers: int):
+    results = {"writers": writers, "ops_per_writer": ops, "readers": readers}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, build in [("baseline", baseline_engine), ("tuned", create_db_engine)]:
+            url = f"sqlite:///{os.path.join(tmp, name + '.db')}"
+            results[name] = run(build(url), writers, ops, readers)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=100)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+    main(args.writers, args.ops, args.readers)
@@ -0,0 +1,318 @@
+"""
+Offline stand-ins for everything the app talks to, for benchmarks:
+
+- FakeGenerativeModel replaces genai.GenerativeModel. It answers every prompt
+  the app sends with a plausible JSON / text response, after a configurable
+  latency, and injects 429s at a configurable rate.
+- fake_upstream() is an httpx transport for the LinkedIn OAuth / API hosts
+  and RapidAPI JSearch, so the real client code (and the shared pool's
+  event hooks) run unchanged.
+- FakeScraper replaces the Selenium driver pool.
+- build_corpus() generates sample resume PDFs (deterministic per seed).
+
+install() wires all of them into an imported app; nothing here touches the network.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import zlib
+
+import httpx
+from google.api_core.exceptions import ResourceExhausted
+
+SKILLS = ["Python", "SQL", "React", "AWS", "Docker", "Kubernetes", "Go", "Java", "TypeScript", "Spark",
+          "Terraform", "FastAPI", "PostgreSQL", "Kafka", "Pandas", "Excel", "Figma", "Rust"]
+ROLES = ["Software Engineer", "Data Engineer", "Backend Developer", "Product Analyst", "DevOps Engineer",
+         "Frontend Developer", "ML Engineer", "Engineering Manager"]
+
+
+# ==========================================
+# GEMINI
+# ==========================================
+class LLMFakeConfig:
+    """
+    Shared by every FakeGenerativeModel; seeded so two runs see the same latencies and 429s.
+    call_log= appends the time of every call to that file (one line each), so calls
+    from several worker processes can be counted together.
+    """
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, rate_limit: float = 0.0,
+                 model_latency: dict = None, seed: int = 42, call_log: str = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.model_latency = model_latency or {}
+        self.call_log = call_log
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rate_limited = 0
+
+    def draw(self, model_name: str):
+        """(seconds to wait, whether this call gets a 429)."""
+        with self._lock:
+            self.calls += 1
+            base = self.model_latency.get(model_name, self.latency)
+            seconds = max(0.0, base + self._rng.uniform(-self.jitter, self.jitter))
+            limited = self._rng.random() < self.rate_limit
+            if limited:
+                self.rate_limited += 1
+            if self.call_log:
+                with open(self.call_log, "a") as f:
+                    f.write(f"{time.time()}\n")
+            return seconds, limited
+
+
+def pick(seed_text: str, items, k: int):
+    seed = zlib.crc32(seed_text.encode())
+    return [items[(seed + i * 7) % len(items)] for i in range(k)]
+
+
+def requested(prompt: str, **fields):
+    """Optional fields (the skill lists, see api/skills.py) only when the prompt asks for them."""
+    return {key: value for key, value in fields.items() if key in prompt}
+
+
+def fake_completion(prompt: str) -> str:
+    """What Gemini would plausibly return for each prompt the app builds."""
+    score = 40 + zlib.crc32(prompt.encode()) % 55
+    if "### RESUME" in prompt:
+        sections = prompt.split("### RESUME ")[1:]
+        return json.dumps({"results": [
+            {
+                "resume_id": i + 1,
+                "ats_score": 40 + zlib.crc32(section.encode()) % 55,
+                "missing_sections": "Certifications",
+                "feedback_list": ["Quantify impact", "Tighten summary", "Consistent dates"],
+                **requested(prompt, top_skills=pick(section, SKILLS, 5)),
+            }
+            for i, section in enumerate(sections)
+        ]})
+    if "Hiring Manager" in prompt:
+        return "```json\n" + json.dumps({
+            "ats_score": score,
+            "missing_sections": "Certifications",
+            "feedback_list": ["Quantify impact", "Tighten summary", "Consistent dates"],
+            **requested(prompt, top_skills=pick(prompt, SKILLS, 5)),
+        }) + "\n```"
+    if "LinkedIn Profile PDF" in prompt or "Scraped LinkedIn Data" in prompt:
+        return json.dumps({
+            "top_experience": pick(prompt, ROLES, 1)[0],
+            "years_experience": score % 15,
+            "connections_count": "500+",
+            "summary_rating": score,
+            "feedback_list": ["Add a banner", "Write an About section", "Ask for recommendations"],
+        })
+    if "ATS (Applicant Tracking System)" in prompt:
+        return json.dumps({
+            "score": score,
+            "years_experience": score % 15,
+            "feedback": ["Quantify impact", "Tighten summary", "Consistent dates"],
+            **requested(prompt, top_skills=pick(prompt, SKILLS, 5), missing_keywords=pick(prompt[::-1], SKILLS, 3)),
+        })
+    if "Compare this Resume" in prompt:
+        return json.dumps({
+            "match_score": score,
+            "analysis": "Strong overlap on the core stack. Missing some of the listed tooling.",
+            **requested(prompt, missing_skills=pick(prompt, SKILLS, 2)),
+        })
+    if "Write a LinkedIn post" in prompt:
+        topic = re.search(r"about (.*?) \(Tone", prompt)
+        topic = topic.group(1) if topic else "work"
+        return " ".join([f"Some thoughts on {topic}."] + ["Shipping beats polishing, every time."] * 12)
+    return "{}"
+
+
+class FakeUsage:
+    def __init__(self, prompt: str, text: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+
+
+class FakeResponse:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt, text)
+
+
+class FakeStream:
+    """Async iterator of ~40-char chunks, spaced out over the remaining latency."""
+
+    def __init__(self, prompt: str, text: str, seconds: float):
+        self._chunks = [FakeResponse("", text[i:i + 40]) for i in range(0, len(text), 40)] or [FakeResponse("", "")]
+        self._delay = seconds / len(self._chunks)
+        self.usage_metadata = FakeUsage(prompt, text)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield chunk
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel: only generate_content_async is used by the app."""
+
+    config = LLMFakeConfig()
+
+    def __init__(self, model_name: str, **kwargs):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        seconds, limited = self.config.draw(self.model_name)
+        text = fake_completion(prompt)
+        if stream:
+            # Time to first token, then the rest spread over the chunks
+            await asyncio.sleep(seconds / 4)
+            if limited:
+                raise ResourceExhausted("429 Resource has been exhausted (fake)")
+            return FakeStream(prompt, text, seconds * 3 / 4)
+        await asyncio.sleep(seconds)
+        if limited:
+            raise ResourceExhausted("429 Resource has been exhausted (fake)")
+        return FakeResponse(prompt, text)
+
+
+# ==========================================
+# LINKEDIN API + JSEARCH (one httpx transport for all upstream hosts)
+# ==========================================
+def fake_jobs(skill: str, num_pages: int):
+    seed = zlib.crc32(skill.lower().encode())
+    jobs = []
+    for i in range(10 * num_pages):
+        n = seed + i
+        title = f"{skill} {ROLES[n % len(ROLES)]}"
+        jobs.append({
+            "job_id": f"bench-{seed:x}-{i}",
+            "job_title": title,
+            "employer_name": ["Acme", "Globex", "Initech", "Hooli"][n % 4],
+            "job_city": ["London", "Berlin", "Remote", None][n % 4],
+            "job_publisher": "LinkedIn",
+            "job_apply_link": f"https://example.com/jobs/{seed:x}/{i}",
+            "job_description": f"We need a {title}. " + " ".join(pick(f"{skill}{i}", SKILLS, 6)),
+        })
+    return jobs
+
+
+def fake_upstream(latency: float = 0.05):
+    """httpx.MockTransport answering LinkedIn OAuth/API and JSearch after `latency` seconds."""
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(latency)
+        host, path = request.url.host, request.url.path
+        if host == "www.linkedin.com" and path == "/oauth/v2/accessToken":
+            return httpx.Response(200, json={"access_token": "fake-token", "expires_in": 3600})
+        if host == "api.linkedin.com" and path == "/v2/userinfo":
+            return httpx.Response(200, json={"sub": "bench-user", "given_name": "Bench", "picture": ""})
+        if host == "api.linkedin.com" and path == "/v2/ugcPosts":
+            return httpx.Response(201, json={"id": f"urn:li:share:{int(time.time() * 1000)}"})
+        if host == "jsearch.p.rapidapi.com":
+            skill = request.url.params.get("query", "python").removesuffix(" developer")
+            pages = int(request.url.params.get("num_pages", "1"))
+            return httpx.Response(200, json={"status": "OK", "data": fake_jobs(skill, pages)})
+        return httpx.Response(404, json={"error": f"no fake for {host}{path}"})
+
+    return httpx.MockTransport(handler)
+
+
+# ==========================================
+# SELENIUM SCRAPER
+# ==========================================
+class FakeScraper:
+    """Stands in for ScraperPool.scrape: blocks a worker thread like a page load, returns parsed HTML."""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+
+    def __call__(self, url: str):
+        from api.scraper import parse_profile_html
+
+        time.sleep(self.latency)
+        slug = url.rstrip("/").rsplit("/", 1)[-1]
+        html = (
+            f'<h1 class="text-heading-xlarge">{slug.title()}</h1>'
+            f'<div class="display-flex ph5 pv3">{pick(slug, ROLES, 1)[0]} working with '
+            f'{", ".join(pick(slug, SKILLS, 4))}.</div>'
+        )
+        return parse_profile_html(html)
+
+
+# ==========================================
+# SAMPLE PDFS
+# ==========================================
+def make_pdf(pages, padding: int = 0) -> bytes:
+    """
+    Minimal valid PDF with one Helvetica text page per entry (lines split on \\n).
+    padding= adds an unreferenced stream of that many bytes, like the embedded
+    fonts and images that make real resumes megabytes big without adding text.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for i, text in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        lines = " ".join(f"({line.replace('(', '').replace(')', '')}) '" for line in text.split("\n"))
+        stream = f"BT /F1 10 Tf 50 750 Td 12 TL {lines} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+    if padding:
+        objects.append(f"<< /Length {padding} >>\nstream\n".encode() + b"0" * padding + b"\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, body in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def sample_resume_pages(i: int, rng: random.Random):
+    name = f"Candidate {i}"
+    role = rng.choice(ROLES)
+    pages = [f"{name}\n{role}\nSummary: {rng.randint(2, 15)} years building products.\n"
+             f"Skills: {', '.join(rng.sample(SKILLS, 6))}"]
+    for job in range(rng.randint(1, 4)):
+        start = rng.randint(2008, 2022)
+        bullets = "\n".join(
+            f"- Led {rng.choice(['migration', 'launch', 'rewrite', 'rollout'])} of {rng.choice(SKILLS)} "
+            f"service, cutting latency {rng.randint(10, 70)}%" for _ in range(rng.randint(4, 12))
+        )
+        pages.append(f"{rng.choice(ROLES)} at Company {job}, {start}-{start + rng.randint(1, 5)}\n{bullets}")
+    return pages
+
+
+def build_corpus(size: int, seed: int = 7):
+    """[(filename, pdf_bytes)]: 2-5 page resumes, identical for the same size and seed."""
+    rng = random.Random(seed)
+    return [(f"resume_{i:03d}.pdf", make_pdf(sample_resume_pages(i, rng))) for i in range(size)]
+
+
+# ==========================================
+# WIRING
+# ==========================================
+def install(llm_config: LLMFakeConfig, upstream_latency: float = 0.05, scrape_latency: float = 0.5):
+    """Point the already-imported app at the fakes. Call before the first request."""
+    from api import llm_gateway as gateway_module
+    from api.http_client import shared_http
+    from api.scraper import scraper_pool
+
+    FakeGenerativeModel.config = llm_config
+    gateway_module.load_genai().GenerativeModel = FakeGenerativeModel
+    gateway_module.llm_gateway._models.clear()
+
+    transport = fake_upstream(upstream_latency)
+    shared_http._transport = lambda ssl_context=None: transport
+    shared_http._client = None  # rebuilt with the fake transport on first use
+    scraper_pool.scrape = FakeScraper(scrape_latency)
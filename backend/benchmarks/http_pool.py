@@ -0,0 +1,100 @@
+"""
+Connection reuse: per-request httpx clients vs the shared pooled client.
+
+Starts a local mock upstream, fires the same concurrent load through both
+styles and counts how many TCP connections the server saw.
+
+    cd backend
+    python -m benchmarks.http_pool --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from api.http_client import SharedHttpClient
+
+PORT = 8765
+seen_connections = set()
+
+
+async def mock_upstream(scope, receive, send):
+    """Minimal ASGI app standing in for LinkedIn / RapidAPI; records each client socket."""
+    if scope["type"] != "http":
+        return
+    seen_connections.add(tuple(scope["client"]))
+    await asyncio.sleep(0.005)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"data": []}'})
+
+
+def start_server():
+    server = uvicorn.Server(uvicorn.Config(mock_upstream, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_load(get_client, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    url = f"http://127.0.0.1:{PORT}/search"
+
+    async def one():
+        async with semaphore:
+            async with get_client() as client:
+                response = await client.get(url)
+                response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return time.perf_counter() - started
+
+
+class _Borrowed:
+    """Context manager that hands out the shared client without closing it."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        return self.client
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def main(requests: int, concurrency: int):
+    results = {}
+
+    seen_connections.clear()
+    elapsed = await run_load(httpx.AsyncClient, requests, concurrency)
+    results["per_request_client"] = {"connections": len(seen_connections), "seconds": round(elapsed, 3)}
+
+    seen_connections.clear()
+    shared = SharedHttpClient()
+    elapsed = await run_load(lambda: _Borrowed(shared.client), requests, concurrency)
+    await shared.close()
+    results["shared_client"] = {"connections": len(seen_connections), "seconds": round(elapsed, 3)}
+
+    results["requests"] = requests
+    results["concurrency"] = concurrency
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        asyncio.run(main(args.requests, args.concurrency))
+    finally:
+        server.should_exit = True
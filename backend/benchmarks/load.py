@@ -0,0 +1,382 @@
+"""
+Load benchmark for every router, fully offline.
+
+Starts the real app under uvicorn with the stand-ins from benchmarks/fakes.py
+(Gemini, LinkedIn OAuth/API/scraper, JSearch), on a throwaway database and
+empty caches, then drives concurrent load per scenario from a corpus of
+generated resume PDFs. Prints (or writes with --out) JSON with p50/p95/p99
+latency, throughput and error counts per scenario, plus the git commit and
+settings, so two runs can be diffed:
+
+    cd backend
+    python -m benchmarks.load --requests 100 --concurrency 10 --out before.json
+    ... change something ...
+    python -m benchmarks.load --requests 100 --concurrency 10 --out after.json
+    python -m benchmarks.load --compare before.json after.json
+
+--only resume,jobs-recommend runs a subset; --llm-latency / --llm-jitter /
+--rate-limit shape the fake Gemini (429s are injected at that probability).
+With --corpus smaller than --requests, repeats hit the PDF and LLM caches.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Point the app at throwaway storage and fake keys before api.* is imported
+TMP_DIR = tempfile.mkdtemp(prefix="linkbrand-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+os.environ["LLM_CACHE_PATH"] = os.path.join(TMP_DIR, "llm_cache.db")
+os.environ["PDF_CACHE_DIR"] = os.path.join(TMP_DIR, "pdf_cache")
+os.environ["GEMINI_API_KEY"] = "bench"
+os.environ["RAPIDAPI_KEY"] = "bench"
+os.environ["JSEARCH_OFFLINE"] = "0"
+# The real quota (10 RPM) would make every scenario measure the token bucket
+os.environ.setdefault("GEMINI_RPM", "100000")
+os.environ.setdefault("GEMINI_BURST", "1000")
+os.environ.setdefault("GEMINI_BACKOFF_SECONDS", "0.05")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+import uvicorn
+
+from benchmarks import fakes
+
+PORT = 8767
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+# ==========================================
+# SCENARIOS: one async callable per request, (client, i, ctx) -> httpx.Response
+# ==========================================
+def pdf_file(ctx, i, field="file"):
+    name, content = ctx["corpus"][i % len(ctx["corpus"])]
+    return {field: (name, content, "application/pdf")}
+
+
+def job_posting(i):
+    return (f"Hiring a {fakes.ROLES[i % len(fakes.ROLES)]}. Requirements: "
+            f"{', '.join(fakes.pick(str(i), fakes.SKILLS, 6))}. Remote friendly.")
+
+
+async def resume(client, i, ctx):
+    return await client.post("/api/analyze/resume", files=pdf_file(ctx, i), headers=ctx["auth"])
+
+
+async def linkedin_pdf(client, i, ctx):
+    return await client.post("/api/analyze/linkedin", files=pdf_file(ctx, i), headers=ctx["auth"])
+
+
+async def scrape_url(client, i, ctx):
+    return await client.post("/api/analyze/scrape-url", json={"url": f"https://www.linkedin.com/in/bench-{i}"},
+                             headers=ctx["auth"])
+
+
+async def resume_batch(client, i, ctx):
+    files = [("files", pdf_file(ctx, i * 5 + k)["file"]) for k in range(5)]
+    async with client.stream("POST", "/api/analyze/resume/batch", files=files) as response:
+        async for _ in response.aiter_lines():
+            pass
+    return response
+
+
+async def profile_pdf(client, i, ctx):
+    return await client.post("/api/analyze/profile-pdf", files=pdf_file(ctx, i), headers=ctx["auth"])
+
+
+async def match_job(client, i, ctx):
+    return await client.post("/api/analyze/match-job", files=pdf_file(ctx, i, "resume"),
+                             data={"job_description": job_posting(i)})
+
+
+async def match_jobs(client, i, ctx):
+    jobs = [{"title": fakes.ROLES[k % len(fakes.ROLES)], "company": f"Company {k}", "description": job_posting(i + k)}
+            for k in range(50)]
+    return await client.post("/api/analyze/match-jobs", files=pdf_file(ctx, i, "resume"),
+                             data={"jobs": json.dumps(jobs), "top_k_count": "3"})
+
+
+async def jobs_recommend(client, i, ctx):
+    return await client.get("/api/jobs/recommend", params={"skill": fakes.SKILLS[i % len(fakes.SKILLS)]})
+
+
+async def jobs_ranked(client, i, ctx):
+    return await client.post("/api/jobs/recommend/ranked", files=pdf_file(ctx, i, "resume"),
+                             data={"skill": fakes.SKILLS[i % len(fakes.SKILLS)]})
+
+
+async def generate_post(client, i, ctx):
+    return await client.post("/api/generate/post", json={"topic": f"topic {i % ctx['corpus_size']}"},
+                             headers=ctx["auth"])
+
+
+async def generate_post_stream(client, i, ctx):
+    async with client.stream("POST", "/api/generate/post/stream", json={"topic": f"streamed {i % ctx['corpus_size']}"},
+                             headers=ctx["auth"]) as response:
+        async for _ in response.aiter_lines():
+            pass
+    return response
+
+
+async def publish(client, i, ctx):
+    return await client.post("/api/publish/linkedin", json={"token": "fake-token", "text": f"post {i}"})
+
+
+async def auth_callback(client, i, ctx):
+    return await client.get("/auth/callback", params={"code": f"code-{i}"}, follow_redirects=False)
+
+
+async def user_data(client, i, ctx):
+    return await client.get("/api/user/data", headers=ctx["auth"])
+
+
+async def task_resume(client, i, ctx):
+    """Submit to the background queue and poll until it finishes: end-to-end task latency."""
+    submitted = await client.post("/api/tasks/resume", files=pdf_file(ctx, i), headers=ctx["auth"])
+    if submitted.status_code != 200:
+        return submitted
+    poll = submitted.json()["poll"]
+    while True:
+        response = await client.get(poll, headers=ctx["auth"])
+        if response.status_code != 200 or response.json()["status"] in ("done", "failed"):
+            return response
+        await asyncio.sleep(0.05)
+
+
+SCENARIOS = {
+    # analysis.py
+    "resume": resume,
+    "linkedin-pdf": linkedin_pdf,
+    "scrape-url": scrape_url,
+    "resume-batch": resume_batch,
+    # main.py
+    "profile-pdf": profile_pdf,
+    "match-job": match_job,
+    "match-jobs": match_jobs,
+    # jobs.py
+    "jobs-recommend": jobs_recommend,
+    "jobs-ranked": jobs_ranked,
+    # ai_agent.py
+    "generate-post": generate_post,
+    "generate-post-stream": generate_post_stream,
+    "publish": publish,
+    # auth.py
+    "auth-callback": auth_callback,
+    # main.py (dashboard read) and tasks.py
+    "user-data": user_data,
+    "task-resume": task_resume,
+}
+# Unmeasured requests per scenario, so one-off costs (worker pool start, first connections) don't skew p99
+WARMUP_REQUESTS = 2
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+# Fallback bodies the routes return with a 200 when the pipeline failed underneath
+SOFT_ERROR_MARKERS = (
+    '"status":"error"', '"status":"partial_error"', '"status":"failed"',
+    "Speed Limit Hit", "Analysis Limit Reached", "AI Unavailable",
+)
+
+
+def is_soft_error(response) -> bool:
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return False
+    body = response.text.replace(" ", "")
+    return any(marker.replace(" ", "") in body for marker in SOFT_ERROR_MARKERS)
+
+
+def percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_scenario(client, name, requests: int, concurrency: int, ctx):
+    call = SCENARIOS[name]
+    for i in range(WARMUP_REQUESTS):
+        await call(client, -1 - i, ctx)
+
+    latencies, errors, statuses = [], 0, {}
+    counter = iter(range(requests))
+    lock = asyncio.Lock()
+
+    async def worker():
+        nonlocal errors
+        while True:
+            async with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                response = await call(client, i, ctx)
+                status = response.status_code
+                if status < 400 and is_soft_error(response):
+                    status = f"{status}-fallback"
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            # Redirects (auth callback) are the success case
+            if isinstance(status, int) and status < 400:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 1) if v is not None else None
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def start_server(app):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_all(names, args, ctx):
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=BASE, timeout=120, limits=limits) as client:
+        results = {}
+        for name in names:
+            results[name] = await run_scenario(client, name, args.requests, args.concurrency, ctx)
+            print(f"{name:<22} p50={results[name]['p50_ms']}ms p95={results[name]['p95_ms']}ms "
+                  f"rps={results[name]['throughput_rps']} errors={results[name]['errors']}", file=sys.stderr)
+        return results
+
+
+def main(args):
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}. Known: {', '.join(SCENARIOS)}")
+
+    from api.main import app
+    from api.database import SessionLocal, engine
+    from api.migrations import init_db
+    from api.models import User
+    from api.sessions import issue_session_token
+    from api.llm_gateway import llm_gateway
+    from api.model_router import model_router
+
+    llm = fakes.LLMFakeConfig(args.llm_latency, args.llm_jitter, args.rate_limit, seed=args.seed)
+    fakes.install(llm, upstream_latency=args.upstream_latency, scrape_latency=args.scrape_latency)
+
+    # The app creates its schema in the lifespan; the bench user is needed before that
+    init_db(engine)
+    db = SessionLocal()
+    db.add(User(id=1, linkedin_id="bench", name="Bench"))
+    db.commit()
+    db.close()
+
+    ctx = {
+        "corpus": fakes.build_corpus(args.corpus, args.seed),
+        "corpus_size": args.corpus,
+        "auth": {"Authorization": f"Bearer {issue_session_token(1)}"},
+    }
+
+    server = start_server(app)
+    try:
+        scenarios = asyncio.run(run_all(names, args, ctx))
+    finally:
+        server.should_exit = True
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "scenarios": scenarios,
+        "fake_llm": {"calls": llm.calls, "rate_limited": llm.rate_limited},
+        "gateway": llm_gateway.stats(),
+        "router": {k: v for k, v in model_router.stats().items() if k != "models"},
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+# --- COMPARE TWO RUNS ---
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    rows = {}
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if not old:
+            continue
+        row = {}
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "errors"):
+            a, b = old.get(key), new.get(key)
+            change = round((b - a) / a * 100, 1) if a and b is not None else None
+            row[key] = {"before": a, "after": b, "change_pct": change}
+        rows[name] = row
+    print(json.dumps({
+        "before": before["meta"]["commit"],
+        "after": after["meta"]["commit"],
+        "scenarios": rows,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--corpus", type=int, default=40, help="distinct sample PDFs (and post topics)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="probability a Gemini call gets a 429")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="LinkedIn API / JSearch")
+    parser.add_argument("--scrape-latency", type=float, default=0.5, help="Selenium page load")
+    parser.add_argument("--out", help="also write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two saved reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        main(args)
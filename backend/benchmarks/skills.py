@@ -0,0 +1,104 @@
+"""
+Skill index benchmark (api/skills.py): how long the local skill extraction and
+gap finding take, and how much of each resume's listed skills it recovers.
+
+Runs in-process on the synthetic resumes from benchmarks/fakes.py (no server,
+no PDFs): index build time, then per-resume extract + top skills, per-posting
+gap finding, and one resume against --jobs postings the way
+/api/analyze/match-jobs does it. Recall is measured against the "Skills:"
+line every synthetic resume has:
+
+    cd backend
+    python -m benchmarks.skills --resumes 500 --jobs 300 --out skills.json
+"""
+import argparse
+import json
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+
+
+def timings_ms(values):
+    values = sorted(v * 1000 for v in values)
+    return {
+        "p50": round(statistics.median(values), 3),
+        "p95": round(values[min(len(values) - 1, int(0.95 * len(values)))], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def main(args):
+    from benchmarks import fakes
+
+    started = time.perf_counter()
+    from api.skills import skill_index, skill_gaps
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(args.seed)
+    resumes = ["\n".join(fakes.sample_resume_pages(i, rng)) for i in range(args.resumes)]
+    postings = [
+        f"Hiring a {fakes.ROLES[k % len(fakes.ROLES)]}. Requirements: "
+        f"{', '.join(fakes.pick(str(k), fakes.SKILLS, 6))}. Remote friendly."
+        for k in range(args.jobs)
+    ]
+
+    extract_times, recalled, listed = [], 0, 0
+    for text in resumes:
+        t = time.perf_counter()
+        found = skill_index.extract(text)
+        skill_index.top_skills(text)
+        extract_times.append(time.perf_counter() - t)
+        expected = {skill_index.canonical(s) for s in re.search(r"Skills: (.*)", text).group(1).split(", ")}
+        listed += len(expected)
+        recalled += len(expected & set(found))
+
+    resume_skills = skill_index.extract(resumes[0])
+    gap_times = []
+    for posting in postings:
+        t = time.perf_counter()
+        skill_gaps(resume_skills, skill_index.extract(posting), resumes[0], posting)
+        gap_times.append(time.perf_counter() - t)
+
+    t = time.perf_counter()
+    skills = skill_index.extract(resumes[0])
+    [skill_gaps(skills, skill_index.extract(posting), resumes[0], posting) for posting in postings]
+    match_jobs_seconds = time.perf_counter() - t
+
+    from benchmarks.load import git_commit
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+        "index": {
+            "skills": len(skill_index.skills),
+            "aliases": len(skill_index.alias_keys),
+            "build_ms": round(build_seconds * 1000, 1),
+        },
+        "extract_ms": timings_ms(extract_times),
+        "gaps_ms": timings_ms(gap_times),
+        "match_jobs_ms": round(match_jobs_seconds * 1000, 1),
+        "recall": round(recalled / listed, 3),
+    }
+    print(f"extract p50 {report['extract_ms']['p50']}ms, gaps p50 {report['gaps_ms']['p50']}ms, "
+          f"{args.jobs} jobs {report['match_jobs_ms']}ms, recall {report['recall']}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=500)
+    parser.add_argument("--jobs", type=int, default=300, help="postings per resume in the match-jobs timing")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="also write the JSON report here")
+    main(parser.parse_args())
@@ -0,0 +1,170 @@
+"""
+Cold-start benchmark: how long a fresh process takes to import api.main, run
+the lifespan startup (schema + worker pools) and answer its first request.
+
+Every run is a new interpreter with `-X importtime` on a throwaway database
+and cache directory, so it sees what an autoscaled instance or a reload=True
+restart sees. Prints (or writes with --out) JSON with p50/min/max per phase,
+the import time broken down by top-level package (everything the process
+imported, first request included) and by api.* module, and the heavy optional
+dependencies that got imported before the first request (should be none):
+
+    cd backend
+    python -m benchmarks.startup --runs 5 --out before.json
+    ... change something ...
+    python -m benchmarks.startup --runs 5 --out after.json
+    python -m benchmarks.startup --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.load import git_commit
+
+# Only needed once a request actually uses them; loading any at startup is a regression
+LAZY_MODULES = ("google.generativeai", "selenium", "webdriver_manager", "bs4", "pypdf")
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from api.main import app
+imported = time.perf_counter()
+import httpx
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/")
+        answered = time.perf_counter()
+    return ready, answered, response.status_code
+
+ready, answered, status = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "status": status,
+    "loaded_at_startup": [m for m in LAZY if m in sys.modules],
+}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """`-X importtime` lines -> (self microseconds per top-level package, cumulative microseconds per api.* module)."""
+    packages = defaultdict(int)
+    api_modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        packages[name.split(".")[0]] += int(self_us)
+        if name.startswith("api."):
+            api_modules[name] = int(cumulative_us)
+    return packages, api_modules
+
+
+def run_once(workdir: str):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        LLM_CACHE_PATH=os.path.join(workdir, "llm_cache.db"),
+        PDF_CACHE_DIR=os.path.join(workdir, "pdf_cache"),
+        PYTHONWARNINGS="ignore",
+    )
+    code = f"LAZY = {LAZY_MODULES!r}\n{CHILD}"
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env)
+    process_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"Startup run failed:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = process_ms
+    packages, api_modules = parse_importtime(proc.stderr)
+    return result, packages, api_modules
+
+
+def summarize(values):
+    return {
+        "p50": round(statistics.median(values), 1),
+        "min": round(min(values), 1),
+        "max": round(max(values), 1),
+    }
+
+
+def main(args):
+    runs, package_totals, api_totals = [], defaultdict(list), defaultdict(list)
+    for _ in range(args.runs):
+        # Fresh database each run: the lifespan creates the schema like on a new instance
+        with tempfile.TemporaryDirectory() as workdir:
+            result, packages, api_modules = run_once(workdir)
+        runs.append(result)
+        for name, us in packages.items():
+            package_totals[name].append(us / 1000)
+        for name, us in api_modules.items():
+            api_totals[name].append(us / 1000)
+
+    phases = ("process_ms", "import_ms", "lifespan_ms", "first_request_ms")
+    by_package = sorted(((name, statistics.median(ms)) for name, ms in package_totals.items()), key=lambda x: -x[1])
+    by_module = sorted(((name, statistics.median(ms)) for name, ms in api_totals.items()), key=lambda x: -x[1])
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {"runs": args.runs},
+        },
+        "phases": {phase: summarize([r[phase] for r in runs]) for phase in phases},
+        "import_by_package_ms": {name: round(ms, 1) for name, ms in by_package[:args.top]},
+        "import_by_api_module_ms": {name: round(ms, 1) for name, ms in by_module[:args.top]},
+        "loaded_at_startup": sorted({m for r in runs for m in r["loaded_at_startup"]}),
+        "first_request_status": sorted({r["status"] for r in runs}),
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+# --- COMPARE TWO RUNS ---
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    rows = {}
+    for phase, new in after["phases"].items():
+        a, b = before["phases"].get(phase, {}).get("p50"), new["p50"]
+        rows[phase] = {"before": a, "after": b, "change_pct": round((b - a) / a * 100, 1) if a else None}
+    print(json.dumps({
+        "before": before["meta"]["commit"],
+        "after": after["meta"]["commit"],
+        "p50_ms": rows,
+        "loaded_at_startup": {"before": before["loaded_at_startup"], "after": after["loaded_at_startup"]},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--top", type=int, default=15, help="packages / api modules listed in the breakdown")
+    parser.add_argument("--out", help="also write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two saved reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        main(args)
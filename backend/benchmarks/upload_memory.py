@@ -0,0 +1,300 @@
+"""
+Peak-memory benchmark for the upload routes in api/main.py and api/analysis.py.
+
+Each route gets a fresh server process (uvicorn + the fakes from
+benchmarks/fakes.py, throwaway storage). After one small warm-up upload has
+started the PDF workers, --concurrency clients each post a different
+--size-mb PDF at once. A sampler reads VmRSS from /proc for the server and
+its PDF worker processes every few milliseconds; the report has the peak and
+the growth over the warmed-up baseline, for the server and for everything:
+
+    cd backend
+    python -m benchmarks.upload_memory --size-mb 8 --concurrency 8 --out before.json
+    ... change something ...
+    python -m benchmarks.upload_memory --size-mb 8 --concurrency 8 --out after.json
+    python -m benchmarks.upload_memory --compare before.json after.json
+
+Linux only (reads /proc).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PORT = 8768
+BASE = f"http://127.0.0.1:{PORT}"
+
+# route -> (path, file field, extra form data)
+MATCH_JOBS = json.dumps([
+    {"title": "Backend Developer", "company": f"Company {k}", "description": "Python, Django, PostgreSQL, Docker"}
+    for k in range(20)
+])
+ROUTES = {
+    "resume": ("/api/analyze/resume", "file", {}),
+    "linkedin": ("/api/analyze/linkedin", "file", {}),
+    "resume-batch": ("/api/analyze/resume/batch", "files", {}),
+    "profile-pdf": ("/api/analyze/profile-pdf", "file", {}),
+    "match-job": ("/api/analyze/match-job", "resume", {"job_description": "Backend Developer: Python, Django, SQL."}),
+    "match-jobs": ("/api/analyze/match-jobs", "resume", {"jobs": MATCH_JOBS, "top_k_count": "3"}),
+}
+
+
+# ==========================================
+# SERVER (child process)
+# ==========================================
+def serve(port: int):
+    workdir = tempfile.mkdtemp(prefix="linkbrand-upload-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.db")
+    os.environ["PDF_CACHE_DIR"] = os.path.join(workdir, "pdf_cache")
+    os.environ["UPLOAD_TMP_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["GEMINI_API_KEY"] = "bench"
+    os.environ.setdefault("GEMINI_RPM", "100000")
+    os.environ.setdefault("GEMINI_BURST", "1000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import uvicorn
+    from benchmarks import fakes
+    from api.main import app
+
+    fakes.install(fakes.LLMFakeConfig(latency=0.05, jitter=0.0), scrape_latency=0.0)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+# ==========================================
+# RSS SAMPLING
+# ==========================================
+def rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+def children_of(pid: int):
+    """Every live descendant of pid (the spawn-pool PDF workers and their resource tracker)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # ppid is the 2nd field after the ")" that closes the command name
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (FileNotFoundError, ProcessLookupError, IndexError):
+            continue
+    found, frontier = [], [pid]
+    while frontier:
+        parent = frontier.pop()
+        kids = [child for child, ppid in parents.items() if ppid == parent]
+        found.extend(kids)
+        frontier.extend(kids)
+    return found
+
+
+class RssSampler:
+    """Background thread tracking the peak RSS of the server and of server + workers."""
+
+    def __init__(self, pid: int, interval: float = 0.005):
+        self.pid = pid
+        self.interval = interval
+        self.server_peak_kb = 0
+        self.total_peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def snapshot(self):
+        server = rss_kb(self.pid)
+        return server, server + sum(rss_kb(child) for child in children_of(self.pid))
+
+    def _run(self):
+        children = children_of(self.pid)
+        last_scan = time.monotonic()
+        while not self._stop.is_set():
+            # Re-scan for workers now and then; reading /proc/*/stat every tick would dominate
+            if time.monotonic() - last_scan > 0.25:
+                children, last_scan = children_of(self.pid), time.monotonic()
+            server = rss_kb(self.pid)
+            total = server + sum(rss_kb(child) for child in children)
+            self.server_peak_kb = max(self.server_peak_kb, server)
+            self.total_peak_kb = max(self.total_peak_kb, total)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# ==========================================
+# CLIENT (parent process)
+# ==========================================
+def make_upload(i: int, size_mb: float, seed: int) -> bytes:
+    from benchmarks import fakes
+    rng = random.Random(seed + i)
+    # A different resume per client so neither the PDF cache nor single-flight hides the work
+    return fakes.make_pdf(fakes.sample_resume_pages(i, rng), padding=int(size_mb * 1024 * 1024))
+
+
+def upload_request(route, name, content):
+    path, field, data = ROUTES[route]
+    return path, [(field, (name, content, "application/pdf"))], data
+
+
+async def post_all(client, route, uploads):
+    async def post(i, content):
+        path, files, data = upload_request(route, f"resume_{i:03d}.pdf", content)
+        started = time.perf_counter()
+        if route == "resume-batch":
+            async with client.stream("POST", path, files=files, data=data) as response:
+                async for _ in response.aiter_lines():
+                    pass
+        else:
+            response = await client.post(path, files=files, data=data)
+        return response.status_code, time.perf_counter() - started
+
+    return await asyncio.gather(*[post(i, content) for i, content in enumerate(uploads)])
+
+
+def wait_until_up(process, timeout: float = 60):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{BASE}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise SystemExit("Server did not start")
+
+
+def measure_route(route, args):
+    import httpx
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        # Room for the benchmark's own files under the per-file and per-request limits
+        UPLOAD_MAX_BYTES=str(int((args.size_mb + 1) * 1024 * 1024)),
+        UPLOAD_MAX_REQUEST_BYTES=str(int((args.size_mb + 2) * 1024 * 1024)),
+    )
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.upload_memory", "--serve", "--port", str(PORT)],
+                               env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        wait_until_up(process)
+        uploads = [make_upload(i, args.size_mb, args.seed) for i in range(args.concurrency + 1)]
+
+        async def run():
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(base_url=BASE, timeout=300, limits=limits) as client:
+                # Warm-up: starts the PDF pool and imports pypdf, so the baseline includes them
+                await post_all(client, route, uploads[-1:])
+                await asyncio.sleep(0.5)
+                sampler = RssSampler(process.pid)
+                baseline_server, baseline_total = sampler.snapshot()
+                with sampler:
+                    results = await post_all(client, route, uploads[:-1])
+                return baseline_server, baseline_total, sampler, results
+
+        baseline_server, baseline_total, sampler, results = asyncio.run(run())
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    latencies = sorted(seconds for _, seconds in results)
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "baseline_server_mb": mb(baseline_server),
+        "peak_server_mb": mb(sampler.server_peak_kb),
+        "growth_server_mb": mb(sampler.server_peak_kb - baseline_server),
+        "baseline_total_mb": mb(baseline_total),
+        "peak_total_mb": mb(sampler.total_peak_kb),
+        "growth_total_mb": mb(sampler.total_peak_kb - baseline_total),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "errors": sum(1 for status, _ in results if status >= 400),
+    }
+
+
+def main(args):
+    names = args.only.split(",") if args.only else list(ROUTES)
+    unknown = [n for n in names if n not in ROUTES]
+    if unknown:
+        raise SystemExit(f"Unknown route(s): {', '.join(unknown)}. Known: {', '.join(ROUTES)}")
+
+    routes = {}
+    for name in names:
+        routes[name] = measure_route(name, args)
+        print(f"{name:<14} server +{routes[name]['growth_server_mb']}MB "
+              f"total +{routes[name]['growth_total_mb']}MB errors={routes[name]['errors']}", file=sys.stderr)
+
+    # Imported late: benchmarks.load points os.environ at its own storage, which the servers must not inherit
+    from benchmarks.load import git_commit
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "serve", "port")},
+        },
+        "routes": routes,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+# --- COMPARE TWO RUNS ---
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    rows = {}
+    for route, new in after["routes"].items():
+        old = before["routes"].get(route)
+        if not old:
+            continue
+        rows[route] = {
+            metric: {"before": old[metric], "after": new[metric]}
+            for metric in ("growth_server_mb", "growth_total_mb", "p50_ms", "errors")
+        }
+    print(json.dumps({"before": before["meta"]["commit"], "after": after["meta"]["commit"], "routes": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=8, help="size of each uploaded PDF")
+    parser.add_argument("--concurrency", type=int, default=8, help="uploads in flight at once")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(ROUTES)}")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="also write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two saved reports and exit")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=PORT, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+    elif args.compare:
+        compare(*args.compare)
+    else:
+        main(args)
@@ -0,0 +1,232 @@
+"""
+Multi-worker benchmark: throughput per worker count, and whether all the
+workers together stay inside the Gemini quota.
+
+For each --workers count the app is started through api/launcher.py (the
+production launch mode) with the fakes from benchmarks/fakes.py installed in
+every worker and a throwaway database, caches and coordination file. Two
+phases run against it:
+
+  quota  distinct resumes to /api/analyze/resume: one Gemini call each, so
+         the shared token bucket (GEMINI_RPM / GEMINI_BURST) is the limit.
+         Every fake Gemini call is timestamped in one file; the busiest
+         --window seconds must not exceed burst + rate * window.
+  cpu    distinct resumes ranked against --jobs postings at
+         /api/analyze/match-jobs with no Gemini narrative: PDF parsing and
+         TF-IDF ranking only, the part that scales with cores.
+
+    cd backend
+    python -m benchmarks.workers --workers 1,2,4 --out workers.json
+    python -m benchmarks.workers --workers 4 --coordination local   # per-worker quota: goes over
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PORT = 8769
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+# ==========================================
+# SERVER (every worker imports this module and reads `app`)
+# ==========================================
+def __getattr__(name):
+    # Resolved lazily so the benchmark's own process never imports the app
+    if name != "app":
+        raise AttributeError(name)
+    from benchmarks import fakes
+    from api.main import app
+
+    llm = fakes.LLMFakeConfig(float(os.environ["BENCH_LLM_LATENCY"]), jitter=0.0, call_log=os.environ["BENCH_LLM_LOG"])
+    fakes.install(llm, scrape_latency=0.0)
+    return app
+
+
+def serve():
+    from api.launcher import run
+    run("benchmarks.workers:app", reload=False)
+
+
+def start_server(workers: int, workdir: str, args):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        SERVER_PORT=str(PORT),
+        COORDINATION_BACKEND=args.coordination,
+        COORDINATION_PATH=os.path.join(workdir, "coordination.db"),
+        METRICS_MULTIPROC_DIR=os.path.join(workdir, "metrics"),
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        LLM_CACHE_PATH=os.path.join(workdir, "llm_cache.db"),
+        PDF_CACHE_DIR=os.path.join(workdir, "pdf_cache"),
+        UPLOAD_TMP_DIR=os.path.join(workdir, "uploads"),
+        SESSION_SECRET="bench",
+        GEMINI_API_KEY="bench",
+        GEMINI_RPM=str(args.rpm),
+        GEMINI_BURST=str(args.burst),
+        BENCH_LLM_LATENCY=str(args.llm_latency),
+        BENCH_LLM_LOG=os.path.join(workdir, "llm_calls.log"),
+        # No similarity reaches 2: match-jobs ranks every posting but never asks Gemini for a narrative
+        MATCH_PRESCORE_MIN="2",
+        LOG_LEVEL="WARNING",
+        PYTHONWARNINGS="ignore",
+    )
+    # stdout is uvicorn's access log; errors still reach stderr
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.workers", "--serve"], env=env, stdout=subprocess.DEVNULL,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    wait_until_up(process)
+    return process, env["BENCH_LLM_LOG"]
+
+
+def wait_until_up(process, timeout: float = 120):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{BASE}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit("Server did not start")
+
+
+# ==========================================
+# LOAD
+# ==========================================
+async def drive(requests: int, concurrency: int, send):
+    import httpx
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = []
+
+    async with httpx.AsyncClient(base_url=BASE, timeout=300, limits=httpx.Limits(max_connections=concurrency * 2)) as client:
+        async def one(i):
+            async with semaphore:
+                response = await send(client, i)
+                statuses.append(response.status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(requests)])
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(requests / elapsed, 2),
+        "errors": sum(1 for status in statuses if status >= 400),
+    }
+
+
+def busiest_window(times, window: float) -> int:
+    """Most calls that started within any `window` seconds."""
+    times = sorted(times)
+    best, j = 0, 0
+    for i, start in enumerate(times):
+        while j < len(times) and times[j] < start + window:
+            j += 1
+        best = max(best, j - i)
+    return best
+
+
+def read_call_log(path):
+    try:
+        with open(path) as f:
+            return [float(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def measure(workers: int, args, corpus, jobs):
+    with tempfile.TemporaryDirectory(prefix="linkbrand-workers-") as workdir:
+        process, call_log = start_server(workers, workdir, args)
+        try:
+            def resume(client, i):
+                name, content = corpus[i]
+                return client.post("/api/analyze/resume", files={"file": (name, content, "application/pdf")})
+
+            def match_jobs(client, i):
+                name, content = corpus[args.requests + i]
+                return client.post("/api/analyze/match-jobs", files={"resume": (name, content, "application/pdf")},
+                                   data={"jobs": jobs, "top_k_count": "1"})
+
+            quota = asyncio.run(drive(args.requests, args.concurrency, resume))
+            calls = read_call_log(call_log)
+            cpu = asyncio.run(drive(args.requests, args.concurrency, match_jobs))
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+    allowed = args.burst + args.rpm / 60 * args.window
+    peak = busiest_window(calls, args.window)
+    quota.update({
+        "llm_calls": len(calls),
+        "busiest_window_calls": peak,
+        "allowed_in_window": round(allowed, 1),
+        "within_quota": peak <= allowed,
+    })
+    return {"quota": quota, "cpu": cpu}
+
+
+def main(args):
+    from benchmarks import fakes
+
+    counts = [int(n) for n in args.workers.split(",")]
+    corpus = fakes.build_corpus(args.requests * 2, args.seed)
+    jobs = json.dumps([
+        {"title": fakes.ROLES[k % len(fakes.ROLES)], "company": f"Company {k}",
+         "description": f"Requirements: {', '.join(fakes.pick(str(k), fakes.SKILLS, 6))}. Remote friendly."}
+        for k in range(args.jobs)
+    ])
+
+    results = {}
+    for workers in counts:
+        results[str(workers)] = measure(workers, args, corpus, jobs)
+        quota, cpu = results[str(workers)]["quota"], results[str(workers)]["cpu"]
+        print(f"workers={workers} quota: {quota['throughput_rps']} rps, busiest {args.window}s window "
+              f"{quota['busiest_window_calls']}/{quota['allowed_in_window']} calls | cpu: {cpu['throughput_rps']} rps "
+              f"errors={quota['errors'] + cpu['errors']}", file=sys.stderr)
+
+    # Imported late: benchmarks.load points os.environ at its own storage, which the servers must not inherit
+    from benchmarks.load import git_commit
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("out", "serve")},
+        },
+        "workers": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts to run")
+    parser.add_argument("--requests", type=int, default=120, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=24)
+    parser.add_argument("--jobs", type=int, default=300, help="postings ranked per request in the cpu phase")
+    parser.add_argument("--rpm", type=float, default=1200, help="GEMINI_RPM shared by all workers")
+    parser.add_argument("--burst", type=int, default=5, help="GEMINI_BURST")
+    parser.add_argument("--window", type=float, default=2.0, help="seconds of the quota check window")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--coordination", default="sqlite", help="COORDINATION_BACKEND for the workers")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="also write the JSON report here")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+    else:
+        main(args)
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+# api.config reads the environment at import: point every store at a throwaway directory first
+WORKDIR = tempfile.mkdtemp(prefix="linkbrand-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+    LLM_CACHE_PATH=os.path.join(WORKDIR, "llm_cache.db"),
+    PDF_CACHE_DIR=os.path.join(WORKDIR, "pdf_cache"),
+    UPLOAD_TMP_DIR=os.path.join(WORKDIR, "uploads"),
+    COORDINATION_PATH=os.path.join(WORKDIR, "coordination.db"),
+    METRICS_MULTIPROC_DIR=os.path.join(WORKDIR, "metrics"),
+    SESSION_SECRET="tests",
+    LOG_LEVEL="WARNING",
+)
+os.environ.pop("GEMINI_API_KEY", None)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture_text(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
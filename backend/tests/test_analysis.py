@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from api import analysis
+
+# What pdf_service returns for scanned (image-only) PDFs: one form feed per page
+SCANNED = ["\f" * 40, " \n\f" * 30]
+
+
+@pytest.fixture
+def scanned_pdf(monkeypatch):
+    """pdf_service yields the text set on the fixture; the model must never be asked."""
+    state = {"text": ""}
+
+    async def extract_text(contents):
+        return state["text"]
+
+    async def ask_gemini_for_json(prompt, schema, pipeline):
+        pytest.fail("an empty PDF must not reach the model")
+
+    monkeypatch.setattr("api.llm_gateway.GEMINI_API_KEY", "test")
+    monkeypatch.setattr(analysis.pdf_service, "extract_text", extract_text)
+    monkeypatch.setattr(analysis, "ask_gemini_for_json", ask_gemini_for_json)
+    return state
+
+
+@pytest.mark.parametrize("text", SCANNED)
+def test_resume_of_page_breaks_is_empty(scanned_pdf, text):
+    scanned_pdf["text"] = text
+
+    assert asyncio.run(analysis.resume_pipeline(b"%PDF")) == analysis.get_fallback_resume()
+
+
+@pytest.mark.parametrize("text", SCANNED)
+def test_linkedin_pdf_of_page_breaks_is_empty(scanned_pdf, text):
+    scanned_pdf["text"] = text
+
+    assert asyncio.run(analysis.linkedin_pdf_pipeline(b"%PDF", db=None)) == analysis.get_fallback_linkedin()
+
+
+@pytest.mark.parametrize("text", SCANNED)
+def test_batch_reports_empty_pdf(scanned_pdf, text):
+    scanned_pdf["text"] = text
+
+    async def main():
+        out = asyncio.Queue()
+        await analysis.run_resume_batch([("scan.pdf", b"%PDF")], out)
+        results = []
+        while not out.empty():
+            item = out.get_nowait()
+            if item is not None:
+                results.append(item)
+        return results
+
+    assert asyncio.run(main()) == [
+        {"filename": "scan.pdf", "status": "error", "error": "PDF seems empty or is an image."},
+    ]
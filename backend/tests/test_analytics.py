@@ -0,0 +1,23 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+
+TOKEN = {"X-Analytics-Token": "tests"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr("api.analytics.ANALYTICS_TOKEN", "tests")
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path, largest", [
+    ("/api/analytics/skills", 100),
+    ("/api/analytics/skills/python/missing", 1000),
+])
+def test_limit_is_bounded(client, path, largest):
+    assert client.get(path, params={"limit": largest}, headers=TOKEN).status_code == 200
+    for limit in (0, -5, largest + 1):
+        assert client.get(path, params={"limit": limit}, headers=TOKEN).status_code == 422
@@ -0,0 +1,109 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from api.ai_agent import save_post_in_new_session
+from api.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from api.migrations import init_db
+from api.models import Post, User
+
+USERS = [101, 102, 103, 104]
+
+
+@pytest.fixture(autouse=True)
+def users():
+    init_db(engine)
+    db = SessionLocal()
+    try:
+        db.query(Post).filter(Post.user_id.in_(USERS)).delete(synchronize_session=False)
+        for user_id in USERS:
+            if not db.get(User, user_id):
+                db.add(User(id=user_id, linkedin_id=f"async-{user_id}", name=f"User {user_id}"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(coro):
+    """asyncio.run, then drop the pooled aiosqlite connections (they belong to this loop)."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+
+async def count_posts():
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(Post.user_id, func.count()).where(Post.user_id.in_(USERS)).group_by(Post.user_id)
+        )
+        return dict(rows.all())
+
+
+def hold_write_lock(path: str, seconds: float, locked: threading.Event):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("BEGIN IMMEDIATE")
+    locked.set()
+    time.sleep(seconds)
+    conn.rollback()
+    conn.close()
+
+
+def test_concurrent_sessions_write_and_read():
+    async def session(i):
+        user_id = USERS[i % len(USERS)]
+        await save_post_in_new_session(user_id, f"post {i}")
+        # A read in its own session while the other writers are still going
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(Post).where(Post.user_id == user_id))
+
+    async def main():
+        results = await asyncio.gather(*[session(i) for i in range(60)], return_exceptions=True)
+        return results, await count_posts()
+
+    results, counts = run(main())
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert not errors, errors
+    assert counts == {user_id: 15 for user_id in USERS}
+
+    db = SessionLocal()
+    try:
+        contents = {p.content for p in db.query(Post).filter(Post.user_id.in_(USERS))}
+    finally:
+        db.close()
+    assert contents == {f"post {i}" for i in range(60)}
+
+
+def test_writes_wait_for_the_lock_without_blocking_the_loop():
+    locked = threading.Event()
+    holder = threading.Thread(target=hold_write_lock, args=(engine.url.database, 0.5, locked))
+    holder.start()
+    locked.wait()
+
+    async def main():
+        ticks = 0
+        saves = asyncio.gather(*[save_post_in_new_session(USERS[0], f"locked {i}") for i in range(5)])
+        started = time.perf_counter()
+        while not saves.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        await saves
+        return ticks, time.perf_counter() - started, await count_posts()
+
+    try:
+        ticks, waited, counts = run(main())
+    finally:
+        holder.join()
+
+    # The saves queued behind the lock (busy_timeout, no "database is locked")
+    # while the event loop kept running other coroutines
+    assert counts == {USERS[0]: 5}
+    assert waited >= 0.3
+    assert ticks >= 10
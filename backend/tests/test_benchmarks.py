@@ -0,0 +1,134 @@
+import asyncio
+import io
+import json
+import os
+from unittest import mock
+
+import httpx
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+from pypdf import PdfReader
+
+from api.llm_json import load_json
+from benchmarks import fakes
+
+# benchmarks.load points DATABASE_URL and the API keys at its own throwaway setup on import
+with mock.patch.dict(os.environ):
+    from benchmarks import load
+
+
+# ==========================================
+# FAKES
+# ==========================================
+def test_llm_fake_is_seeded_and_per_model():
+    config = fakes.LLMFakeConfig(latency=0.2, jitter=0.1, rate_limit=0.5, seed=3)
+    again = fakes.LLMFakeConfig(latency=0.2, jitter=0.1, rate_limit=0.5, seed=3)
+    first = [config.draw("m") for _ in range(20)]
+
+    assert first == [again.draw("m") for _ in range(20)]
+    assert all(0.1 <= seconds <= 0.3 for seconds, _ in first)
+    assert config.rate_limited == sum(limited for _, limited in first) and 0 < config.rate_limited < 20
+
+    slow = fakes.LLMFakeConfig(latency=0.0, jitter=0.0, model_latency={"slow": 2.0})
+    assert (slow.draw("slow")[0], slow.draw("fast")[0]) == (2.0, 0.0)
+
+
+def test_fake_model_answers_and_injects_429s(monkeypatch):
+    monkeypatch.setattr(fakes.FakeGenerativeModel, "config", fakes.LLMFakeConfig(latency=0, jitter=0))
+    model = fakes.FakeGenerativeModel("model-a")
+    prompt = "Compare this Resume to the job. Return missing_skills too."
+
+    async def main():
+        response = await model.generate_content_async(prompt)
+        stream = await model.generate_content_async(prompt, stream=True)
+        chunks = [chunk.text async for chunk in stream]
+        return response, chunks
+
+    response, chunks = asyncio.run(main())
+
+    # Parses with the app's own loader, optional fields only when asked for
+    value, how = load_json(response.text)
+    assert how == "ok" and set(value) == {"match_score", "analysis", "missing_skills"}
+    assert response.usage_metadata.prompt_token_count == len(prompt) // 4
+    assert "".join(chunks) == response.text and len(chunks) > 1
+
+    monkeypatch.setattr(fakes.FakeGenerativeModel, "config", fakes.LLMFakeConfig(latency=0, jitter=0, rate_limit=1.0))
+    with pytest.raises(ResourceExhausted):
+        asyncio.run(model.generate_content_async(prompt))
+
+
+def test_fake_upstream_serves_linkedin_and_jsearch():
+    async def main():
+        async with httpx.AsyncClient(transport=fakes.fake_upstream(latency=0)) as client:
+            token = await client.post("https://www.linkedin.com/oauth/v2/accessToken")
+            jobs = await client.get("https://jsearch.p.rapidapi.com/search",
+                                    params={"query": "Rust developer", "num_pages": "2"})
+            missing = await client.get("https://example.com/anything")
+            return token, jobs, missing
+
+    token, jobs, missing = asyncio.run(main())
+
+    assert token.json()["access_token"] == "fake-token"
+    data = jobs.json()["data"]
+    assert len(data) == 20 and all(job["job_title"].startswith("Rust ") for job in data)
+    assert data == fakes.fake_jobs("Rust", 2)
+    assert missing.status_code == 404
+
+
+def test_corpus_is_deterministic_readable_pdfs():
+    corpus = fakes.build_corpus(5, seed=11)
+
+    assert corpus == fakes.build_corpus(5, seed=11)
+    assert corpus != fakes.build_corpus(5, seed=12)
+    for i, (name, content) in enumerate(corpus):
+        reader = PdfReader(io.BytesIO(content))
+        assert name == f"resume_{i:03d}.pdf"
+        assert 2 <= len(reader.pages) <= 5
+        assert f"Candidate {i}" in reader.pages[0].extract_text()
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+
+    assert load.percentile(values, 0.50) == 51.0
+    assert load.percentile(values, 0.99) == 100.0
+    assert load.percentile([], 0.5) is None
+
+
+def test_scenario_counts_fallbacks_and_exceptions_as_errors(monkeypatch):
+    request = httpx.Request("GET", "http://bench/")
+    answers = {
+        0: httpx.Response(200, json={"status": "success"}, request=request),
+        1: httpx.Response(200, json={"status": "error", "jobs": []}, request=request),
+        2: httpx.Response(500, request=request),
+        3: httpx.Response(302, request=request),
+    }
+
+    async def call(client, i, ctx):
+        if i == 4:
+            raise httpx.ConnectError("refused")
+        return answers.get(i, answers[0])
+
+    monkeypatch.setitem(load.SCENARIOS, "fake", call)
+    result = asyncio.run(load.run_scenario(None, "fake", requests=5, concurrency=2, ctx={}))
+
+    assert result["statuses"] == {"200": 1, "200-fallback": 1, "500": 1, "302": 1, "ConnectError": 1}
+    assert (result["ok"], result["errors"]) == (2, 3)
+    assert result["p50_ms"] is not None and result["max_ms"] >= result["p50_ms"]
+
+
+def test_compare_reports_change_per_scenario(tmp_path, capsys):
+    def report(path, commit, p50, rps):
+        scenario = {"p50_ms": p50, "p95_ms": p50 * 2, "p99_ms": p50 * 3, "throughput_rps": rps, "errors": 0}
+        path.write_text(json.dumps({"meta": {"commit": commit}, "scenarios": {"resume": scenario}}))
+        return str(path)
+
+    load.compare(report(tmp_path / "before.json", "aaa", 100.0, 10.0), report(tmp_path / "after.json", "bbb", 50.0, 20.0))
+    diff = json.loads(capsys.readouterr().out)
+
+    assert (diff["before"], diff["after"]) == ("aaa", "bbb")
+    assert diff["scenarios"]["resume"]["p50_ms"] == {"before": 100.0, "after": 50.0, "change_pct": -50.0}
+    assert diff["scenarios"]["resume"]["throughput_rps"]["change_pct"] == 100.0
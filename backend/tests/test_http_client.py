@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+from api import main
+from api.config import HTTP_MAX_CONNECTIONS_PER_HOST
+from api.http_client import SharedHttpClient, shared_http
+
+
+@pytest.fixture
+def upstream():
+    """A local stand-in for LinkedIn / RapidAPI that records every client socket it sees."""
+    sockets = set()
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        sockets.add(tuple(scope["client"]))
+        await asyncio.sleep(0.005)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"data": []}'})
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/search", sockets
+    server.should_exit = True
+    thread.join()
+
+
+async def fire(get, url, requests=60, concurrency=10):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            (await get(url)).raise_for_status()
+
+    await asyncio.gather(*[one() for _ in range(requests)])
+
+
+def test_shared_client_reuses_connections(upstream):
+    url, sockets = upstream
+    http = SharedHttpClient()
+
+    async def main():
+        try:
+            await fire(http.client.get, url)
+            await fire(http.client.get, url)
+        finally:
+            await http.close()
+
+    asyncio.run(main())
+
+    # 120 requests over at most a pool's worth of keep-alive connections, all counted by the trace hook
+    assert 1 <= len(sockets) <= min(10, HTTP_MAX_CONNECTIONS_PER_HOST)
+    assert http.connections_opened == {"127.0.0.1": len(sockets)}
+    assert http.stats()["hosts"]["127.0.0.1"]["latency"]["count"] == 120
+
+
+def test_per_request_clients_do_not(upstream):
+    # The pattern the shared client replaced, as the baseline for the test above
+    url, sockets = upstream
+
+    async def get(url):
+        async with httpx.AsyncClient() as client:
+            return await client.get(url)
+
+    asyncio.run(fire(get, url, requests=30))
+
+    assert len(sockets) == 30
+
+
+def test_lifespan_opens_and_closes_the_client():
+    with TestClient(main.app):
+        client = shared_http._client
+        assert client is not None and not client.is_closed
+        assert shared_http.client is client
+
+    assert shared_http._client is None
+    assert client.is_closed
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from api.instrumentation import RequestMetricsMiddleware, route_template
+
+app = FastAPI()
+app.add_middleware(RequestMetricsMiddleware)
+
+
+@app.get("/api/user/analyses/{kind}")
+def analyses(kind: str):
+    return {"kind": kind}
+
+
+@app.get("/api/v2/items/{item_id}")
+def item(item_id: str):
+    return {"id": item_id}
+
+
+def requests_for(route):
+    return REGISTRY.get_sample_value(
+        "linkbrand_http_requests_total", {"method": "GET", "route": route, "status": "200"}
+    ) or 0
+
+
+def test_param_value_equal_to_a_literal_segment():
+    client = TestClient(app)
+    before = requests_for("/api/user/analyses/{kind}"), requests_for("/api/v2/items/{item_id}")
+
+    # The value "user" (or "v2") also appears as a fixed segment of the path
+    assert client.get("/api/user/analyses/user").status_code == 200
+    assert client.get("/api/v2/items/v2").status_code == 200
+
+    assert requests_for("/api/user/analyses/{kind}") == before[0] + 1
+    assert requests_for("/api/v2/items/{item_id}") == before[1] + 1
+    assert requests_for("/api/{kind}/analyses/{kind}") == 0
+    assert requests_for("/api/{item_id}/items/{item_id}") == 0
+
+
+def test_route_found_without_a_recorded_route():
+    # What an older Starlette leaves behind: the endpoint and params, but no "route"
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/user/analyses/user", "app": app,
+        "endpoint": analyses, "path_params": {"kind": "user"},
+    }
+    assert route_template(scope) == "/api/user/analyses/{kind}"
+    assert route_template({"type": "http", "path": "/nowhere"}) == "unmatched"
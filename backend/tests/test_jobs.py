@@ -0,0 +1,117 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import jobs, main
+from api.config import JOBS_FRESH_SECONDS
+from api.database import SessionLocal
+from api.jsearch import OfflineJSearchClient
+from api.models import JobQuery
+
+RESUME = "Elixir engineer: Phoenix services, Postgres, distributed systems."
+
+
+class RecordingJSearch(OfflineJSearchClient):
+    """The offline JSearch stand-in, remembering the page count of every call."""
+
+    def __init__(self):
+        super().__init__()
+        self.pages = []
+
+    async def search(self, skill, num_pages=1):
+        self.pages.append(num_pages)
+        return await super().search(skill, num_pages)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    jsearch = RecordingJSearch()
+
+    async def extract_text(upload):
+        return RESUME
+
+    monkeypatch.setattr(jobs, "JSEARCH_OFFLINE", True)
+    monkeypatch.setattr(jobs, "get_jsearch_client", lambda: jsearch)
+    monkeypatch.setattr(jobs.pdf_service, "extract_text", extract_text)
+    with TestClient(main.app) as client:
+        client.jsearch = jsearch
+        yield client
+
+
+def recommend(client, skill):
+    return client.get("/api/jobs/recommend", params={"skill": skill}).json()
+
+
+def ranked(client, skill):
+    return client.post(
+        "/api/jobs/recommend/ranked",
+        files={"resume": ("resume.pdf", b"%PDF-1.4", "application/pdf")},
+        data={"skill": skill},
+    ).json()
+
+
+def stored_pages(query):
+    db = SessionLocal()
+    try:
+        return db.get(JobQuery, query).num_pages
+    finally:
+        db.close()
+
+
+def test_ranked_is_not_served_a_one_page_fetch(client):
+    first = recommend(client, "Elixir")
+    assert (first["source"], first["count"]) == ("live", 10)
+
+    # The one-page entry can't answer a three-page request: fetch again with 3 pages
+    result = ranked(client, "Elixir")
+    assert result["source"] == "live"
+    assert result["count"] == 10
+    assert client.jsearch.pages == [1, 3]
+    assert stored_pages("elixir") == 3
+
+    # The three-page entry answers both routes from then on
+    assert recommend(client, "Elixir")["source"] == "cache"
+    assert ranked(client, "Elixir")["source"] == "cache"
+    assert client.jsearch.pages == [1, 3]
+
+
+def test_stale_refresh_keeps_the_stored_pages(client):
+    ranked(client, "Clojure")
+    db = SessionLocal()
+    try:
+        db.get(JobQuery, "clojure").fetched_at = datetime.utcnow() - timedelta(seconds=JOBS_FRESH_SECONDS + 60)
+        db.commit()
+    finally:
+        db.close()
+
+    # A one-page request serves the stale entry and refreshes it in the background, still with 3 pages
+    assert recommend(client, "Clojure")["source"] == "stale"
+    assert client.jsearch.pages == [3, 3]
+    assert stored_pages("clojure") == 3
+
+
+def test_limit_is_bounded(client):
+    assert client.get("/api/jobs/recommend", params={"skill": "Elm", "limit": 3}).json()["count"] == 3
+    for limit in (0, -1, 51):
+        assert client.get("/api/jobs/recommend", params={"skill": "Elm", "limit": limit}).status_code == 422
+
+
+def test_ranking_runs_off_the_event_loop(client, monkeypatch):
+    threads = {}
+    real_score = jobs.score_against
+
+    async def extract_text(upload):
+        threads["loop"] = threading.get_ident()
+        return RESUME
+
+    def score_against(resume_text, job_texts):
+        threads["rank"] = threading.get_ident()
+        return real_score(resume_text, job_texts)
+
+    monkeypatch.setattr(jobs.pdf_service, "extract_text", extract_text)
+    monkeypatch.setattr(jobs, "score_against", score_against)
+
+    assert ranked(client, "Haskell")["count"] == 10
+    assert threads["rank"] != threads["loop"]
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from api import model_router as router_module
+from api.llm_cache import LLMResponseCache
+from api.model_router import ModelRouter
+
+MODELS = ["model-a", "model-b", "model-c"]
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), ttl_seconds=3600, max_entries=100)
+    monkeypatch.setattr(router_module, "llm_cache", cache)
+    return cache
+
+
+class EchoGateway:
+    waiting = 0
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, prompt, model_name, max_retries=None, json_mode=False):
+        self.calls.append((model_name, json_mode))
+        return '{"answer": 1}' if json_mode else "plain answer"
+
+
+def counts(cache):
+    stats = cache.stats()
+    return stats["hits"], stats["misses"], stats["hit_ratio"]
+
+
+def test_one_lookup_counts_once_across_models(cache):
+    router = ModelRouter(MODELS, EchoGateway(), hedge_percentile=0)
+
+    assert router.cached("prompt") is None
+    assert counts(cache) == (0, 1, 0.0)
+
+    # Stored under the last model: found by one lookup, one hit
+    cache.set("model-c", "prompt", "from c")
+    assert router.cached("prompt") == ("from c", "model-c")
+    assert counts(cache) == (1, 1, 0.5)
+
+
+def test_lookup_prefers_model_order_and_skips_rejected(cache):
+    cache.set("model-b", "prompt", "from b")
+    cache.set("model-a", "prompt", "from a")
+
+    assert cache.lookup(MODELS, "prompt") == ("from a", "model-a")
+    assert cache.lookup(MODELS, "prompt", accept=lambda text: text != "from a") == ("from b", "model-b")
+    assert cache.lookup(MODELS, "prompt", accept=lambda text: False) is None
+    assert counts(cache)[:2] == (2, 1)
+
+
+def test_json_mode_is_part_of_the_key(cache):
+    gateway = EchoGateway()
+    router = ModelRouter(MODELS, gateway, hedge_percentile=0)
+
+    async def main():
+        plain = await router.generate("Summarize this", cache=True)
+        as_json = await router.generate("Summarize this", cache=True, json_mode=True)
+        again = await router.generate("Summarize this", cache=True, json_mode=True)
+        return plain, as_json, again
+
+    plain, as_json, again = asyncio.run(main())
+
+    # The plain answer is never served to the JSON-mode caller
+    assert (plain, as_json, again) == ("plain answer", '{"answer": 1}', '{"answer": 1}')
+    assert gateway.calls == [("model-a", False), ("model-a", True)]
+    assert cache.get("model-a", "Summarize this") == "plain answer"
+    assert cache.get("model-a", "Summarize this", json_mode=True) == '{"answer": 1}'
@@ -0,0 +1,220 @@
+import asyncio
+
+import pytest
+
+from api import model_router as router_module
+from api.llm_cache import LLMResponseCache
+from api.llm_json import (
+    AtsResult, LLMJSONError, extract_json, generate_json, load_json, repair_json,
+)
+from api.model_router import ModelRouter
+
+VALID = '{"ats_score": 82, "missing_sections": "Projects", "feedback_list": ["Quantify results"]}'
+
+
+# ==========================================
+# EXTRACTION
+# ==========================================
+@pytest.mark.parametrize("text, expected", [
+    ('Sure! Here is the result: {"a": 1} Hope that helps {"b": 2}', '{"a": 1}'),
+    ('```json\n{"a": [1, 2]}\n```', '{"a": [1, 2]}'),
+    ('{"a": "a } inside", "b": "\\" }"}', '{"a": "a } inside", "b": "\\" }"}'),
+    ('[{"a": 1}, {"b": 2}] trailing', '[{"a": 1}, {"b": 2}]'),
+])
+def test_extract_first_balanced_value(text, expected):
+    assert extract_json(text) == (expected, True)
+
+
+def test_extract_truncated_and_missing():
+    assert extract_json('prose {"a": [1, 2') == ('{"a": [1, 2', False)
+    assert extract_json("no json here") == (None, False)
+
+
+@pytest.mark.parametrize("text", [
+    'Here is [the analysis]: {"ats_score": 80, "feedback_list": ["Add metrics"]}',
+    'Score [0-100] below {"ats_score": 80, "feedback_list": ["Add metrics"]}',
+    'Notes {see below} [1) and 2)]\n```json\n{"ats_score": 80, "feedback_list": ["Add metrics"]}\n```',
+])
+def test_brackets_in_prose_before_the_object(text):
+    assert load_json(text) == ({"ats_score": 80, "feedback_list": ["Add metrics"]}, "ok")
+
+
+def test_prose_brackets_then_truncated_object():
+    assert load_json('Range [0-100]: {"ats_score": 80, "feedback_list": ["a"') == (
+        {"ats_score": 80, "feedback_list": ["a"]}, "repaired",
+    )
+
+
+def test_prose_brackets_alone_raise():
+    with pytest.raises(LLMJSONError):
+        load_json("Score [out of a hundred] and {no json here}")
+
+
+def test_prose_brackets_do_not_trigger_a_reprompt():
+    model = ScriptedModel(f"Score [0-100] below:\n{VALID}")
+
+    result = asyncio.run(generate_json(model, "Score this resume", AtsResult, "test"))
+
+    assert result.ats_score == 82
+    assert len(model.prompts) == 1
+
+
+# ==========================================
+# REPAIR
+# ==========================================
+@pytest.mark.parametrize("broken, expected", [
+    ("{'a': 'it\"s', 'b': 1}", {"a": 'it"s', "b": 1}),
+    ("{ats_score: 80, feedback_list: []}", {"ats_score": 80, "feedback_list": []}),
+    ("{'ok': True, 'bad': False, 'none': None}", {"ok": True, "bad": False, "none": None}),
+    ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}),
+    ('{"a": 1, // the score\n "b": 2}', {"a": 1, "b": 2}),
+    ("{“a”: “curly”}", {"a": "curly"}),
+])
+def test_repair(broken, expected):
+    assert load_json(broken) == (expected, "repaired")
+
+
+# A value cut off mid-way is dropped rather than kept half-written
+@pytest.mark.parametrize("truncated, expected", [
+    ('{"a": 1, "b": ["x", "y', {"a": 1, "b": ["x"]}),
+    ('{"a": 1, "b": ', {"a": 1}),
+    ('{"a": {"b": "c"', {"a": {"b": "c"}}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1,', {"a": 1}),
+])
+def test_repair_truncated(truncated, expected):
+    assert load_json(truncated) == (expected, "repaired")
+
+
+def test_valid_json_is_untouched():
+    assert load_json(f"Result:\n{VALID}")[1] == "ok"
+    assert repair_json('{"a": "b"}') == '{"a": "b"}'
+
+
+@pytest.mark.parametrize("text", ["", "I cannot help with that.", None])
+def test_load_without_json_raises(text):
+    with pytest.raises(LLMJSONError):
+        load_json(text)
+
+
+# ==========================================
+# GENERATE: reprompt, merge, failure
+# ==========================================
+class ScriptedModel:
+    """A generate() callable that returns its answers in order and records the prompts."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    async def __call__(self, prompt, json_mode, accept):
+        self.prompts.append(prompt)
+        return self.answers.pop(0)
+
+
+def test_valid_answer_needs_one_call():
+    model = ScriptedModel(f"```json\n{VALID}\n```")
+
+    result = asyncio.run(generate_json(model, "Score this resume", AtsResult, "test"))
+
+    assert result.ats_score == 82
+    assert len(model.prompts) == 1
+
+
+def test_reprompt_merges_missing_field():
+    model = ScriptedModel(
+        '{"ats_score": 75, "missing_sections": "Skills"}',
+        '{"feedback_list": ["Add a skills section"]}',
+    )
+
+    result = asyncio.run(generate_json(model, "Score this resume", AtsResult, "test"))
+
+    assert result.model_dump() == {
+        "ats_score": 75, "missing_sections": "Skills", "feedback_list": ["Add a skills section"],
+    }
+    reprompt = model.prompts[1]
+    assert reprompt.startswith("Score this resume")
+    assert "feedback_list" in reprompt and "ats_score" not in reprompt.split("\n\n", 1)[1]
+
+
+@pytest.mark.parametrize("answers", [
+    ("I'm sorry, I can't do that.", "Still no JSON."),
+    ('{"ats_score": "high"}', '{"ats_score": "very high"}'),
+])
+def test_failure_raises(answers):
+    model = ScriptedModel(*answers)
+
+    with pytest.raises(LLMJSONError):
+        asyncio.run(generate_json(model, "Score this resume", AtsResult, "test"))
+    assert len(model.prompts) == 2
+
+
+# ==========================================
+# CACHE: only answers that validate are stored
+# ==========================================
+class FakeGateway:
+    waiting = 0
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    async def generate(self, prompt, model_name, max_retries=None, json_mode=False):
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def router(monkeypatch, tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), ttl_seconds=3600, max_entries=100)
+    monkeypatch.setattr(router_module, "llm_cache", cache)
+    router = ModelRouter(["model-a"], FakeGateway(), hedge_percentile=0)
+    router.cache = cache
+    return router
+
+
+def cached_generate(router):
+    async def generate(prompt, json_mode, accept):
+        return await router.generate(prompt, cache=True, json_mode=json_mode, accept=accept)
+    return generate
+
+
+def test_invalid_answers_are_not_cached(router):
+    router.gateway.answers = [
+        "Sorry, try again later.", '{"oops": 1}',   # first run: malformed answer, useless reprompt
+        VALID,                                      # second run: a real answer
+    ]
+
+    with pytest.raises(LLMJSONError):
+        asyncio.run(generate_json(cached_generate(router), "Score this resume", AtsResult, "test"))
+    assert router.cache.stats()["entries"] == 0
+
+    result = asyncio.run(generate_json(cached_generate(router), "Score this resume", AtsResult, "test"))
+    assert result.ats_score == 82
+    assert router.gateway.calls == 3
+    assert router.cache_hits == 0
+
+
+def test_valid_answer_is_cached(router):
+    router.gateway.answers = [VALID, RuntimeError("model down")]
+
+    first = asyncio.run(generate_json(cached_generate(router), "Score this resume", AtsResult, "test"))
+    second = asyncio.run(generate_json(cached_generate(router), "Score this resume", AtsResult, "test"))
+
+    assert first == second
+    assert router.gateway.calls == 1
+    assert router.cache_hits == 1
+
+
+def test_stale_invalid_entry_is_regenerated(router):
+    # An entry written before validation gated the cache is skipped and overwritten
+    router.cache.set("model-a", "Score this resume", "not json", json_mode=True)
+    router.gateway.answers = [VALID]
+
+    result = asyncio.run(generate_json(cached_generate(router), "Score this resume", AtsResult, "test"))
+
+    assert result.ats_score == 82
+    assert router.cache.get("model-a", "Score this resume", json_mode=True) == VALID
@@ -0,0 +1,111 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+from api.config import MATCH_MAX_JOBS, MATCH_TOP_K_MAX
+from api.matching import N_FEATURES, _feature_ids, score_against, top_k
+
+RESUME = "Backend engineer: Python, Django and PostgreSQL services on AWS, Docker and Kubernetes."
+JOBS = [
+    "Senior Python engineer, Django and PostgreSQL, AWS.",
+    "Pastry chef for a busy bakery.",
+    "Kubernetes platform engineer: Docker, AWS, Terraform.",
+    "",
+]
+
+
+def dense_scores(resume_text, job_texts):
+    """The old dense (n, N_FEATURES) TF-IDF, as the reference for the sparse one."""
+    texts = [resume_text] + job_texts
+    counts = np.zeros((len(texts), N_FEATURES), dtype=np.float64)
+    for row, text in enumerate(texts):
+        ids = _feature_ids(text)
+        if ids.size:
+            counts[row] = np.bincount(ids, minlength=N_FEATURES)
+    idf = np.log((1 + len(texts)) / (1 + np.count_nonzero(counts, axis=0))) + 1.0
+    counts[counts > 0] = 1.0 + np.log(counts[counts > 0])
+    counts *= idf
+    norms = np.linalg.norm(counts, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = counts / norms
+    return matrix[1:] @ matrix[0]
+
+
+# ==========================================
+# SCORING
+# ==========================================
+def test_sparse_scores_match_dense():
+    scores = score_against(RESUME, JOBS)
+
+    assert scores.dtype == np.float32 and scores.shape == (len(JOBS),)
+    np.testing.assert_allclose(scores, dense_scores(RESUME, JOBS), atol=1e-6)
+    assert top_k(scores, 2) == [0, 2]
+    assert scores[1] == scores[3] == 0
+
+
+def test_empty_inputs():
+    assert score_against(RESUME, []).shape == (0,)
+    assert score_against("", ["", "the and of"]).tolist() == [0.0, 0.0]
+
+
+# ==========================================
+# ROUTE LIMITS
+# ==========================================
+@pytest.fixture
+def client(monkeypatch):
+    threads = {"loop": None, "scoring": []}
+
+    async def extract_text(upload):
+        threads["loop"] = threading.current_thread()
+        return RESUME
+
+    real_score = main.score_against
+
+    def score(resume_text, job_texts):
+        threads["scoring"].append(threading.current_thread())
+        return real_score(resume_text, job_texts)
+
+    monkeypatch.setattr(main.pdf_service, "extract_text", extract_text)
+    monkeypatch.setattr(main, "score_against", score)
+    client = TestClient(main.app)
+    client.scoring_threads = threads
+    return client
+
+
+def post(client, jobs, **data):
+    return client.post(
+        "/api/analyze/match-jobs",
+        files={"resume": ("resume.pdf", b"%PDF-1.4", "application/pdf")},
+        data={"jobs": jobs if isinstance(jobs, str) else json.dumps(jobs), **data},
+    )
+
+
+def test_ranks_jobs_off_the_event_loop(client):
+    response = post(client, [{"title": "Job", "description": text} for text in JOBS])
+
+    assert response.status_code == 200
+    matches = response.json()["matches"]
+    assert [m["description"] for m in matches[:2]] == [JOBS[0], JOBS[2]]
+    scoring = client.scoring_threads["scoring"]
+    assert scoring and client.scoring_threads["loop"] not in scoring
+
+
+def test_too_many_jobs(client):
+    jobs = [{"description": "Python"}] * (MATCH_MAX_JOBS + 1)
+
+    assert post(client, jobs).status_code == 413
+    assert client.scoring_threads["scoring"] == []
+
+
+@pytest.mark.parametrize("count", ["0", "-1", str(MATCH_TOP_K_MAX + 1)])
+def test_top_k_bounds(client, count):
+    assert post(client, [{"description": "Python"}], top_k_count=count).status_code == 422
+
+
+@pytest.mark.parametrize("jobs", ["{}", "[1, 2]", "not json"])
+def test_bad_jobs_payload(client, jobs):
+    assert post(client, jobs).status_code == 400
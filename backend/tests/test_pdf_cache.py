@@ -0,0 +1,65 @@
+import os
+import time
+
+from api.pdf_cache import PdfTextCache
+
+
+def make_cache(tmp_path, **kwargs):
+    # max_items=1: every older entry is pushed out to disk
+    return PdfTextCache(1, str(tmp_path), **kwargs)
+
+
+def age(cache, key, seconds):
+    path = cache._disk_path(key)
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_spilled_entries_are_read_back(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("a", "resume a")
+    cache.put("b", "resume b")
+
+    assert os.listdir(tmp_path) == ["a.txt"]
+    assert cache.get("a") == "resume a"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_expired_file_is_not_served(tmp_path):
+    cache = make_cache(tmp_path, disk_max_age=60)
+    cache.put("a", "resume a")
+    cache.put("b", "resume b")
+    age(cache, "a", 120)
+
+    assert cache.get("a") is None
+    assert not os.path.exists(cache._disk_path("a"))
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def test_sweep_drops_expired_then_oldest(tmp_path):
+    cache = make_cache(tmp_path, write_through=True, disk_max_age=3600, disk_max_bytes=25)
+    for i, key in enumerate("abcde"):
+        cache.put(key, "x" * 10)
+        age(cache, key, 100 - i)
+    age(cache, "e", 7200)
+
+    cache.sweep_disk()
+
+    # "e" expired; of the rest only the two newest fit in 25 bytes
+    assert sorted(os.listdir(tmp_path)) == ["c.txt", "d.txt"]
+
+
+def test_sweep_runs_every_n_writes(tmp_path):
+    cache = make_cache(tmp_path, write_through=True, disk_max_bytes=10)
+    cache.SWEEP_EVERY = 3
+    for key in "ab":
+        cache.put(key, "x" * 10)
+        age(cache, key, 60)
+    assert len(os.listdir(tmp_path)) == 2
+
+    cache.put("c", "x" * 10)
+    assert os.listdir(tmp_path) == ["c.txt"]
+
+
+def test_sweep_without_folder(tmp_path):
+    make_cache(tmp_path / "missing").sweep_disk()
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import InvalidRequestError
+
+from api import main
+
+from api.ai_agent import list_posts, model_router
+from api.database import SessionLocal, engine
+from api.migrations import init_db
+from api.models import Post, User
+
+USER_ID = 201
+
+
+@pytest.fixture
+def db():
+    init_db(engine)
+    db = SessionLocal()
+    db.query(Post).filter(Post.user_id == USER_ID).delete(synchronize_session=False)
+    if not db.get(User, USER_ID):
+        db.add(User(id=USER_ID, linkedin_id="posts-user", name="Poster"))
+    started = datetime(2026, 1, 1)
+    # Two posts share a timestamp: the id breaks the tie
+    for i, minutes in enumerate([0, 1, 2, 2, 3]):
+        db.add(Post(user_id=USER_ID, content=f"post {i}", created_at=started + timedelta(minutes=minutes)))
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_user_posts_is_never_loaded(db):
+    user = db.get(User, USER_ID)
+
+    with pytest.raises(InvalidRequestError):
+        user.posts
+    # The other side still loads
+    assert db.query(Post).filter(Post.user_id == USER_ID).first().owner is user
+
+
+def test_list_posts_pages_newest_first(db):
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_posts(db, USER_ID, cursor, limit=2)
+        seen.append([post.content for post in page])
+        if cursor is None:
+            break
+
+    assert seen == [["post 4", "post 3"], ["post 2", "post 1"], ["post 0"]]
+
+
+def test_generate_follows_the_gateway_key(monkeypatch):
+    async def generate_with_model(prompt, cache=False, fresh=False, max_retries=None):
+        return "A post about Rust", "model-a"
+
+    monkeypatch.setattr(model_router, "generate_with_model", generate_with_model)
+    with TestClient(main.app) as client:
+        body = {"topic": "Rust"}
+        assert client.post("/api/generate/post", json=body).json()["content"].startswith("Error: GEMINI_API_KEY")
+        assert "Error: GEMINI_API_KEY" in client.post("/api/generate/post/stream", json=body).text
+
+        # The key configured for the gateway is the only one checked
+        monkeypatch.setattr("api.llm_gateway.GEMINI_API_KEY", "test")
+        assert client.post("/api/generate/post", json=body).json() == {"content": "A post about Rust"}
@@ -0,0 +1,239 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from selenium.common.exceptions import WebDriverException
+
+from api import scraper
+from api.config import SCRAPER_BULK_MAX_URLS
+from api.scraper import ScraperPool, parse_profile_html, profile_url
+from conftest import fixture_text
+
+PROFILE = "https://www.linkedin.com/in/jane-doe/"
+
+
+# ==========================================
+# FAKE CHROME (serves the saved HTML fixtures)
+# ==========================================
+class FakeDriver:
+    """The parts of webdriver.Chrome the pool uses; profile pages need the session cookie."""
+
+    def __init__(self, load_seconds: float = 0.0):
+        self.load_seconds = load_seconds
+        self.current_url = "about:blank"
+        self.page_source = ""
+        self.visited = []
+        self.cookies = []
+        self.page_load_timeout = None
+        self.crash = False
+        self.quit_called = False
+
+    def set_page_load_timeout(self, seconds):
+        self.page_load_timeout = seconds
+
+    def get(self, url):
+        if self.crash:
+            raise WebDriverException("chrome not reachable")
+        time.sleep(self.load_seconds)
+        self.visited.append(url)
+        if url.startswith("https://www.linkedin.com/in/") and not self.cookies:
+            self.current_url, self.page_source = "https://www.linkedin.com/authwall", fixture_text("linkedin_authwall.html")
+        elif url.startswith("https://www.linkedin.com/in/"):
+            self.current_url, self.page_source = url, fixture_text("linkedin_profile.html")
+        else:
+            self.current_url, self.page_source = url, "<html></html>"
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script):
+        return "complete"
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A two-driver pool on FakeDrivers that already holds a LinkedIn session cookie."""
+    pool = ScraperPool(size=2, headless=True)
+    pool.drivers = []
+    pool.load_seconds = 0.0
+
+    def start_chrome():
+        driver = FakeDriver(pool.load_seconds)
+        pool.drivers.append(driver)
+        return driver
+
+    monkeypatch.setattr(pool, "_start_chrome", start_chrome)
+    pool._cookies = [{"name": "li_at", "value": "session"}]
+    return pool
+
+
+# ==========================================
+# PARSER
+# ==========================================
+def test_parse_profile_fixture():
+    parsed = parse_profile_html(fixture_text("linkedin_profile.html"))
+
+    assert parsed["name"] == "Jane Doe"
+    assert parsed["raw_text"].startswith("Name: Jane Doe\nAbout: Data engineer building streaming pipelines")
+
+
+def test_parse_page_without_profile():
+    parsed = parse_profile_html(fixture_text("linkedin_authwall.html"))
+
+    assert parsed == {"raw_text": "Name: Unknown User\nAbout: ", "name": "Unknown User"}
+
+
+# ==========================================
+# URL ALLOW-LIST
+# ==========================================
+@pytest.mark.parametrize("url", [
+    "https://www.linkedin.com/in/jane-doe",
+    "https://www.linkedin.com/in/jane-doe/",
+    " https://www.linkedin.com/in/jane-doe/?trk=public_profile ",
+    "HTTPS://WWW.LINKEDIN.COM/in/jane-doe#about",
+])
+def test_profile_url_canonical(url):
+    assert profile_url(url) == PROFILE
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "http://localhost:8000/in/jane-doe",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://www.linkedin.com/in/jane-doe",
+    "https://www.linkedin.com.evil.example/in/jane-doe",
+    "https://user@www.linkedin.com/in/jane-doe",
+    "https://www.linkedin.com:8443/in/jane-doe",
+    "https://linkedin.com/in/jane-doe",
+    "https://www.linkedin.com/feed/",
+    "https://www.linkedin.com/in/jane-doe/../../redir",
+    "javascript:alert(1)",
+    "",
+])
+def test_profile_url_rejects(url):
+    with pytest.raises(ValueError):
+        profile_url(url)
+
+
+# ==========================================
+# DRIVER POOL
+# ==========================================
+def test_pool_reuses_warm_driver(pool):
+    first = pool.scrape("https://www.linkedin.com/in/jane-doe")
+    second = pool.scrape("https://www.linkedin.com/in/jane-doe?trk=x")
+
+    assert first["name"] == second["name"] == "Jane Doe"
+    assert len(pool.drivers) == 1
+    driver = pool.drivers[0]
+    assert driver.page_load_timeout == scraper.SCRAPER_PAGE_TIMEOUT
+    # Shared cookies were installed once, then the profile was fetched under its canonical URL
+    assert driver.cookies == pool._cookies
+    assert driver.visited == [scraper.LINKEDIN_HOME, PROFILE, PROFILE]
+
+
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "http://localhost:8000/admin", "http://10.0.0.5/"])
+def test_pool_never_opens_other_urls(pool, url):
+    assert pool.scrape(url) is None
+    assert pool.drivers == []
+
+
+def test_pool_recycles_crashed_driver(pool):
+    assert pool.scrape(PROFILE)["name"] == "Jane Doe"
+    pool.drivers[0].crash = True
+
+    assert pool.scrape(PROFILE) is None
+    assert pool.drivers[0].quit_called
+    assert pool._created == 0
+
+    assert pool.scrape(PROFILE)["name"] == "Jane Doe"
+    assert len(pool.drivers) == 2
+
+
+def test_pool_caps_drivers_under_load(pool):
+    pool.load_seconds = 0.05
+    busy, peak, guard = [0], [0], threading.Lock()
+    original = ScraperPool._load_profile
+
+    def tracked(self, pooled, url):
+        with guard:
+            busy[0] += 1
+            peak[0] = max(peak[0], busy[0])
+        try:
+            return original(self, pooled, url)
+        finally:
+            with guard:
+                busy[0] -= 1
+
+    pool._load_profile = tracked.__get__(pool)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(pool.scrape, [PROFILE] * 6))
+
+    assert [r["name"] for r in results] == ["Jane Doe"] * 6
+    assert len(pool.drivers) == 2
+    assert peak[0] <= 2
+
+
+def test_async_scrape_runs_on_the_pool_executor(pool, monkeypatch):
+    threads = []
+    monkeypatch.setattr(pool, "scrape", lambda url: threads.append(threading.current_thread().name) or url)
+    monkeypatch.setattr(scraper, "scraper_pool", pool)
+
+    assert asyncio.run(scraper.scrape_linkedin_profile(PROFILE)) == PROFILE
+    assert threads[0].startswith("scraper")
+    pool.shutdown()
+
+
+def test_shutdown_stops_the_executor_and_quits_drivers(pool):
+    pool.load_seconds = 0.1
+    executor = pool.start()
+    assert pool.start() is executor
+
+    # Two drivers: two scrapes are running and the third is still queued when shutdown starts
+    futures = [executor.submit(pool.scrape, PROFILE) for _ in range(3)]
+    time.sleep(0.05)
+    pool.shutdown()
+
+    assert [f.result()["name"] for f in futures[:2]] == ["Jane Doe"] * 2
+    assert futures[2].cancelled()
+    assert len(pool.drivers) == 2 and all(driver.quit_called for driver in pool.drivers)
+    assert pool._created == 0
+    # A later app start gets a fresh executor
+    assert pool.start() is not executor
+    pool.shutdown()
+
+
+# ==========================================
+# ROUTES
+# ==========================================
+@pytest.fixture
+def client():
+    from api.main import app
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "http://127.0.0.1:8000/metrics"])
+def test_scrape_url_rejects_non_profile(client, url, monkeypatch):
+    monkeypatch.setattr(scraper.scraper_pool, "scrape", lambda u: pytest.fail("scraper must not run"))
+
+    response = client.post("/api/analyze/scrape-url", json={"url": url})
+
+    assert response.status_code == 400
+
+
+def test_scrape_urls_limits(client, monkeypatch):
+    monkeypatch.setattr(scraper.scraper_pool, "scrape", lambda u: pytest.fail("scraper must not run"))
+
+    too_many = [f"https://www.linkedin.com/in/user-{i}" for i in range(SCRAPER_BULK_MAX_URLS + 1)]
+    assert client.post("/api/analyze/scrape-urls", json={"urls": too_many}).status_code == 400
+
+    mixed = [PROFILE, "file:///etc/passwd"]
+    assert client.post("/api/analyze/scrape-urls", json={"urls": mixed}).status_code == 400
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from api import analysis
+from api.llm_json import AtsResult, AtsSkillsResult
+from api.skills import covers, skill_gaps, skill_index
+
+NURSE_RESUME = (
+    "Registered Nurse, 8 years in emergency and ICU care.\n"
+    "Administered 5 ml doses and IV medication; triage of 40+ patients per shift.\n"
+    "Charge nurse at the helm of a 12-bed unit. Patient education, wound care, ACLS and BLS certified.\n"
+    "Worked at Shell occupational health clinic, Spring 2019.\n"
+)
+
+
+# ==========================================
+# NEGATIVE CASES: everyday words are not skills
+# ==========================================
+@pytest.mark.parametrize("text", [
+    "Led R&D team. Go-to-market strategy. Spring 2021 intern. American Express. Worked at Shell. C-level stakeholders.",
+    "at the helm of a roadmap to spark growth through experimentation",
+    "Excel at teamwork and customer communication.",
+    "Rest of the year spent on a Swift rollout of the new Ruby store.",
+    NURSE_RESUME,
+])
+def test_ordinary_words_are_not_skills(text):
+    assert skill_index.extract(text) == {}
+
+
+@pytest.mark.parametrize("word", ["dockers", "scalar", "docket", "locker", "reaction", "sparkling", "pythonic"])
+def test_near_words_are_not_typos(word):
+    assert skill_index.extract(f"Handled {word} daily.") == {}
+    assert skill_index.canonical(word) is None
+
+
+# ==========================================
+# POSITIVE CASES
+# ==========================================
+def test_ambiguous_aliases_in_technical_context():
+    found = skill_index.extract("Skills: Java, Ruby, Rust, Go\nGo developer building Spring Boot APIs with Python, Spark and Kafka.")
+
+    assert list(found) == ["Java", "Ruby", "Rust", "Go", "Spring Boot", "Python", "Apache Spark", "Apache Kafka"]
+    assert found["Go"] == 2
+
+
+@pytest.mark.parametrize("typo, skill", [
+    ("Kubernets", "Kubernetes"), ("kuberentes", "Kubernetes"), ("Terrafrom", "Terraform"),
+    ("Tensorflw", "TensorFlow"), ("javascrpt", "JavaScript"), ("elasticsearh", "Elasticsearch"),
+])
+def test_typos(typo, skill):
+    assert skill_index.canonical(typo) == skill
+    assert skill_index.extract(f"Deployed services with {typo} daily") == {skill: 1}
+
+
+def test_canonical_names():
+    assert skill_index.normalize(["reactjs", "React.js", "Amazon Web Services (AWS)", "Postgre SQL", "Go", "Triage"]) == [
+        "React", "AWS", "PostgreSQL", "Go", "Triage",
+    ]
+
+
+def test_gaps_against_a_job():
+    resume = skill_index.extract("Python, Django and PostgreSQL on AWS.")
+    job = "Requirements: Java, Spring Boot, Kafka, Python and Terraform. Kafka streams a plus."
+
+    assert skill_gaps(resume, skill_index.extract(job), "", job) == ["Apache Kafka", "Java", "Spring Boot", "Terraform"]
+
+
+def test_non_tech_job_falls_back_to_terms():
+    job = "Pastry chef: laminated doughs, plated desserts, pastry team lead."
+    wanted = skill_index.extract(job)
+
+    assert not covers(wanted)
+    assert skill_gaps({}, wanted, "Line cook, grill station", job)[0] == "pastry"
+
+
+# ==========================================
+# FALLBACK: a resume the taxonomy barely covers asks the model for skills
+# ==========================================
+def run_resume_pipeline(monkeypatch, text, answer):
+    calls = []
+
+    async def extract_text(contents):
+        return text
+
+    async def ask_gemini_for_json(prompt, schema, pipeline):
+        calls.append((prompt, schema))
+        return answer
+
+    monkeypatch.setattr("api.llm_gateway.GEMINI_API_KEY", "test")
+    monkeypatch.setattr(analysis.pdf_service, "extract_text", extract_text)
+    monkeypatch.setattr(analysis, "ask_gemini_for_json", ask_gemini_for_json)
+    return asyncio.run(analysis.resume_pipeline(b"%PDF")), calls
+
+
+def test_non_tech_resume_asks_model_for_skills(monkeypatch):
+    answer = {"ats_score": 70, "missing_sections": "", "feedback_list": [], "top_skills": ["Triage", "ACLS", "excel"]}
+    data, [(prompt, schema)] = run_resume_pipeline(monkeypatch, NURSE_RESUME, answer)
+
+    assert schema is AtsSkillsResult
+    assert "'top_skills'" in prompt
+    assert data["top_skills"] == ["Triage", "ACLS", "Excel"]
+
+
+def test_tech_resume_skills_stay_local(monkeypatch):
+    text = "Backend engineer. Python, Django, PostgreSQL, Docker and Kubernetes on AWS. Python services." * 2
+    answer = {"ats_score": 80, "missing_sections": "", "feedback_list": []}
+    data, [(prompt, schema)] = run_resume_pipeline(monkeypatch, text, answer)
+
+    assert schema is AtsResult
+    assert "top_skills" not in prompt
+    assert data["top_skills"][0] == "Python"
+    assert set(data["top_skills"]) <= {"Python", "Django", "PostgreSQL", "Docker", "Kubernetes", "AWS"}
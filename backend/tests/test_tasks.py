@@ -0,0 +1,118 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+from api.sessions import issue_session_token
+from api.tasks import task_queue
+
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {issue_session_token(user_id)}"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def echo(payload, db, report):
+        return {"url": payload["url"]}
+
+    monkeypatch.setitem(task_queue._handlers, "echo", echo)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def wait_done(client, path, **kwargs):
+    for _ in range(100):
+        response = client.get(path, **kwargs)
+        if response.status_code != 200 or response.json()["status"] in ("done", "failed"):
+            return response
+        time.sleep(0.02)
+    pytest.fail("task did not finish")
+
+
+# ==========================================
+# LOGGED-IN OWNER
+# ==========================================
+def test_user_task_is_private(client):
+    submitted = client.post("/api/tasks/echo", data={"url": "secret"}, headers=auth(1)).json()
+    path = f"/api/tasks/{submitted['task_id']}"
+
+    assert "key" not in submitted and submitted["poll"] == path
+    assert wait_done(client, path, headers=auth(1)).json()["result"] == {"url": "secret"}
+
+    # Another user, an anonymous caller and the events stream all get the same 404 as an unknown id
+    assert client.get(path, headers=auth(2)).status_code == 404
+    assert client.get(path).status_code == 404
+    assert client.get(f"{path}/events", headers=auth(2)).status_code == 404
+    assert client.get("/api/tasks/unknown", headers=auth(1)).status_code == 404
+
+
+# ==========================================
+# ANONYMOUS OWNER (task key)
+# ==========================================
+def test_anonymous_task_needs_its_key(client):
+    submitted = client.post("/api/tasks/echo", data={"url": "secret"}).json()
+    task_id, key = submitted["task_id"], submitted["key"]
+
+    assert submitted["poll"] == f"/api/tasks/{task_id}?key={key}"
+    assert wait_done(client, submitted["poll"]).json()["result"] == {"url": "secret"}
+    assert client.get(f"/api/tasks/{task_id}", headers={"X-Task-Key": key}).status_code == 200
+
+    events = client.get(submitted["events"])
+    assert events.status_code == 200 and "event: done" in events.text
+
+    assert client.get(f"/api/tasks/{task_id}").status_code == 404
+    assert client.get(f"/api/tasks/{task_id}?key=wrong").status_code == 404
+    assert client.get(f"/api/tasks/{task_id}?key={key}", headers=auth(1)).status_code == 200
+    other = client.post("/api/tasks/echo", data={"url": "other"}).json()
+    assert client.get(f"/api/tasks/{other['task_id']}?key={key}").status_code == 404
+
+
+# ==========================================
+# RESILIENCE
+# ==========================================
+def test_workers_survive_errors_outside_the_handler(client, monkeypatch):
+    async def boom(payload, db, report):
+        raise ValueError("handler failed")
+
+    real_update = task_queue._update
+
+    async def update(task_id, **fields):
+        if fields.get("status") == "failed":
+            raise RuntimeError("database went away")
+        await real_update(task_id, **fields)
+
+    monkeypatch.setitem(task_queue._handlers, "boom", boom)
+    monkeypatch.setattr(task_queue, "_update", update)
+    # More failures than there are workers: each one used to end its worker for good
+    for _ in range(len(task_queue._worker_tasks) + 1):
+        client.post("/api/tasks/boom", data={"url": "x"}, headers=auth(1))
+
+    submitted = client.post("/api/tasks/echo", data={"url": "after"}, headers=auth(1)).json()
+    result = wait_done(client, f"/api/tasks/{submitted['task_id']}", headers=auth(1)).json()
+
+    assert result["status"] == "done"
+    assert not any(task.done() for task in task_queue._worker_tasks)
+
+
+def test_events_end_when_the_task_disappears(client, monkeypatch):
+    submitted = client.post("/api/tasks/echo", data={"url": "x"}, headers=auth(1)).json()
+    wait_done(client, submitted["poll"], headers=auth(1))
+    running = {"id": submitted["task_id"], "status": "running", "progress": 50, "stage": "analyzing"}
+    answers = iter([running, running, None])
+
+    async def load_task(task_id, user_id=None, key=None):
+        return next(answers)
+
+    async def wait_for_change(task_id, timeout):
+        return True
+
+    monkeypatch.setattr("api.tasks.load_task", load_task)
+    monkeypatch.setattr(task_queue, "wait_for_change", wait_for_change)
+    events = client.get(f"{submitted['poll']}/events", headers=auth(1))
+
+    assert events.status_code == 200
+    assert events.text.count("event: progress") == 1
+    assert events.text.rstrip().endswith('"error": "Task not found"}')
+    assert "event: failed" in events.text
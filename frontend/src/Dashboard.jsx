@@ -22,11 +22,13 @@ export default function Dashboard() {
   useEffect(() => {
     // 1. Handle Authentication (LinkedIn Redirect)
     const token = searchParams.get("token");
+    const session = searchParams.get("session");
     const name = searchParams.get("name");
     const pic = decodeURIComponent(searchParams.get("pic") || "");
 
     if (token) {
       localStorage.setItem("linkedin_token", token);
+      if (session) localStorage.setItem("session_token", session);
       localStorage.setItem("user_name", name);
       localStorage.setItem("user_pic", pic);
       setUser({ name, pic });
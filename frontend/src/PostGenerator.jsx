@@ -15,11 +15,37 @@ export default function PostGenerator() {
     setGeneratedPost("");
     
     try {
-      const res = await axios.post("http://localhost:8000/api/generate/post", {
-        topic: topic,
-        tone: tone
+      // Server-Sent Events over POST: show text as soon as the model produces it
+      const res = await fetch("http://localhost:8000/api/generate/post/stream", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          ...(localStorage.getItem("session_token") && { Authorization: `Bearer ${localStorage.getItem("session_token")}` })
+        },
+        body: JSON.stringify({ topic: topic, tone: tone })
       });
-      setGeneratedPost(res.data.content);
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+          if (event === "chunk") setGeneratedPost((text) => text + payload.text);
+          if (event === "done") setGeneratedPost(payload.content);
+          if (event === "error") alert(payload.detail);
+        }
+      }
     } catch (err) {
       alert("Failed to generate. Check Backend.");
     } finally {
@@ -2,6 +2,14 @@ import { StrictMode } from 'react'
 import { createRoot } from 'react-dom/client'
 import './index.css'
 import App from './App.jsx'
+import axios from 'axios'
+
+// Identify the logged-in user to the backend (signed session from the LinkedIn login)
+axios.interceptors.request.use((config) => {
+  const session = localStorage.getItem("session_token")
+  if (session) config.headers.Authorization = `Bearer ${session}`
+  return config
+})
 
 createRoot(document.getElementById('root')).render(
   <StrictMode>